@@ -0,0 +1,250 @@
+import os
+import mmap
+import heapq
+import struct
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+
+# File layout:
+#   header   magic, version, record count, offset of the fan-out table
+#   records  count x (20-byte SHA-1, big-endian u32 breach count), sorted by hash
+#   fan-out  65537 x u64: index of the first record whose hash starts with each 2-byte prefix
+# A lookup reads two fan-out slots and interpolates inside one bucket (hashes are
+# uniformly distributed), so it touches a handful of pages of an arbitrarily large file.
+INDEX_MAGIC = b"SMBR"
+INDEX_VERSION = 1
+_HEADER = struct.Struct(">4sIQQ")
+_RECORD = struct.Struct(">20sI")
+RECORD_SIZE = _RECORD.size
+_FANOUT = struct.Struct(">Q")
+FANOUT_SLOTS = 1 << 16
+MAX_COUNT = 0xFFFFFFFF
+
+RUN_RECORDS = 4_000_000  # records sorted in memory per run while building (~250 MB)
+
+log = logging.getLogger(__name__)
+
+
+def password_hash(password: str) -> bytes:
+    return hashlib.sha1(password.encode("utf-8")).digest()
+
+
+# -----------------------------------------------------------------
+# Lookup
+# -----------------------------------------------------------------
+class BreachIndex:
+    """Read-only view of a breach index file through mmap; nothing is loaded up front."""
+
+    MAX_INTERPOLATIONS = 8
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # an empty file cannot be mapped
+            self._file.close()
+            raise ValueError(f"{path} is not a breach index") from None
+        if not self._is_complete():
+            self.close()
+            raise ValueError(f"{path} is not a breach index, or it is truncated")
+        st = os.fstat(self._file.fileno())
+        self.signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _is_complete(self) -> bool:
+        """Check the header and that the file is exactly as long as it says,
+        so a lookup can never read past the end of the map."""
+        if len(self._map) < _HEADER.size:
+            return False
+        magic, version, self.count, self._fanout_at = _HEADER.unpack_from(self._map, 0)
+        fanout_at = _HEADER.size + self.count * RECORD_SIZE
+        return (magic == INDEX_MAGIC and version == INDEX_VERSION and self._fanout_at == fanout_at
+                and len(self._map) == fanout_at + (FANOUT_SLOTS + 1) * _FANOUT.size)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return self.count
+
+    def _hash_at(self, i: int) -> bytes:
+        start = _HEADER.size + i * RECORD_SIZE
+        return self._map[start:start + 20]
+
+    def _bucket(self, digest: bytes) -> tuple[int, int]:
+        slot = self._fanout_at + int.from_bytes(digest[:2], "big") * _FANOUT.size
+        lo, hi = struct.unpack_from(">QQ", self._map, slot)
+        return lo, hi
+
+    def lookup(self, digest: bytes) -> int:
+        """Breach count of a SHA-1 digest; 0 if it is not in the corpus."""
+        lo, hi = self._bucket(digest)
+        key = int.from_bytes(digest, "big")
+        # the bucket spans prefixes [p, p+1), i.e. keys in [low_key, high_key)
+        low_key = int.from_bytes(digest[:2] + b"\0" * 18, "big")
+        high_key = low_key + (1 << 144)
+
+        # interpolation search, falling back to plain bisection if the data is skewed
+        steps = 0
+        while lo < hi:
+            if steps < self.MAX_INTERPOLATIONS:
+                mid = lo + (key - low_key) * (hi - lo) // (high_key - low_key)
+                mid = min(max(mid, lo), hi - 1)
+                steps += 1
+            else:
+                mid = (lo + hi) // 2
+            found = self._hash_at(mid)
+            if found == digest:
+                start = _HEADER.size + mid * RECORD_SIZE
+                return _RECORD.unpack_from(self._map, start)[1]
+            if found < digest:
+                lo = mid + 1
+                low_key = int.from_bytes(found, "big") + 1
+            else:
+                hi = mid
+                high_key = int.from_bytes(found, "big")
+        return 0
+
+    def check_password(self, password: str) -> int:
+        return self.lookup(password_hash(password))
+
+
+_index = None
+_rejected = None  # (path, signature) of a file that is no usable index, so it is logged once
+_index_lock = threading.Lock()
+
+
+def open_index(path: Path):
+    """The shared BreachIndex for path, reopened when the file is rebuilt.
+
+    None if there is no file, or if it is corrupt or truncated (which is
+    logged): the vault then carries on as if there were no breach corpus.
+    """
+    global _index, _rejected
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+    with _index_lock:
+        if _rejected == (Path(path), signature):
+            return None
+        if _index is None or _index.path != Path(path) or _index.signature != signature:
+            try:
+                index = BreachIndex(path)
+            except (OSError, ValueError) as e:
+                log.error("Ignoring the breach index: %s", e)
+                _rejected = (Path(path), signature)
+                return None
+            # the old map is left to the garbage collector: a lookup on another thread may still hold it
+            _index = index
+        return _index
+
+
+# -----------------------------------------------------------------
+# Building
+# -----------------------------------------------------------------
+def parse_dump(lines):
+    """Yield packed records from "SHA1HEX:COUNT" lines (the HIBP text dump; count optional).
+
+    Records stay packed bytes all the way through the build: they sort by
+    hash as they are, and cost a third of the memory of (digest, count) tuples.
+    """
+    pack = _RECORD.pack
+    for line in lines:
+        line = line.strip()
+        if len(line) < 40 or line.startswith(b"#"):
+            continue
+        try:
+            digest = bytes.fromhex(line[:40].decode("ascii"))
+            count = int(line[41:]) if len(line) > 41 else 1
+        except ValueError:
+            continue
+        yield pack(digest, min(count, MAX_COUNT))
+
+
+def _write_run(records: list, run_dir: str) -> str:
+    records.sort()
+    fd, path = tempfile.mkstemp(dir=run_dir, suffix=".run")
+    with os.fdopen(fd, "wb") as f:
+        f.write(b"".join(records))
+    return path
+
+
+def _read_run(path: str, block: int = 1 << 20):
+    block -= block % RECORD_SIZE
+    with open(path, "rb") as f:
+        while data := f.read(block):
+            for start in range(0, len(data), RECORD_SIZE):
+                yield data[start:start + RECORD_SIZE]
+
+
+def build_index(lines, out_path: Path, run_records: int = RUN_RECORDS) -> int:
+    """Build a breach index from dump lines; returns the number of distinct hashes.
+
+    The dump is sorted in runs of run_records that spill to temp files
+    beside out_path and are then merged, so memory stays bounded however
+    big the corpus is (an already sorted dump makes each run sort O(n)).
+    Duplicate hashes have their counts summed.
+    """
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    run_dir = tempfile.mkdtemp(dir=out_path.parent, prefix=".breach-runs-")
+    runs = []
+    try:
+        records = []
+        for record in parse_dump(lines):
+            records.append(record)
+            if len(records) >= run_records:
+                runs.append(_write_run(records, run_dir))
+                records = []
+        if records or not runs:
+            runs.append(_write_run(records, run_dir))
+
+        fd, tmp = tempfile.mkstemp(dir=out_path.parent, prefix=f".{out_path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb", buffering=1 << 20) as f:
+                f.write(b"\0" * _HEADER.size)
+                fanout = [0] * (FANOUT_SLOTS + 1)
+                count, last = 0, None
+                merged = heapq.merge(*(_read_run(r) for r in runs)) if len(runs) > 1 else _read_run(runs[0])
+
+                def emit(record):
+                    nonlocal count
+                    f.write(record)
+                    fanout[(record[0] << 8 | record[1]) + 1] += 1
+                    count += 1
+
+                for record in merged:
+                    if last is not None and record[:20] == last[:20]:
+                        # the same hash twice (across runs, or repeated in the dump): sum the counts
+                        hits = min(_RECORD.unpack(last)[1] + _RECORD.unpack(record)[1], MAX_COUNT)
+                        last = _RECORD.pack(last[:20], hits)
+                        continue
+                    if last is not None:
+                        emit(last)
+                    last = record
+                if last is not None:
+                    emit(last)
+
+                for slot in range(1, FANOUT_SLOTS + 1):
+                    fanout[slot] += fanout[slot - 1]
+                fanout_at = f.tell()
+                f.write(struct.pack(f">{FANOUT_SLOTS + 1}Q", *fanout))
+                f.seek(0)
+                f.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, count, fanout_at))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, out_path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return count
+    finally:
+        for run in runs:
+            os.unlink(run)
+        os.rmdir(run_dir)
@@ -0,0 +1,32 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+# -----------------------------------------------------------------
+# Shared SQLite helpers
+# -----------------------------------------------------------------
+_local = threading.local()
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    """Return this thread's connection to db_path, opened in WAL mode."""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+
+    conn = conns.get(str(db_path))
+    if conn is None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conns[str(db_path)] = conn
+    return conn
+
+
+def close_all():
+    conns = getattr(_local, "conns", None) or {}
+    for conn in conns.values():
+        conn.close()
+    conns.clear()
@@ -1,20 +1,28 @@
 import os
 import hashlib
+import threading
 import random
 import string
 import base64
-from datetime import datetime
-from cryptography.fernet import Fernet
-from openpyxl import Workbook, load_workbook
+import struct
+from contextlib import contextmanager
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from pathlib import Path
-from config import BASE_DIR
+from config import DATA_DIR
+from backend.notes_catalog import upsert_note
+from backend.fileio import write_atomic
+from backend.metrics import crypto_seconds
+from backend.password_health import PasswordHmac
+from backend.journal import FileLock
 
 # -----------------------------------------------------------------
 # Paths
 # -----------------------------------------------------------------
-META_FILE = BASE_DIR / "data" / "ONotes.xlsx"
-VAULT_KEY_FILE = BASE_DIR / "data" / "vault_master.key"
-META_FILE.parent.mkdir(parents=True, exist_ok=True)
+VAULT_KEY_FILE = DATA_DIR / "vault_master.key"
 
 
 # -----------------------------------------------------------------
@@ -30,50 +38,122 @@ def derive_fernet(user_key: str) -> Fernet:
     return Fernet(b64key)
 
 
-def ensure_meta_exists():
-    if not META_FILE.exists():
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "NotesKeys"
-        ws.append(["File Name", "Algorithm", "Hash of Key", "Date-Time", "Key"])
-        wb.save(META_FILE)
+def key_hash(key: str) -> str:
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
 
 
 def upsert_metadata(file_name: str, algo: str, key: str):
-    ensure_meta_exists()
-    wb = load_workbook(META_FILE)
-    ws = wb.active
-    key_hash = hashlib.sha256(key.encode("utf-8")).hexdigest()
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    """Record a note's algorithm and key hash in the notes catalog."""
+    upsert_note(file_name, algorithm=algo, key_hash=key_hash(key))
 
-    found_row = None
-    for r in range(2, ws.max_row + 1):
-        if ws.cell(row=r, column=1).value == file_name:
-            found_row = r
-            break
 
-    if found_row:
-        ws.cell(row=found_row, column=2).value = algo
-        ws.cell(row=found_row, column=3).value = key_hash
-        ws.cell(row=found_row, column=4).value = now
-        ws.cell(row=found_row, column=5).value = key
-    else:
-        ws.append([file_name, algo, key_hash, now, key])
+# -----------------------------------------------------------------
+# Streaming file encryption
+#
+# Layout: MAGIC | version (1) | segment size (4) | salt (16) | nonce prefix (7)
+# followed by AES-256-GCM segments of up to STREAM_SEGMENT_SIZE plaintext
+# bytes. Each segment nonce is prefix | counter (4) | last-segment flag (1)
+# and the header is authenticated as associated data, so truncation,
+# reordering and header tampering all fail authentication.
+# -----------------------------------------------------------------
+STREAM_MAGIC = b"SMEF"
+STREAM_VERSION = 1
+STREAM_SEGMENT_SIZE = 64 * 1024
+STREAM_ALGORITHM = "AES-256-GCM-STREAM"
+_HEADER = struct.Struct(">4sBI16s7s")
+_TAG_SIZE = 16
 
-    wb.save(META_FILE)
 
+def _stream_key(user_key: str, salt: bytes) -> AESGCM:
+    key = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=b"SecureMe stream v1").derive(
+        user_key.encode("utf-8")
+    )
+    return AESGCM(key)
 
-def encrypt_file(file_path: Path, user_key: str):
-    fernet = derive_fernet(user_key)
+
+def _segment_nonce(prefix: bytes, counter: int, last: bool) -> bytes:
+    return prefix + struct.pack(">IB", counter, 1 if last else 0)
+
+
+def iter_file(file_path: Path, chunk_size: int = STREAM_SEGMENT_SIZE):
     with open(file_path, "rb") as f:
-        data = f.read()
-    token = fernet.encrypt(data)
-    with open(file_path, "wb") as f:
-        f.write(token)
-    upsert_metadata(file_path.name, "Fernet", user_key)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def encrypt_stream(chunks, user_key: str, segment_size: int = STREAM_SEGMENT_SIZE):
+    """Yield the header and then one sealed segment per segment_size bytes of chunks."""
+    salt, prefix = os.urandom(16), os.urandom(7)
+    header = _HEADER.pack(STREAM_MAGIC, STREAM_VERSION, segment_size, salt, prefix)
+    aead = _stream_key(user_key, salt)
+    yield header
+
+    counter = 0
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        # hold back one full segment so the last one can be flagged
+        while len(buffer) > segment_size:
+            segment = bytes(buffer[:segment_size])
+            del buffer[:segment_size]
+            yield aead.encrypt(_segment_nonce(prefix, counter, False), segment, header)
+            counter += 1
+    yield aead.encrypt(_segment_nonce(prefix, counter, True), bytes(buffer), header)
+
+
+def decrypt_stream(f, user_key: str):
+    """Yield plaintext segments from an open stream-format file.
+
+    Raises InvalidTag when the key is wrong or the data was tampered with.
+    """
+    header = f.read(_HEADER.size)
+    magic, version, segment_size, salt, prefix = _HEADER.unpack(header)
+    if magic != STREAM_MAGIC or version != STREAM_VERSION:
+        raise ValueError("Not a SecureMe stream file")
+    aead = _stream_key(user_key, salt)
+
+    counter = 0
+    sealed = f.read(segment_size + _TAG_SIZE)
+    while True:
+        following = f.read(segment_size + _TAG_SIZE)
+        last = not following
+        yield aead.decrypt(_segment_nonce(prefix, counter, last), sealed, header)
+        if last:
+            return
+        sealed = following
+        counter += 1
+
+
+def is_stream_file(file_path: Path) -> bool:
+    with open(file_path, "rb") as f:
+        return f.read(len(STREAM_MAGIC)) == STREAM_MAGIC
+
+
+def write_encrypted(file_path: Path, chunks, user_key: str):
+    """Encrypt plaintext chunks straight into file_path; plaintext never touches disk."""
+    with crypto_seconds.time(op="stream_encrypt"):
+        write_atomic(file_path, encrypt_stream(chunks, user_key))
+
+
+def encrypt_file(file_path: Path, user_key: str):
+    write_encrypted(file_path, iter_file(file_path), user_key)
+    upsert_metadata(file_path.name, STREAM_ALGORITHM, user_key)
 
 
 def decrypt_file(file_path: Path, user_key: str) -> bool:
+    """Decrypt file_path in place; the file is left untouched if the key is wrong."""
+    if is_stream_file(file_path):
+        try:
+            with open(file_path, "rb") as f:
+                write_atomic(file_path, decrypt_stream(f, user_key))
+        except (InvalidTag, ValueError, struct.error):
+            return False
+        return True
+
+    # legacy whole-file Fernet token
     fernet = derive_fernet(user_key)
     with open(file_path, "rb") as f:
         token = f.read()
@@ -81,33 +161,205 @@ def decrypt_file(file_path: Path, user_key: str) -> bool:
         data = fernet.decrypt(token)
     except Exception:
         return False
-    with open(file_path, "wb") as f:
-        f.write(data)
+    write_atomic(file_path, [data])
     return True
 
 
+def decrypt_to_bytes(file_path: Path, user_key: str):
+    """Decrypt file_path into memory without writing anything; None if the key is wrong."""
+    if is_stream_file(file_path):
+        try:
+            with open(file_path, "rb") as f, crypto_seconds.time(op="stream_decrypt"):
+                return b"".join(decrypt_stream(f, user_key))
+        except (InvalidTag, ValueError, struct.error):
+            return None
+
+    try:
+        return derive_fernet(user_key).decrypt(file_path.read_bytes())
+    except Exception:
+        return None
+
+
 # -----------------------------------------------------------------
 # Text encryption (used by Password Vault)
 # -----------------------------------------------------------------
-def _get_vault_key() -> bytes:
-    if not VAULT_KEY_FILE.exists():
-        key = Fernet.generate_key()
-        VAULT_KEY_FILE.write_bytes(key)
+def derive_hmac_key(fernet_key: bytes) -> bytes:
+    """Key for the vault's password digests, derived from (never equal to) a vault key."""
+    return HKDF(
+        algorithm=hashes.SHA256(), length=32, salt=None, info=b"secureme vault password hmac",
+    ).derive(base64.urlsafe_b64decode(fernet_key))
+
+
+class VaultCrypto:
+    """Vault key ring, loaded once and shared by every request thread.
+
+    vault_master.key holds one Fernet key per line, newest first (a file
+    with a single key — the original format — is a ring of one). The
+    newest key encrypts; every key in the ring can decrypt.
+
+    Other processes may rotate the ring at any time, so the file is
+    re-read whenever its inode, mtime or size changes. Code that writes
+    ciphertext to the vault does so inside writing(), and rotation runs
+    inside rotating(): a token encrypted under a key that is about to be
+    retired is therefore always durable before the rotation pass starts,
+    and re-encrypted by it.
+    """
+
+    def __init__(self, key_file: Path):
+        self.key_file = key_file
+        self._lock = threading.Lock()
+        self._keys = None
+        self._cipher = None
+        self._hmac = None
+        self._signature = None
+        # readers/writer lock over the ring: shared by writers, exclusive for rotation
+        self._ring_flock = FileLock(key_file.with_name(key_file.name + ".lock"))
+        self._ring_cond = threading.Condition()
+        self._writers = 0
+        self._rotating = False
+
+    def _stat(self):
+        try:
+            st = os.stat(self.key_file)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _load(self):
+        if not self.key_file.exists():
+            self._create_keys([Fernet.generate_key()])
+        # stat before reading: a replace in between only makes the next call reload again
+        self._signature = self._stat()
+        keys = [line.strip() for line in self.key_file.read_bytes().splitlines() if line.strip()]
+        self._keys = keys
+        self._cipher = MultiFernet([Fernet(k) for k in keys])
+        self._hmac = PasswordHmac(derive_hmac_key(keys[0]))
+
+    def _create_keys(self, keys: list[bytes]):
+        """Create the key file unless another process beat us to it; theirs wins."""
+        self.key_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.key_file.with_name(f"{self.key_file.name}.{os.getpid()}.new")
+        with open(tmp, "wb") as f:
+            f.write(b"\n".join(keys) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.link(tmp, self.key_file)
+        except FileExistsError:
+            pass
+        finally:
+            tmp.unlink()
+
+    def _write_keys(self, keys: list[bytes]):
+        tmp = self.key_file.with_name(self.key_file.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(b"\n".join(keys) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.key_file)
+
+    def cipher(self) -> MultiFernet:
+        if self._cipher is None or self._stat() != self._signature:
+            with self._lock:
+                if self._cipher is None or self._stat() != self._signature:
+                    self._load()
+        return self._cipher
+
+    def keys(self) -> list[bytes]:
+        self.cipher()
+        return list(self._keys)
+
+    def password_hmac(self) -> PasswordHmac:
+        """Digests for the reuse index, keyed off the primary key (so they change on rotation)."""
+        self.cipher()
+        return self._hmac
+
+    def reload(self):
+        with self._lock:
+            self._load()
+
+    @contextmanager
+    def writing(self):
+        """Keep the ring from being rotated, by this or any other process, while
+        ciphertext made under it is written to the vault."""
+        with self._ring_cond:
+            while self._rotating:
+                self._ring_cond.wait()
+            if self._writers == 0:
+                self._ring_flock.acquire(shared=True)
+            self._writers += 1
+        try:
+            yield self
+        finally:
+            with self._ring_cond:
+                self._writers -= 1
+                if self._writers == 0:
+                    self._ring_flock.release()
+                    self._ring_cond.notify_all()
+
+    @contextmanager
+    def rotating(self):
+        """Exclusive hold on the ring: waits for every writer, in every process, to finish."""
+        with self._ring_cond:
+            while self._rotating or self._writers:
+                self._ring_cond.wait()
+            self._rotating = True
+            self._ring_flock.acquire()
+        try:
+            yield self
+        finally:
+            with self._ring_cond:
+                self._ring_flock.release()
+                self._rotating = False
+                self._ring_cond.notify_all()
+
+    def encrypt(self, plaintext: str) -> str:
+        with crypto_seconds.time(op="fernet_encrypt"):
+            return self.cipher().encrypt(plaintext.encode("utf-8")).decode("utf-8")
+
+    def decrypt(self, ciphertext: str) -> str:
+        with crypto_seconds.time(op="fernet_decrypt"):
+            try:
+                return self.cipher().decrypt(ciphertext.encode("utf-8")).decode("utf-8")
+            except InvalidToken:
+                # another process may have rotated the ring since we loaded it
+                self.reload()
+                return self.cipher().decrypt(ciphertext.encode("utf-8")).decode("utf-8")
+
+    def rotate(self, ciphertext: str) -> str:
+        """Re-encrypt a token under the newest key."""
+        if not ciphertext:
+            return ciphertext
+        with crypto_seconds.time(op="fernet_rotate"):
+            return self.cipher().rotate(ciphertext.encode("utf-8")).decode("utf-8")
+
+    def add_key(self) -> bytes:
+        """Prepend a fresh primary key; older keys stay in the ring for decryption."""
+        with self._lock:
+            self._load()  # the ring on disk, which another process may have rotated
+            key = Fernet.generate_key()
+            self._write_keys([key] + self._keys)
+            self._load()
         return key
-    return VAULT_KEY_FILE.read_bytes()
+
+    def retire_old_keys(self):
+        """Drop every key except the primary once nothing is encrypted with them."""
+        with self._lock:
+            self._load()
+            self._write_keys(self._keys[:1])
+            self._load()
+
+
+vault_crypto = VaultCrypto(VAULT_KEY_FILE)
 
 
 def encrypt_text(plaintext: str) -> str:
     if not plaintext:
         return ""
-    fernet = Fernet(_get_vault_key())
-    encrypted = fernet.encrypt(plaintext.encode("utf-8"))
-    return encrypted.decode("utf-8")
+    return vault_crypto.encrypt(plaintext)
 
 
 def decrypt_text(ciphertext: str) -> str:
     if not ciphertext:
         return ""
-    fernet = Fernet(_get_vault_key())
-    decrypted = fernet.decrypt(ciphertext.encode("utf-8"))
-    return decrypted.decode("utf-8")
+    return vault_crypto.decrypt(ciphertext)
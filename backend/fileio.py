@@ -0,0 +1,40 @@
+import io
+import os
+import tempfile
+from pathlib import Path
+from backend.metrics import file_rewrites, file_rewrite_bytes
+
+# -----------------------------------------------------------------
+# Crash- and reader-safe file replacement
+# -----------------------------------------------------------------
+def write_atomic(file_path: Path, chunks):
+    """Write chunks to a temp file beside file_path, fsync it, then rename over file_path.
+
+    Readers in any process see either the old file or the new one, never
+    a partial write, and never have to take a lock.
+    """
+    fd, tmp = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp")
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                written += f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    suffix = file_path.suffix or "none"
+    file_rewrites.inc(suffix=suffix)
+    file_rewrite_bytes.inc(written, suffix=suffix)
+
+
+def save_workbook(wb, file_path: Path):
+    """openpyxl's wb.save, but atomic."""
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    write_atomic(Path(file_path), [buffer.getvalue()])
@@ -1,83 +1,466 @@
 import os
+import stat
+import glob
+import uuid
+import getpass
 import subprocess
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
+import threading
 from openpyxl import Workbook, load_workbook
-from config import BASE_DIR
+from config import DATA_DIR, JOURNAL_BATCH_SIZE, JOURNAL_INTERVAL, LOCK_BACKEND, LOCK_WORKERS, LOCK_RECURSIVE
+from backend.journal import Journal
+from backend.db import connect
+from backend.fileio import save_workbook
+from backend.stats_service import stats
+from backend.metrics import storage_seconds
 
-LOCK_LOG = BASE_DIR / "data" / "LockedFolders.xlsx"
-LOCK_LOG.parent.mkdir(parents=True, exist_ok=True)
+LOCK_LOG = DATA_DIR / "LockedFolders.xlsx"
+LOCK_JOURNAL = DATA_DIR / "LockedFolders.journal"
+LOCK_MODES_DB = DATA_DIR / "folder_modes.db"
 
 
 def ensure_log_exists():
     if not LOCK_LOG.exists():
+        LOCK_LOG.parent.mkdir(parents=True, exist_ok=True)
         wb = Workbook()
         ws = wb.active
         ws.title = "LockedFolders"
         ws.append(["Folder Path", "Status", "Date-Time"])
-        wb.save(LOCK_LOG)
+        save_workbook(wb, LOCK_LOG)
 
 
-def update_log(folder_path, status):
+@storage_seconds.time(op="folder_log_apply")
+def _apply_log(records):
+    """Fold a batch of journaled status changes into LockedFolders.xlsx with one save."""
     ensure_log_exists()
     wb = load_workbook(LOCK_LOG)
     ws = wb.active
 
-    found = False
-    for row in ws.iter_rows(min_row=2, values_only=False):
-        if row[0].value == folder_path:
-            row[1].value = status
-            row[2].value = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            found = True
-            break
+    rows = {row[0].value: row for row in ws.iter_rows(min_row=2, values_only=False) if row[0].value}
+    for record in records:
+        row = rows.get(record["path"])
+        if row is not None:
+            row[1].value = record["status"]
+            row[2].value = record["date"]
+        else:
+            ws.append([record["path"], record["status"], record["date"]])
+            rows[record["path"]] = ws[ws.max_row]
 
-    if not found:
-        ws.append([folder_path, status, datetime.now().strftime("%Y-%m-%d %H:%M:%S")])
+    save_workbook(wb, LOCK_LOG)
 
-    wb.save(LOCK_LOG)
 
+_journal = Journal(LOCK_JOURNAL, _apply_log, JOURNAL_BATCH_SIZE, JOURNAL_INTERVAL)
+_recovered = False
+_recover_lock = threading.Lock()
+
+
+def _recover():
+    global _recovered
+    if not _recovered:
+        with _recover_lock:
+            if not _recovered:
+                _journal.recover()
+                _recovered = True
+
+
+def update_log(folder_path, status):
+    """Journal a status change; it is durable on return and reaches the xlsx on compaction."""
+    _recover()
+    _journal.append({
+        "path": folder_path,
+        "status": status,
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    _record_statuses([(folder_path, status)])
+
+
+# -----------------------------------------------------------------
+# Status index
+# -----------------------------------------------------------------
+_statuses = None
+_statuses_lock = threading.Lock()
 
-def lock_folder(folder_path):
-    if not os.path.exists(folder_path):
-        return False, "❌ Folder not found."
 
+def _status_index() -> dict:
+    """path -> latest status, loaded from the log once and then kept current by the write paths."""
+    global _statuses
+    if _statuses is None:
+        index = {f["path"]: f["status"] for f in list_locked_folders()}
+        with _statuses_lock:
+            if _statuses is None:
+                _statuses = index
+    return _statuses
+
+
+def _record_statuses(changes):
+    index = _status_index()
+    delta = 0
+    with _statuses_lock:
+        for path, status in changes:
+            delta += (status == "Locked") - (index.get(path) == "Locked")
+            index[path] = status
+    stats.incr("locked_folders", delta)
+
+
+def _reload_locked_count() -> int:
+    global _statuses
+    _statuses = None
+    return count_locked_folders()
+
+
+# -----------------------------------------------------------------
+# Lock backends
+# -----------------------------------------------------------------
+def _current_user() -> str:
     try:
-        username = os.getlogin()
-        cmd = f'icacls "{folder_path}" /deny {username}:(RX)'
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+        return os.getlogin()
+    except OSError:
+        # no controlling terminal (services, cron, containers)
+        return getpass.getuser()
 
-        if result.returncode == 0:
-            update_log(folder_path, "Locked")
-            return True, f"✅ Folder locked: {folder_path}"
-        else:
-            return False, f"⚠️ Failed: {result.stderr.strip()}"
 
+class LockBackend(ABC):
+    """Denies or restores access to one folder; each call returns (ok, error message)."""
+
+    name = None
+
+    @abstractmethod
+    def lock(self, folder_path: str) -> tuple[bool, str]:
+        ...
+
+    @abstractmethod
+    def unlock(self, folder_path: str) -> tuple[bool, str]:
+        ...
+
+    def _run(self, args: list[str]) -> tuple[bool, str]:
+        # an argument list, never a shell: paths with quotes or spaces stay intact
+        result = subprocess.run(args, capture_output=True, text=True)
+        return result.returncode == 0, result.stderr.strip()
+
+
+class IcaclsBackend(LockBackend):
+    """Windows: add / remove a deny-read-execute ACE for the current user."""
+
+    name = "icacls"
+
+    def lock(self, folder_path):
+        return self._run(["icacls", folder_path, "/deny", f"{_current_user()}:(RX)"])
+
+    def unlock(self, folder_path):
+        return self._run(["icacls", folder_path, "/remove:d", _current_user()])
+
+
+class ChmodBackend(LockBackend):
+    """POSIX: strip every permission bit, give the owner rwx back on unlock."""
+
+    name = "chmod"
+
+    def lock(self, folder_path):
+        return self._run(["chmod", "a-rwx", folder_path])
+
+    def unlock(self, folder_path):
+        return self._run(["chmod", "u+rwx", folder_path])
+
+
+class PosixBackend(LockBackend):
+    """POSIX, in process: os.chmod to 000, remembering the original mode bits.
+
+    The modes are saved in LOCK_MODES_DB before anything is changed, so
+    unlock restores them exactly (and survives a restart). With
+    ``recursive`` the tree is walked with os.scandir and every inode is
+    locked, deepest first; symlinks are neither followed nor changed.
+    """
+
+    name = "posix"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS modes (
+            path TEXT PRIMARY KEY,
+            root TEXT NOT NULL,
+            mode INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_modes_root ON modes(root);
+    """
+
+    def __init__(self, recursive: bool = LOCK_RECURSIVE, db_path: Path = LOCK_MODES_DB):
+        self.recursive = recursive
+        self.db_path = db_path
+        self._conn().executescript(self.SCHEMA)
+
+    def _conn(self):
+        return connect(self.db_path)
+
+    def _walk(self, folder_path: str):
+        """Yield (path, mode) for the folder and, if recursive, everything below it.
+
+        A directory at 000 is locked already (and only root could list it),
+        so the walk does not descend into it.
+        """
+        mode = os.stat(folder_path).st_mode
+        yield folder_path, mode
+        if not self.recursive or not stat.S_IMODE(mode):
+            return
+        stack = [folder_path]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_symlink():
+                        continue
+                    mode = entry.stat(follow_symlinks=False).st_mode
+                    yield entry.path, mode
+                    if stat.S_ISDIR(mode) and stat.S_IMODE(mode):
+                        stack.append(entry.path)
+
+    def lock(self, folder_path):
+        root = os.path.abspath(folder_path)
+        try:
+            inodes = [(path, stat.S_IMODE(mode)) for path, mode in self._walk(root)]
+            with self._conn() as conn:
+                # locking twice must not overwrite the original modes with 000
+                conn.executemany(
+                    "INSERT OR IGNORE INTO modes (path, root, mode) VALUES (?, ?, ?)",
+                    [(path, root, mode) for path, mode in inodes],
+                )
+            # children first: a parent at 000 can no longer be traversed
+            for path, _ in reversed(inodes):
+                os.chmod(path, 0)
+        except OSError as e:
+            return False, str(e)
+        return True, ""
+
+    def unlock(self, folder_path):
+        root = os.path.abspath(folder_path)
+        conn = self._conn()
+        saved = conn.execute(
+            "SELECT path, mode FROM modes WHERE root = ? OR path = ?", (root, root)
+        ).fetchall()
+        if not saved:
+            # never locked by this backend: give the owner access back
+            saved = [(root, stat.S_IMODE(os.stat(root).st_mode) | stat.S_IRWXU)]
+        try:
+            # parents first, so the children are reachable again
+            for path, mode in sorted(saved, key=lambda row: row[0].count(os.sep)):
+                try:
+                    os.chmod(path, mode)
+                except FileNotFoundError:
+                    continue
+        except OSError as e:
+            return False, str(e)
+        with conn:
+            conn.executemany("DELETE FROM modes WHERE path = ?", [(row[0],) for row in saved])
+        return True, ""
+
+
+class SetfaclBackend(LockBackend):
+    """POSIX ACLs: deny a named user (SECUREME_LOCK_USER, default the current one)."""
+
+    name = "setfacl"
+
+    def __init__(self):
+        self.user = os.environ.get("SECUREME_LOCK_USER") or _current_user()
+
+    def lock(self, folder_path):
+        return self._run(["setfacl", "-m", f"u:{self.user}:---", folder_path])
+
+    def unlock(self, folder_path):
+        return self._run(["setfacl", "-x", f"u:{self.user}", folder_path])
+
+
+BACKENDS = {
+    "icacls": IcaclsBackend,
+    "chmod": ChmodBackend,
+    "posix": PosixBackend,
+    "setfacl": SetfaclBackend,
+}
+_backend = None
+
+
+def get_backend() -> LockBackend:
+    global _backend
+    if _backend is None:
+        name = LOCK_BACKEND or ("icacls" if os.name == "nt" else "posix")
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown folder lock backend: {name}")
+        _backend = BACKENDS[name]()
+    return _backend
+
+
+# -----------------------------------------------------------------
+# Single folder
+# -----------------------------------------------------------------
+ACTIONS = {
+    "lock": ("Locked", "✅ Folder locked"),
+    "unlock": ("Unlocked", "🔓 Folder unlocked"),
+}
+
+
+def _change(action: str, folder_path: str) -> tuple[bool, str]:
+    """Run the backend for one folder without logging it."""
+    if not os.path.exists(folder_path):
+        return False, "❌ Folder not found."
+    try:
+        backend = get_backend()
+        with storage_seconds.time(op=f"folder_{action}"):
+            ok, error = backend.lock(folder_path) if action == "lock" else backend.unlock(folder_path)
+        if ok:
+            return True, f"{ACTIONS[action][1]}: {folder_path}"
+        return False, f"⚠️ Failed: {error}"
     except Exception as e:
         return False, f"⚠️ Error: {str(e)}"
 
 
+def lock_folder(folder_path):
+    success, message = _change("lock", folder_path)
+    if success:
+        update_log(folder_path, "Locked")
+    return success, message
+
+
 def unlock_folder(folder_path):
-    if not os.path.exists(folder_path):
-        return False, "❌ Folder not found."
+    success, message = _change("unlock", folder_path)
+    if success:
+        update_log(folder_path, "Unlocked")
+    return success, message
 
-    try:
-        username = os.getlogin()
-        cmd = f'icacls "{folder_path}" /remove:d {username}'
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
 
-        if result.returncode == 0:
-            update_log(folder_path, "Unlocked")
-            return True, f"🔓 Folder unlocked: {folder_path}"
+# -----------------------------------------------------------------
+# Batch jobs
+# -----------------------------------------------------------------
+MAX_JOBS = 100
+_executor = ThreadPoolExecutor(max_workers=LOCK_WORKERS, thread_name_prefix="folder-lock")
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+def expand_paths(patterns) -> list[str]:
+    """Expand glob patterns to directories; plain paths pass through unchanged."""
+    paths = []
+    for pattern in patterns:
+        pattern = str(pattern).strip()
+        if not pattern:
+            continue
+        if glob.has_magic(pattern):
+            paths.extend(sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isdir(p)))
         else:
-            return False, f"⚠️ Failed: {result.stderr.strip()}"
+            paths.append(pattern)
+    return list(dict.fromkeys(paths))
 
-    except Exception as e:
-        return False, f"⚠️ Error: {str(e)}"
 
+class LockJob:
+    """A batch of lock / unlock operations running on the shared worker pool.
 
-def list_locked_folders():
-    ensure_log_exists()
-    wb = load_workbook(LOCK_LOG)
+    The globs are expanded on the pool as well, since a recursive one can
+    walk a large tree; until then the job is "expanding" with no paths.
+    """
+
+    def __init__(self, action: str, patterns):
+        self.id = uuid.uuid4().hex
+        self.action = action
+        self.patterns = list(patterns)
+        self.paths = None
+        self.error = None
+        self.results = {}
+        self.created = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.finished = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> int:
+        return len(self.results)
+
+    def start(self):
+        _executor.submit(self._expand)
+
+    def _expand(self):
+        try:
+            paths = expand_paths(self.patterns)
+        except Exception as e:
+            paths, self.error = [], f"⚠️ Error: {str(e)}"
+        with self._lock:
+            self.paths = paths
+        if not paths:
+            self.finished = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            return
+        for path in paths:
+            future = _executor.submit(_change, self.action, path)
+            future.add_done_callback(lambda f, path=path: self._complete(path, f))
+
+    def _complete(self, path, future):
+        try:
+            success, message = future.result()
+        except Exception as e:
+            success, message = False, f"⚠️ Error: {str(e)}"
+        with self._lock:
+            self.results[path] = {"path": path, "ok": success, "message": message}
+            last = self.done == len(self.paths)
+        if last:
+            self._log()
+            self.finished = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def _log(self):
+        """Record every successful change with one journal write."""
+        status = ACTIONS[self.action][0]
+        date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        records = [
+            {"path": r["path"], "status": status, "date": date}
+            for r in self.results.values() if r["ok"]
+        ]
+        if records:
+            _recover()
+            _journal.append_many(records)
+            _record_statuses([(r["path"], r["status"]) for r in records])
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            paths = self.paths or []
+            results = [self.results[p] for p in paths if p in self.results]
+        if self.finished:
+            status = "done"
+        else:
+            status = "expanding" if self.paths is None else "running"
+        return {
+            "id": self.id,
+            "action": self.action,
+            "status": status,
+            "total": len(paths),
+            "done": len(results),
+            "succeeded": sum(1 for r in results if r["ok"]),
+            "failed": sum(1 for r in results if not r["ok"]),
+            "progress": round(len(results) / len(paths), 3) if paths else float(bool(self.finished)),
+            "created": self.created,
+            "finished": self.finished,
+            "error": self.error,
+            "results": results,
+        }
+
+
+def submit_batch(action: str, patterns) -> dict:
+    """Queue a lock / unlock of every path or glob match; returns the job status at once."""
+    if action not in ACTIONS:
+        raise ValueError(f"Invalid action: {action}")
+    job = LockJob(action, patterns)
+    with _jobs_lock:
+        _jobs[job.id] = job
+        while len(_jobs) > MAX_JOBS:
+            _jobs.popitem(last=False)
+    job.start()
+    return job.to_dict()
+
+
+def get_job(job_id: str):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    return job.to_dict() if job else None
+
+
+def _read_log() -> list[dict]:
+    if not LOCK_LOG.exists():
+        return []
+    with storage_seconds.time(op="folder_log_read"):
+        wb = load_workbook(LOCK_LOG)
     ws = wb.active
 
     folders = []
@@ -89,10 +472,30 @@ def list_locked_folders():
             "status": row[1],
             "datetime": row[2],
         })
+    return folders
 
+
+def list_locked_folders():
+    """The folder log with journaled changes that are not compacted yet laid on top.
+
+    Reads never compact or wait for a compaction: the xlsx is only
+    rewritten by the background compactor.
+    """
+    folders, pending = _journal.read_consistent(_read_log)
+    positions = {folder["path"]: i for i, folder in enumerate(folders)}
+    for record in pending:
+        folder = {"path": record["path"], "status": record["status"], "datetime": record["date"]}
+        i = positions.get(record["path"])
+        if i is None:
+            positions[record["path"]] = len(folders)
+            folders.append(folder)
+        else:
+            folders[i] = folder
     return folders
 
 
 def count_locked_folders():
-    folders = list_locked_folders()
-    return sum(1 for f in folders if f["status"] == "Locked")
+    return sum(1 for status in _status_index().values() if status == "Locked")
+
+
+stats.register("locked_folders", _reload_locked_count)
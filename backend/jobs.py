@@ -0,0 +1,91 @@
+import uuid
+import queue
+import atexit
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+
+class QueueFull(Exception):
+    """The job queue is at capacity; the caller should retry later."""
+
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class JobQueue:
+    """A fixed pool of worker threads fed from a bounded queue.
+
+    submit() returns a job id at once (or raises QueueFull, which is the
+    back-pressure that keeps request latency flat under load); status()
+    reports queued / running / done / failed, or whatever final status a
+    job's dict result sets. Finished jobs are kept for
+    MAX_JOBS submissions so clients can poll them. Queued work is drained
+    at interpreter exit, so an acknowledged job is not silently dropped
+    by a clean shutdown.
+    """
+
+    MAX_JOBS = 500
+
+    def __init__(self, name: str, workers: int, max_queued: int):
+        self.name = name
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        atexit.register(self.drain)
+
+    def submit(self, fn, *args, **info) -> str:
+        """Queue fn(*args); info is reported with the job's status."""
+        self._start()
+        job = dict(info, id=uuid.uuid4().hex, status="queued", error=None,
+                   queued_at=_now(), started_at=None, finished_at=None)
+        with self._lock:
+            self._jobs[job["id"]] = job
+            while len(self._jobs) > self.MAX_JOBS:
+                self._jobs.popitem(last=False)
+        try:
+            self._queue.put_nowait((job, fn, args))
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job["id"], None)
+            raise QueueFull(f"{self.name} queue is full")
+        return job["id"]
+
+    def _work(self):
+        while True:
+            job, fn, args = self._queue.get()
+            job.update(status="running", started_at=_now())
+            try:
+                result = fn(*args)
+                # a dict result is merged into the status and may set its own final status
+                if isinstance(result, dict):
+                    job.update(result)
+                if job["status"] == "running":
+                    job["status"] = "done"
+            except Exception as e:
+                job.update(status="failed", error=str(e))
+            finally:
+                job["finished_at"] = _now()
+                self._queue.task_done()
+
+    def status(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job, queued=self._queue.qsize()) if job else None
+
+    def drain(self):
+        """Block until every queued job has finished."""
+        if self._threads:
+            self._queue.join()
@@ -0,0 +1,336 @@
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: the dev server is a single process, thread locks suffice
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+
+class FileLock:
+    """Cross-process advisory lock (fcntl.flock) on a small side file.
+
+    The side file also carries an 8-byte counter that lock holders can
+    read and bump, which is how the journal hands out sequence numbers
+    that increase across every process sharing it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd = None
+        self._counter = 0  # without pread/pwrite (Windows) the counter only lives in this process
+
+    def _open(self) -> int:
+        if self._fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        return self._fd
+
+    def acquire(self, shared: bool = False):
+        """Take the lock; flock locks belong to the open file, so this is
+        per-process — threads of one process must coordinate among themselves."""
+        fd = self._open()
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+
+    def release(self):
+        if fcntl and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @contextmanager
+    def hold(self):
+        self.acquire()
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def read_counter(self) -> int:
+        if not hasattr(os, "pread"):
+            return self._counter
+        raw = os.pread(self._open(), 8, 0)
+        return int.from_bytes(raw, "big") if len(raw) == 8 else 0
+
+    def write_counter(self, value: int):
+        self._counter = value
+        if hasattr(os, "pwrite"):
+            os.pwrite(self._open(), value.to_bytes(8, "big"), 0)
+
+
+class Journal:
+    """Append-only, group-committed journal of pending mutations.
+
+    append() returns once its records are fsynced; concurrent appenders
+    share a single fsync. A background compactor (or any reader that needs
+    an up-to-date store, via flush()) folds the records into the main store
+    by calling ``apply(records)`` in batches. Records carry a ``seq`` that
+    increases across every process appending to the same journal, so
+    apply() can skip anything it already committed when a compaction is
+    replayed after a crash.
+
+    Several processes may share one journal: appends and rotation are
+    serialized by ``<name>.lock`` and whole compactions by
+    ``<name>.compact.lock``. An appender whose file was rotated away by
+    another process notices the inode change and reopens the path.
+
+    Readers never take either lock: read_consistent() pairs a read of the
+    store with the records still waiting in the journal, using the
+    compaction generation kept in ``<name>.compact.lock`` (odd while a
+    compaction is changing the store) to detect a compaction that
+    overlapped the read, seqlock-style.
+    """
+
+    def __init__(self, path: Path, apply, batch_size: int = 500, interval: float = 1.0):
+        self.path = path
+        self.compacting_path = path.with_name(path.name + ".compacting")
+        self.apply = apply
+        self.batch_size = batch_size
+        self.interval = interval
+
+        # lock order: compact lock > sync lock > write lock > append file lock
+        self._write_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._append_flock = FileLock(path.with_name(path.name + ".lock"))
+        self._compact_flock = FileLock(path.with_name(path.name + ".compact.lock"))
+        self._wakeup = threading.Event()
+        self._file = None
+        self._retired = []
+        self._written = 0
+        self._synced = 0
+        self._pending = 0
+        self._thread = None
+
+    # -------------------------------------------------------------
+    # Appending
+    # -------------------------------------------------------------
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _is_stale(self) -> bool:
+        """True when another process rotated the file we hold open."""
+        try:
+            return os.fstat(self._file.fileno()).st_ino != os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return True
+
+    def append(self, record: dict) -> int:
+        return self.append_many([record])[0]
+
+    def append_many(self, records) -> list[int]:
+        """Durably append records; returns their sequence numbers."""
+        seqs = []
+        with self._write_lock, self._append_flock.hold() as flock:
+            if self._file is not None and self._is_stale():
+                # a thread of ours may still be fsyncing this fd, so it is closed under the sync lock
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._retired.append(self._file)
+                self._file = None
+            if self._file is None:
+                self._open()
+            last_seq = flock.read_counter()
+            lines = []
+            for record in records:
+                last_seq = max(last_seq + 1, time.time_ns())
+                lines.append(json.dumps(dict(record, seq=last_seq), separators=(",", ":")) + "\n")
+                seqs.append(last_seq)
+            # one write of whole lines, so another process never sees a half-written batch
+            self._file.write("".join(lines))
+            self._file.flush()
+            flock.write_counter(last_seq)
+            self._pending += len(seqs)
+            self._written += 1
+            ticket = self._written
+
+        # group commit: whoever holds the sync lock fsyncs for everyone queued behind it
+        with self._sync_lock:
+            if self._synced < ticket:
+                with self._write_lock:
+                    target = self._written
+                    fd = self._file.fileno()
+                os.fsync(fd)
+                self._synced = target
+                self._close_retired()
+
+        self._start()
+        if self._pending >= self.batch_size:
+            self._wakeup.set()
+        return seqs
+
+    def _close_retired(self):
+        """Close files rotated away by another process; caller holds the sync lock."""
+        with self._write_lock:
+            retired, self._retired = self._retired, []
+        for f in retired:
+            f.close()
+
+    # -------------------------------------------------------------
+    # Compaction
+    # -------------------------------------------------------------
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _read(self, path: Path) -> list[dict]:
+        records = []
+        try:
+            f = open(path, encoding="utf-8")
+        except FileNotFoundError:
+            # never written, or rotated / unlinked by a compaction under a lock-free reader
+            return records
+        with f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # a torn line (crash or append in progress) was never acknowledged
+                    continue
+        return records
+
+    def _rotate(self) -> bool:
+        """Move the live journal aside so appends continue into a fresh file."""
+        with self._sync_lock, self._write_lock, self._append_flock.hold():
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+                self._synced = self._written
+            for f in self._retired:
+                f.close()
+            self._retired = []
+            if not self.path.exists():
+                return False
+            os.replace(self.path, self.compacting_path)
+            self._pending = 0
+            return True
+
+    def _apply_compacting(self, flock: FileLock, generation: int) -> int:
+        records = self._read(self.compacting_path)
+        for start in range(0, len(records), self.batch_size):
+            self.apply(records[start:start + self.batch_size])
+        # the file goes only after the generation moves on: until then a reader
+        # may pair it with a store that already holds its records, which is harmless
+        flock.write_counter(generation + 1)
+        os.unlink(self.compacting_path)
+        return len(records)
+
+    def compact(self) -> int:
+        """Fold every durable record into the store; returns how many were applied."""
+        with self._compact_lock, self._compact_flock.hold() as flock:
+            applied = 0
+            # leftovers of a compaction that crashed before finishing go first
+            if self.compacting_path.exists():
+                generation = flock.read_counter() | 1
+                flock.write_counter(generation)
+                applied += self._apply_compacting(flock, generation)
+            generation = flock.read_counter() | 1
+            flock.write_counter(generation)
+            if self._rotate():
+                applied += self._apply_compacting(flock, generation)
+            else:
+                flock.write_counter(generation + 1)
+            return applied
+
+    @contextmanager
+    def paused(self):
+        """Hold off compaction, in every process, for the duration; appends carry on.
+
+        For copying the store and the journal as of one moment, as snapshots do.
+        """
+        with self._compact_lock, self._compact_flock.hold():
+            yield
+
+    def unapplied(self) -> list[dict]:
+        """Durable records not folded into the store yet, in seq order.
+
+        Records of a compaction running meanwhile may already be in the
+        store too; see read_consistent() for a read that pairs the two.
+        """
+        # live file first: a rotation in between then leaves its records in the
+        # compacting file, which is only removed after the generation moves on
+        records = {r["seq"]: r for r in self._read(self.path)}
+        records.update((r["seq"], r) for r in self._read(self.compacting_path))
+        return [records[seq] for seq in sorted(records)]
+
+    def read_consistent(self, read_store, attempts: int = 3):
+        """Return (read_store(), records it may not hold yet, in seq order) without blocking.
+
+        The records may include some the store already holds, so applying
+        them on top of the snapshot must be idempotent. When compactions
+        keep starting or finishing during the read it is done once more
+        under the compaction lock instead.
+        """
+        flock = self._compact_flock
+        for _ in range(attempts):
+            generation = flock.read_counter()
+            snapshot = read_store()
+            records = self.unapplied()
+            if flock.read_counter() == generation:
+                return snapshot, records
+        with self._compact_lock, flock.hold():
+            return read_store(), self.unapplied()
+
+    def signature(self):
+        """Cheap value that changes whenever a record is appended or compacted away."""
+        sig = []
+        for path in (self.path, self.compacting_path):
+            try:
+                st = path.stat()
+                sig.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                sig.append(None)
+        return tuple(sig)
+
+    def _has_records(self) -> bool:
+        # records appended by other processes only show up on disk
+        try:
+            return self.path.stat().st_size > 0
+        except FileNotFoundError:
+            return False
+
+    def flush(self):
+        """Make sure the store reflects every acknowledged record, from any process."""
+        if self._pending or self._has_records() or self.compacting_path.exists():
+            self.compact()
+
+    def recover(self) -> int:
+        """Replay records left behind by a previous process."""
+        return self.compact()
+
+    def _start(self):
+        if self._thread is None:
+            with self._write_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name=f"compactor:{self.path.name}", daemon=True
+                    )
+                    self._thread.start()
+                    atexit.register(self._shutdown)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._pending or self.compacting_path.exists():
+                try:
+                    self.compact()
+                except Exception:
+                    # records stay in the journal and are retried next round / on restart
+                    log.exception("Compacting %s failed; retrying next round", self.path.name)
+
+    def _shutdown(self):
+        try:
+            self.flush()
+        except Exception:
+            log.exception("Compacting %s at exit failed; it is replayed on the next start", self.path.name)
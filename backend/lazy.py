@@ -0,0 +1,25 @@
+import sys
+import importlib
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+
+    Blueprints refer to their backends through one of these, so starting
+    the app (or running `flask routes`) does not pay for openpyxl,
+    cryptography or the storage setup of modules nobody has used yet.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None or self._name in sys.modules
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attr)
@@ -1,11 +1,23 @@
 import json, base64, secrets, hashlib, hmac
-from pathlib import Path
+import time
+import threading
+from collections import OrderedDict
 from functools import wraps
 from flask import session, redirect, url_for, flash
-from config import PASS_HASH_FILE
+from config import (
+    PASS_HASH_FILE,
+    LOGIN_WORKERS,
+    LOGIN_RATE,
+    LOGIN_BURST,
+    LOGIN_BACKOFF_BASE,
+    LOGIN_BACKOFF_MAX,
+)
+from backend.fileio import write_atomic
+from backend.metrics import crypto_seconds
 
 SALT_LEN = 16
 ITERATIONS = 200_000
+MAX_CLIENTS = 10_000
 
 def is_master_set() -> bool:
     return PASS_HASH_FILE.exists()
@@ -18,24 +30,175 @@ def create_master_passkey(passphrase: str) -> bool:
         "hash": hash_bytes.hex(),
         "iterations": ITERATIONS
     }
-    PASS_HASH_FILE.write_text(json.dumps(data))
+    PASS_HASH_FILE.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(PASS_HASH_FILE, [json.dumps(data).encode("utf-8")])
     return True
 
-def verify_master_passkey(passphrase: str) -> bool:
-    if not PASS_HASH_FILE.exists():
-        return False
-    data = json.loads(PASS_HASH_FILE.read_text())
-    salt = base64.b64decode(data["salt"])
-    expected = bytes.fromhex(data["hash"])
-    iters = data.get("iterations", ITERATIONS)
+
+# -----------------------------------------------------------------
+# Cached hash record
+# -----------------------------------------------------------------
+_record = None  # (file signature, salt, expected hash, iterations)
+_record_lock = threading.Lock()
+
+def _hash_record():
+    """The parsed pass_hash.json, re-read only when its mtime or size changes."""
+    global _record
+    try:
+        st = PASS_HASH_FILE.stat()
+    except FileNotFoundError:
+        return None
+    signature = (st.st_mtime_ns, st.st_size)
+    cached = _record
+    if cached is not None and cached[0] == signature:
+        return cached
+    with _record_lock:
+        data = json.loads(PASS_HASH_FILE.read_text())
+        _record = (
+            signature,
+            base64.b64decode(data["salt"]),
+            bytes.fromhex(data["hash"]),
+            data.get("iterations", ITERATIONS),
+        )
+        return _record
+
+
+# -----------------------------------------------------------------
+# Bounded key derivation
+# -----------------------------------------------------------------
+# pbkdf2_hmac releases the GIL, so request threads derive in parallel on their
+# own — and no more than LOGIN_WORKERS derivations can ever be burning CPU at once.
+_slots = threading.BoundedSemaphore(LOGIN_WORKERS)
+
+_counters = {
+    "attempts": 0,
+    "successes": 0,
+    "failures": 0,
+    "throttled": 0,
+    "backoff": 0,
+    "busy": 0,
+    "derivations": 0,
+    "derive_ms_total": 0.0,
+    "derive_ms_max": 0.0,
+}
+_counters_lock = threading.Lock()
+
+def _count(name: str, amount=1):
+    with _counters_lock:
+        _counters[name] += amount
+
+def _derive(passphrase: str, salt: bytes, iters: int) -> bytes:
+    started = time.perf_counter()
     candidate = hashlib.pbkdf2_hmac("sha256", passphrase.encode("utf-8"), salt, iters)
+    took = (time.perf_counter() - started) * 1000
+    crypto_seconds.observe(took / 1000, op="pbkdf2")
+    with _counters_lock:
+        _counters["derivations"] += 1
+        _counters["derive_ms_total"] += took
+        _counters["derive_ms_max"] = max(_counters["derive_ms_max"], took)
+    return candidate
+
+def verify_master_passkey(passphrase: str):
+    """True / False, or None when every derivation slot is taken (try again later)."""
+    record = _hash_record()
+    if record is None:
+        return False
+    _, salt, expected, iters = record
+    if not _slots.acquire(blocking=False):
+        _count("busy")
+        return None
+    try:
+        candidate = _derive(passphrase, salt, iters)
+    finally:
+        _slots.release()
     return hmac.compare_digest(candidate, expected)
 
+
+# -----------------------------------------------------------------
+# Per-client throttling
+# -----------------------------------------------------------------
+class ClientThrottle:
+    """Token bucket (LOGIN_BURST attempts, refilled at LOGIN_RATE per minute)
+    plus exponential backoff after consecutive failures."""
+
+    def __init__(self, now: float):
+        self.tokens = float(LOGIN_BURST)
+        self.updated = now
+        self.failures = 0
+        self.blocked_until = 0.0
+
+    def take(self, now: float) -> float:
+        """Consume one attempt; returns 0, or the seconds to wait before retrying."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self.tokens = min(LOGIN_BURST, self.tokens + (now - self.updated) * LOGIN_RATE / 60)
+        self.updated = now
+        if self.tokens < 1:
+            return (1 - self.tokens) * 60 / LOGIN_RATE
+        self.tokens -= 1
+        return 0.0
+
+    def failed(self, now: float):
+        self.failures += 1
+        delay = min(LOGIN_BACKOFF_BASE * 2 ** (self.failures - 1), LOGIN_BACKOFF_MAX)
+        self.blocked_until = now + delay
+
+    def succeeded(self):
+        self.failures = 0
+        self.blocked_until = 0.0
+
+
+_clients = OrderedDict()
+_clients_lock = threading.Lock()
+_clock = time.monotonic
+
+def _throttle(client: str, now: float) -> ClientThrottle:
+    throttle = _clients.get(client)
+    if throttle is None:
+        throttle = _clients[client] = ClientThrottle(now)
+        while len(_clients) > MAX_CLIENTS:
+            _clients.popitem(last=False)
+    _clients.move_to_end(client)
+    return throttle
+
+def attempt_login(passphrase: str, client: str) -> tuple[bool, str, float]:
+    """Throttled login check; returns (ok, message, retry_after seconds)."""
+    _count("attempts")
+    now = _clock()
+    with _clients_lock:
+        throttle = _throttle(client, now)
+        wait = throttle.take(now)
+        in_backoff = now < throttle.blocked_until
+    if wait:
+        _count("backoff" if in_backoff else "throttled")
+        return False, f"Too many login attempts. Try again in {int(wait) + 1} seconds.", wait
+
+    ok = verify_master_passkey(passphrase)
+    if ok is None:
+        return False, "Server busy, please try again.", 1.0
+
+    with _clients_lock:
+        if ok:
+            throttle.succeeded()
+        else:
+            throttle.failed(_clock())
+    _count("successes" if ok else "failures")
+    return ok, "Login successful." if ok else "Invalid passkey.", 0.0
+
+def login_stats() -> dict:
+    with _counters_lock:
+        stats = dict(_counters)
+    stats["derive_ms_avg"] = round(stats["derive_ms_total"] / stats["derivations"], 3) if stats["derivations"] else 0.0
+    stats["derive_ms_total"] = round(stats["derive_ms_total"], 3)
+    stats["derive_ms_max"] = round(stats["derive_ms_max"], 3)
+    stats["tracked_clients"] = len(_clients)
+    return stats
+
 def login_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         if not session.get("authenticated"):
             flash("You must be logged in to view that page.")
-            return redirect(url_for("Login"))
+            return redirect(url_for("auth.Login"))
         return f(*args, **kwargs)
     return decorated
@@ -0,0 +1,185 @@
+import threading
+from bisect import bisect_left
+from functools import wraps
+from time import perf_counter
+
+# seconds: fine-grained at the bottom for single Fernet calls, coarse at the top for xlsx rewrites
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A named family of samples, one per combination of label values.
+
+    Values live in this process only; each worker of a multi-process
+    server reports its own.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_sample(self, key, value):
+        yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        self._observe(self._key(labels), value)
+
+    def _observe(self, key: tuple, value: float):
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][slot] += 1
+            state[1] += value
+
+    def time(self, **labels) -> "Timer":
+        """Observe the wall time of a with-block (or, as a decorator, of each call)."""
+        return Timer(self, self._key(labels))
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return sum(state[0]) if state else 0
+
+    def _render_sample(self, key, state):
+        counts, total = state
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+            yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}"
+        yield f"{self.name}_sum{_format_labels(self.labels, key)} {repr(total)}"
+        yield f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}"
+
+
+class Timer:
+    # a plain class rather than @contextmanager: these wrap single Fernet calls, so overhead matters
+    __slots__ = ("_histogram", "_key", "_started")
+
+    def __init__(self, histogram: Histogram, key: tuple):
+        self._histogram = histogram
+        self._key = key
+
+    def __enter__(self):
+        self._started = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram._observe(self._key, perf_counter() - self._started)
+        return False
+
+    def __call__(self, fn):
+        histogram, key = self._histogram, self._key
+
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram._observe(key, perf_counter() - started)
+        return timed
+
+
+# -----------------------------------------------------------------
+# Registry
+# -----------------------------------------------------------------
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _get_or_create(cls, name: str, help: str, labels, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help, labels, **kwargs)
+        elif not isinstance(metric, cls) or metric.labels != tuple(labels):
+            raise ValueError(f"Metric {name} is already registered with a different type or labels")
+        return metric
+
+
+def counter(name: str, help: str, labels=()) -> Counter:
+    return _get_or_create(Counter, name, help, labels)
+
+
+def histogram(name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _get_or_create(Histogram, name, help, labels, buckets=buckets)
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format (0.0.4)."""
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------------------------------------------------
+# Shared metrics of the storage and crypto layers
+# -----------------------------------------------------------------
+crypto_seconds = histogram(
+    "secureme_crypto_seconds", "Time spent in encryption and key-derivation calls.", ("op",))
+storage_seconds = histogram(
+    "secureme_storage_seconds", "Time spent reading and writing the vault, notes and folder log.", ("op",))
+cache_requests = counter(
+    "secureme_cache_requests_total", "Cache lookups by cache and result (hit / miss).", ("cache", "result"))
+file_rewrites = counter(
+    "secureme_file_rewrites_total", "Files replaced atomically, by file suffix.", ("suffix",))
+file_rewrite_bytes = counter(
+    "secureme_file_rewrite_bytes_total", "Bytes written by atomic file replacements, by file suffix.", ("suffix",))
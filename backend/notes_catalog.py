@@ -0,0 +1,145 @@
+import re
+from datetime import datetime
+from pathlib import Path
+from config import DATA_DIR
+from backend.db import connect
+
+CATALOG_DB = DATA_DIR / "notes.db"
+LEGACY_META_FILE = DATA_DIR / "ONotes.xlsx"
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS notes (
+        file_name TEXT PRIMARY KEY,
+        title TEXT,
+        created TEXT,
+        updated TEXT,
+        size INTEGER,
+        algorithm TEXT,
+        key_hash TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_notes_updated ON notes(updated);
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+"""
+_TIMESTAMP_RE = re.compile(r"^(?P<title>.*)_(?P<stamp>\d{8}_\d{6})$")
+_schema_ready = False
+
+
+def _conn():
+    global _schema_ready
+    conn = connect(CATALOG_DB)
+    if not _schema_ready:
+        conn.executescript(SCHEMA)
+        _schema_ready = True
+    return conn
+
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+# -----------------------------------------------------------------
+# Catalog operations
+# -----------------------------------------------------------------
+def upsert_note(file_name: str, **fields):
+    """Insert or update one catalog row; only the given columns change on update."""
+    fields.setdefault("updated", _now())
+    columns = ["file_name", "created"] + list(fields)
+    values = [file_name, fields["updated"]] + list(fields.values())
+    assignments = ", ".join(f"{c} = excluded.{c}" for c in fields)
+    with _conn() as conn:
+        conn.execute(
+            f"INSERT INTO notes ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(file_name) DO UPDATE SET {assignments}",
+            values,
+        )
+
+
+def remove_note(file_name: str):
+    with _conn() as conn:
+        conn.execute("DELETE FROM notes WHERE file_name = ?", (file_name,))
+
+
+def get_note(file_name: str):
+    row = _conn().execute("SELECT * FROM notes WHERE file_name = ?", (file_name,)).fetchone()
+    return dict(row) if row else None
+
+
+def list_note_names() -> list[str]:
+    return [row[0] for row in _conn().execute("SELECT file_name FROM notes ORDER BY file_name DESC")]
+
+
+def count_catalog_notes() -> int:
+    return _conn().execute("SELECT count(*) FROM notes").fetchone()[0]
+
+
+def legacy_keys(xlsx_path: Path = LEGACY_META_FILE) -> dict:
+    """file name -> plaintext key from the optional "Key" column of legacy ONotes.xlsx."""
+    if not xlsx_path.exists():
+        return {}
+    from openpyxl import load_workbook
+    wb = load_workbook(xlsx_path, read_only=True)
+    keys = {}
+    for row in wb.active.iter_rows(min_row=2, values_only=True):
+        if row and row[0] and len(row) > 4 and row[4]:
+            keys[row[0]] = str(row[4])
+    wb.close()
+    return keys
+
+
+# -----------------------------------------------------------------
+# Startup reconciliation
+# -----------------------------------------------------------------
+def _guess(file_path: Path) -> dict:
+    st = file_path.stat()
+    match = _TIMESTAMP_RE.match(file_path.stem)
+    title = match.group("title").replace("_", " ") if match else file_path.stem
+    if match:
+        created = datetime.strptime(match.group("stamp"), "%Y%m%d_%H%M%S").strftime("%Y-%m-%d %H:%M:%S")
+    else:
+        created = datetime.fromtimestamp(st.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+    updated = datetime.fromtimestamp(st.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+    return {"title": title, "created": created, "updated": updated, "size": st.st_size}
+
+
+def _import_legacy_meta(conn):
+    """Carry algorithm / key hash / date over from ONotes.xlsx once."""
+    if not LEGACY_META_FILE.exists():
+        return
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'onotes_imported'").fetchone():
+        return
+
+    from openpyxl import load_workbook
+    wb = load_workbook(LEGACY_META_FILE, read_only=True)
+    for row in wb.active.iter_rows(min_row=2, values_only=True):
+        if not row or not row[0]:
+            continue
+        file_name, algo, key_hash, date = row[:4]
+        conn.execute(
+            "UPDATE notes SET algorithm = ?, key_hash = ?, updated = coalesce(?, updated) WHERE file_name = ?",
+            (algo, key_hash, str(date) if date else None, file_name),
+        )
+    wb.close()
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('onotes_imported', ?)", (_now(),))
+
+
+def reconcile(notes_dir: Path, patterns=("*.note", "*.docx")) -> tuple[int, int]:
+    """Bring the catalog in line with the files on disk; returns (added, removed)."""
+    on_disk = {p.name: p for pattern in patterns for p in notes_dir.glob(pattern)}
+    conn = _conn()
+    known = {row[0] for row in conn.execute("SELECT file_name FROM notes")}
+    added = sorted(set(on_disk) - known)
+    removed = sorted(known - set(on_disk))
+
+    with conn:
+        for name in added:
+            info = _guess(on_disk[name])
+            conn.execute(
+                "INSERT INTO notes (file_name, title, created, updated, size) VALUES (?, ?, ?, ?, ?)",
+                (name, info["title"], info["created"], info["updated"], info["size"]),
+            )
+        conn.executemany("DELETE FROM notes WHERE file_name = ?", [(name,) for name in removed])
+        _import_legacy_meta(conn)
+    return len(added), len(removed)
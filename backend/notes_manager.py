@@ -1,82 +1,373 @@
+import io
+import json
+import zlib
+import struct
+import itertools
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from docx import Document
-from config import BASE_DIR
-from backend.encryption_utils import generate_random_key, encrypt_file, decrypt_file
+from config import DATA_DIR, NOTE_WORKERS, NOTE_QUEUE_SIZE
+from backend.encryption_utils import (
+    generate_random_key,
+    write_encrypted,
+    decrypt_to_bytes,
+    key_hash,
+    STREAM_ALGORITHM,
+)
+from backend.notes_catalog import (
+    upsert_note,
+    remove_note,
+    list_note_names,
+    count_catalog_notes,
+    legacy_keys,
+    reconcile,
+)
+from backend.stats_service import stats
+from backend.jobs import JobQueue
+from backend.metrics import storage_seconds
 
-NOTES_DIR = BASE_DIR / "data" / "notes"
+NOTES_DIR = DATA_DIR / "notes"
+NOTE_SUFFIX = ".note"
+NOTE_MAGIC = b"SMN1"
+_NOTE_HEADER = struct.Struct(">4sI")  # magic, length of the JSON header that follows
 
 def ensure_notes_dir():
     NOTES_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def _new_file_name(title: str) -> str:
+    safe = "".join(c for c in title if c.isalnum() or c in (" ", "_", "-")).rstrip()
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{safe.replace(' ', '_')}_{timestamp}{NOTE_SUFFIX}"
+
+
 def save_note(title: str, content: str):
     ensure_notes_dir()
+    file_name = _new_file_name(title)
+    key = generate_random_key()
+    _write_note(file_name, title, content, key)
+    return file_name, key
 
-    safe = "".join(c for c in title if c.isalnum() or c in (" ", "_", "-")).rstrip()
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"{safe.replace(' ', '_')}_{timestamp}.docx"
-    file_path = NOTES_DIR / file_name
+
+# -----------------------------------------------------------------
+# Background rendering + encryption
+# -----------------------------------------------------------------
+_jobs = JobQueue("notes", NOTE_WORKERS, NOTE_QUEUE_SIZE)
+# file name -> generation of its newest pending write, and -> [lock, users];
+# entries only live while a write of that note is pending or running
+_generations = {}
+_file_locks = {}
+_state_lock = threading.Lock()
+# one counter for every note, so a number is never handed out twice even after its entry is dropped
+_next_generation = itertools.count(1)
+
+SUPERSEDED = "A later save of this note replaced this one before it was written; its key was never applied."
+
+
+@contextmanager
+def _file_lock(file_name: str):
+    with _state_lock:
+        entry = _file_locks.setdefault(file_name, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _state_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _file_locks[file_name]
+
+
+def _claim(file_name: str) -> int:
+    """Register a new pending write of file_name; older pending writes become superseded."""
+    with _state_lock:
+        generation = _generations[file_name] = next(_next_generation)
+        return generation
+
+
+def _queue_write(file_name: str, title: str, content: str, key: str, replaces=None, **info) -> str:
+    """Queue a write of file_name; once the queue has taken it, older pending writes are superseded.
+
+    The generation is only published after the put succeeded, so a submit
+    rejected with QueueFull supersedes nothing and leaves no state behind.
+    Workers read generations under _state_lock, so none can run the job
+    before its generation is published.
+    """
+    with _state_lock:
+        generation = next(_next_generation)
+        job_id = _jobs.submit(_write_note, file_name, title, content, key, generation, replaces,
+                              file_name=file_name, key_applied=False, **info)
+        _generations[file_name] = generation
+    return job_id
+
+
+def _settle(file_name: str, generation: int):
+    """Forget file_name's generation once its newest pending write has finished."""
+    with _state_lock:
+        if _generations.get(file_name) == generation:
+            del _generations[file_name]
+
+
+def _write_note(file_name: str, title: str, content: str, key: str, generation=None, replaces=None):
+    """Render, encrypt and catalog one note; runs on a worker thread for queued jobs.
+
+    replaces names a legacy .docx note that this write supersedes. For a
+    queued job the result says whether its key is now the note's key.
+    """
+    try:
+        with _file_lock(file_name):
+            with _state_lock:
+                current = _generations.get(file_name)
+            if generation is not None and current != generation:
+                # a later save of the same note is queued; writing this one would only be overwritten
+                return {"status": "superseded", "key_applied": False, "error": SUPERSEDED}
+            file_path = NOTES_DIR / file_name
+            is_new = not file_path.exists() and not replaces
+            with storage_seconds.time(op="note_write"):
+                write_encrypted(file_path, [_render_note(title, content)], key)
+                _record(file_path, title, key)
+            if replaces and replaces != file_name:
+                (NOTES_DIR / replaces).unlink(missing_ok=True)
+                remove_note(replaces)
+            if is_new:
+                stats.incr("notes")
+        return {"key_applied": True}
+    finally:
+        if generation is not None:
+            _settle(file_name, generation)
+
+
+def submit_note(title: str, content: str):
+    """Queue a new note; returns (file_name, key, job_id) before anything is written.
+
+    Raises QueueFull when the background queue is at capacity.
+    """
+    ensure_notes_dir()
+    file_name = _new_file_name(title)
+    key = generate_random_key()
+    job_id = _queue_write(file_name, title, content, key, kind="create")
+    return file_name, key, job_id
+
+
+def submit_note_update(filename: str, current_key: str, new_title: str, new_content: str):
+    """Check current_key now, then queue the re-render under a new key; returns (new_key, job_id)."""
+    file_path, target = _check_key(filename, current_key)
+    new_key = generate_random_key()
+    job_id = _queue_write(target, new_title, new_content, new_key, file_path.name, kind="update")
+    return new_key, job_id
+
+
+def note_job(job_id: str):
+    """Status of a queued note write; "done" means it is encrypted on disk and cataloged.
+
+    key_applied stays False until then, and for good when a later save
+    superseded the write: the key handed out with that job never opens the note.
+    """
+    return _jobs.status(job_id)
+
+
+def drain_note_jobs():
+    _jobs.drain()
+
+
+def _record(file_path: Path, title: str, key: str):
+    upsert_note(
+        file_path.name,
+        title=title,
+        size=file_path.stat().st_size,
+        algorithm=STREAM_ALGORITHM,
+        key_hash=key_hash(key),
+    )
+
+
+# -----------------------------------------------------------------
+# Note format
+# -----------------------------------------------------------------
+@storage_seconds.time(op="note_render")
+def _render_note(title: str, content: str) -> bytes:
+    """Native note plaintext: magic + JSON header + zlib-compressed UTF-8 body."""
+    header = json.dumps({"title": title, "codec": "zlib"}, ensure_ascii=False).encode("utf-8")
+    return _NOTE_HEADER.pack(NOTE_MAGIC, len(header)) + header + zlib.compress(content.encode("utf-8"), 6)
 
 
+@storage_seconds.time(op="note_parse")
+def _parse_note(data: bytes, filename: str):
+    """Return (title, content, plain_docx) for native or legacy .docx plaintext.
+
+    plain_docx is True only for a docx laid out the way the app wrote
+    them (see _is_plain_docx), i.e. one that converts to the native format
+    without losing anything.
+    """
+    if data[:4] == NOTE_MAGIC:
+        _, size = _NOTE_HEADER.unpack_from(data)
+        start = _NOTE_HEADER.size
+        header = json.loads(data[start:start + size])
+        body = data[start + size:]
+        if header.get("codec") == "zlib":
+            body = zlib.decompress(body)
+        return header.get("title", filename), body.decode("utf-8"), False
+
+    from docx import Document
+    doc = Document(io.BytesIO(data))
+    title = doc.paragraphs[0].text if doc.paragraphs else filename
+    content = "\n".join(p.text for p in doc.paragraphs[1:])
+    return title, content, _is_plain_docx(doc)
+
+
+def _is_plain_docx(doc) -> bool:
+    """A heading followed by Normal paragraphs, with no tables, images, lists,
+    links or run formatting; anything else is left as .docx."""
+    if doc.tables or doc.inline_shapes:
+        return False
+    for n, paragraph in enumerate(doc.paragraphs):
+        allowed = ("Title", "Heading 1", "Normal") if n == 0 else ("Normal",)
+        if paragraph.style.name not in allowed:
+            return False
+        properties = paragraph._p.pPr
+        if properties is not None and properties.numPr is not None:
+            return False  # a list item numbered directly rather than by style
+        if paragraph.hyperlinks:
+            return False
+        if any(run._r.rPr is not None for run in paragraph.runs):
+            return False  # bold, italic, fonts, colours...
+    return True
+
+
+def _native_name(filename: str) -> str:
+    return Path(filename).with_suffix(NOTE_SUFFIX).name
+
+
+def _resolve(filename: str) -> Path:
+    """The note's path, following a legacy .docx name to its migrated .note file."""
+    file_path = NOTES_DIR / Path(filename).name
+    if not file_path.exists() and file_path.suffix == ".docx":
+        migrated = NOTES_DIR / _native_name(filename)
+        if migrated.exists():
+            return migrated
+    return file_path
+
+
+def _migrate(file_path: Path, title: str, content: str, key: str) -> bool:
+    """Rewrite a legacy .docx note as a native note under the same key."""
+    target = NOTES_DIR / _native_name(file_path.name)
+    with _file_lock(target.name):
+        if target.exists():
+            return False
+        write_encrypted(target, [_render_note(title, content)], key)
+        _record(target, title, key)
+        file_path.unlink()
+        remove_note(file_path.name)
+    return True
+
+
+def migrate_legacy_notes(keys: dict = None) -> dict:
+    """Convert every .docx note whose key is known; keys default to legacy ONotes.xlsx."""
+    ensure_notes_dir()
+    keys = legacy_keys() if keys is None else keys
+    result = {"migrated": 0, "no_key": 0, "wrong_key": 0, "not_plain": 0}
+    for file_path in sorted(NOTES_DIR.glob("*.docx")):
+        key = keys.get(file_path.name)
+        if not key:
+            result["no_key"] += 1
+            continue
+        data = decrypt_to_bytes(file_path, key)
+        if data is None:
+            result["wrong_key"] += 1
+            continue
+        title, content, plain = _parse_note(data, file_path.name)
+        if plain and _migrate(file_path, title, content, key):
+            result["migrated"] += 1
+        else:
+            result["not_plain"] += 1
+    return result
+
+
+def export_note_docx(filename: str, user_key: str):
+    """Render a note as .docx on demand; returns (download name, bytes) or None."""
+    title, content = load_note_content(filename, user_key)
+    if title is None:
+        return None
+    return Path(filename).with_suffix(".docx").name, _render_docx(title, content)
+
+
+@storage_seconds.time(op="note_render_docx")
+def _render_docx(title: str, content: str) -> bytes:
+    from docx import Document
     doc = Document()
     doc.add_heading(title, level=1)
     doc.add_paragraph(content)
-    doc.save(file_path)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
 
-    
-    key = generate_random_key()
-    encrypt_file(file_path, key)
 
-    return file_name, key
+def list_notes():
+    _ensure_reconciled()
+    return list_note_names()
 
 
-def list_notes():
-    ensure_notes_dir()
-    notes = [f.name for f in NOTES_DIR.glob("*.docx")]
-    return sorted(notes, reverse=True)
+_reconciled = False
+_reconcile_lock = threading.Lock()
+
+
+def reconcile_notes() -> tuple[int, int]:
+    """Sync the notes catalog with data/notes; done once on first use."""
+    global _reconciled
+    with _reconcile_lock:
+        ensure_notes_dir()
+        changes = reconcile(NOTES_DIR)
+        _reconciled = True
+    stats.invalidate("notes")
+    return changes
+
+
+def _ensure_reconciled():
+    if not _reconciled:
+        reconcile_notes()
 
 
 def load_note_content(filename: str, user_key: str):
     ensure_notes_dir()
-    file_path = NOTES_DIR / filename
+    file_path = _resolve(filename)
 
     if not file_path.exists():
         return None, None
 
-    ok = decrypt_file(file_path, user_key)
-    if not ok:
+    data = decrypt_to_bytes(file_path, user_key)
+    if data is None:
         return None, None
 
-    doc = Document(file_path)
-    title = doc.paragraphs[0].text if doc.paragraphs else filename
-    content = "\n".join(p.text for p in doc.paragraphs[1:])
-    encrypt_file(file_path, user_key)
-
+    # reads never write: legacy notes are converted by the next update, or by migrate_legacy_notes
+    title, content, _ = _parse_note(data, file_path.name)
     return title, content
 
 
-def update_note(filename: str, current_key: str, new_title: str, new_content: str):
+def _check_key(filename: str, current_key: str):
+    """Return (current path, native file name to write) once current_key is verified."""
     ensure_notes_dir()
-    file_path = NOTES_DIR / filename
+    file_path = _resolve(filename)
 
     if not file_path.exists():
         raise FileNotFoundError(f"Note not found: {file_path}")
 
-    ok = decrypt_file(file_path, current_key)
-    if not ok:
+    if decrypt_to_bytes(file_path, current_key) is None:
         raise ValueError("Incorrect current key")
 
-    doc = Document()
-    doc.add_heading(new_title, level=1)
-    doc.add_paragraph(new_content)
-    doc.save(file_path)
+    return file_path, _native_name(file_path.name)
+
 
+def update_note(filename: str, current_key: str, new_title: str, new_content: str):
+    file_path, target = _check_key(filename, current_key)
     new_key = generate_random_key()
-    encrypt_file(file_path, new_key)
+    _write_note(target, new_title, new_content, new_key, _claim(target), file_path.name)
 
     return new_key
 
 def count_notes():
-    ensure_notes_dir()
-    return len(list(NOTES_DIR.glob("*.docx")))
+    _ensure_reconciled()
+    return count_catalog_notes()
+
+
+stats.register("notes", count_notes)
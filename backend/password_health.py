@@ -0,0 +1,168 @@
+import hmac
+import math
+import heapq
+import hashlib
+from datetime import date
+
+# Entropy bands, in bits
+WEAK_BITS = 40
+STRONG_BITS = 72
+REPORT_LIMIT = 100  # entries listed per section; the counts always cover the whole vault
+
+# character class -> pool size it contributes
+_POOLS = (
+    (str.islower, 26),
+    (str.isupper, 26),
+    (str.isdigit, 10),
+)
+_SYMBOL_POOL = 33
+_OTHER_POOL = 100  # letters outside ASCII, emoji, ...
+
+
+# -----------------------------------------------------------------
+# Keyed password digests
+# -----------------------------------------------------------------
+class PasswordHmac:
+    """HMAC-SHA256 of passwords under one key, tagged with that key's id.
+
+    Equal passwords under the same key give equal digests, which is all a
+    reuse check needs; without the key the digests are useless for
+    guessing. The key id prefix lets readers spot digests made under a key
+    that has since been rotated out.
+    """
+
+    def __init__(self, key: bytes):
+        self.key = key
+        self.key_id = hashlib.sha256(key).hexdigest()[:8]
+
+    def digest(self, password: str) -> str:
+        mac = hmac.new(self.key, password.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+        return f"{self.key_id}:{mac}"
+
+    def is_current(self, digest) -> bool:
+        return bool(digest) and digest.startswith(self.key_id + ":")
+
+
+def estimate_entropy(password: str) -> float:
+    """Rough strength in bits: length x log2(character pool), where a
+    character that repeats or continues a run of its neighbour (aaa, abc,
+    321) only counts for one bit."""
+    if not password:
+        return 0.0
+    pool = sum(size for test, size in _POOLS if any(test(c) and c.isascii() for c in password))
+    if any(c.isascii() and not c.isalnum() for c in password):
+        pool += _SYMBOL_POOL
+    if not password.isascii():
+        pool += _OTHER_POOL
+    per_char = math.log2(pool)
+
+    bits, previous = 0.0, None
+    for c in password:
+        bits += 1.0 if previous is not None and abs(ord(c) - ord(previous)) <= 1 else per_char
+        previous = c
+    return round(bits, 1)
+
+
+def strength(bits) -> str:
+    if bits is None:
+        return "unknown"
+    if bits < WEAK_BITS:
+        return "weak"
+    return "strong" if bits >= STRONG_BITS else "fair"
+
+
+# -----------------------------------------------------------------
+# Report
+# -----------------------------------------------------------------
+def age_days(value, today: date):
+    """Days since a vault Date column value ("YYYY-MM-DD ..."); None if it does not parse."""
+    try:
+        return (today - date.fromisoformat(str(value or "")[:10])).days
+    except ValueError:
+        return None
+
+
+def score(bits, reused: bool, age, max_age_days: int) -> int:
+    """0-100: up to 60 points for entropy, 20 for being unique, 20 for being fresh."""
+    points = 60 * min(bits or 0, STRONG_BITS) / STRONG_BITS
+    if not reused:
+        points += 20
+    if age is None or age <= max_age_days:
+        points += 20
+    return round(points)
+
+
+def health_report(rows, max_age_days: int, today: date = None, limit: int = REPORT_LIMIT) -> dict:
+    """Reuse groups plus entropy and age scoring of the vault, in one pass.
+
+    rows are (uid, website, name, contact, category, date, pw_hmac,
+    pw_entropy) tuples; nothing is decrypted. Reuse is found by grouping
+    on the digest, totals are kept as running sums and only the entries
+    that end up listed get a dict of their own, so the cost stays linear
+    (and small) in the vault size.
+    """
+    today = today or date.today()
+    rows = list(rows)
+    first_seen, groups = {}, {}
+    strengths = {"weak": 0, "fair": 0, "strong": 0, "unknown": 0}
+    weak, old, ages = [], [], {}
+    entropy_points = 0.0
+    for i, (_, _, _, _, _, day, digest, bits) in enumerate(rows):
+        if digest:
+            first = first_seen.setdefault(digest, i)
+            if first != i:
+                groups.setdefault(digest, [first]).append(i)
+        if bits is None:
+            strengths["unknown"] += 1
+        else:
+            entropy_points += min(bits, STRONG_BITS)
+            if bits < WEAK_BITS:
+                strengths["weak"] += 1
+                weak.append((bits, i))
+            else:
+                strengths["strong" if bits >= STRONG_BITS else "fair"] += 1
+        day = (day or "")[:10]
+        try:
+            age = ages[day]
+        except KeyError:
+            age = ages[day] = age_days(day, today)
+        if age is not None and age > max_age_days:
+            old.append((age, i))
+
+    reused = {i for group in groups.values() for i in group}
+
+    def entry(i: int) -> dict:
+        uid, website, name, contact, category, day, _, bits = rows[i]
+        age = ages[(day or "")[:10]]
+        return {
+            "id": uid,
+            "website": website,
+            "name": name,
+            "contact": contact,
+            "category": category,
+            "date": day,
+            "entropy": bits,
+            "strength": strength(bits),
+            "age_days": age,
+            "reused": i in reused,
+            "score": score(bits, i in reused, age, max_age_days),
+        }
+
+    total = len(rows)
+    points = 60 * entropy_points / STRONG_BITS + 20 * (total - len(reused)) + 20 * (total - len(old))
+    return {
+        "entries": total,
+        "score": round(points / total) if total else 100,
+        "strength": strengths,
+        "max_age_days": max_age_days,
+        "reused_entries": len(reused),
+        "reused_groups": len(groups),
+        "reused": [
+            {"count": len(group), "entries": [entry(i) for i in group[:limit]]}
+            for group in heapq.nlargest(limit, groups.values(), key=len)
+        ],
+        "weak": [entry(i) for _, i in heapq.nsmallest(limit, weak)],
+        "weak_count": len(weak),
+        "old": [entry(i) for _, i in heapq.nlargest(limit, old)],
+        "old_count": len(old),
+    }
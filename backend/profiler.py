@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+MAX_STACKS = 2000  # distinct stacks kept per request
+MAX_DEPTH = 64
+
+
+def _collapse(frame) -> str:
+    """One stack in the collapsed "outer;inner" format flamegraph tools read."""
+    parts = []
+    while frame is not None and len(parts) < MAX_DEPTH:
+        code = frame.f_code
+        parts.append(f"{Path(code.co_filename).stem}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+class SlowRequestProfiler:
+    """Samples the stacks of in-flight requests and keeps the profiles of slow ones.
+
+    A single background thread wakes every ``interval`` seconds while any
+    request is being tracked and records each tracked thread's stack via
+    sys._current_frames(). Nothing is written for requests that finish under
+    ``threshold`` seconds; slower ones leave a collapsed-stack file in
+    ``out_dir`` (at most ``keep`` files, oldest removed first).
+    """
+
+    def __init__(self, threshold: float, interval: float, out_dir: Path, keep: int = 50):
+        self.threshold = threshold
+        self.interval = interval
+        self.out_dir = out_dir
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._active = {}  # thread id -> Counter of collapsed stacks
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Begin sampling the calling thread."""
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def stop(self, duration: float, label: str):
+        """Stop sampling the calling thread; returns the profile path if it was slow."""
+        with self._lock:
+            samples = self._active.pop(threading.get_ident(), None)
+        if samples is None or duration < self.threshold or not samples:
+            return None
+        return self._write(samples, duration, label)
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                idle = not self._active
+            if idle:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, samples in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is None or ident == me:
+                        continue
+                    stack = _collapse(frame)
+                    if stack in samples or len(samples) < MAX_STACKS:
+                        samples[stack] += 1
+            del frames
+            time.sleep(self.interval)
+
+    def _write(self, samples: Counter, duration: float, label: str) -> Path:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        safe = "".join(c if c.isalnum() or c in "._-" else "_" for c in label)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = self.out_dir / f"{stamp}_{safe}_{int(duration * 1000)}ms.folded"
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+        profiles = sorted(self.out_dir.glob("*.folded"), key=os.path.getmtime)
+        for old in profiles[:-self.keep]:
+            old.unlink(missing_ok=True)
+        return path
@@ -0,0 +1,245 @@
+import re
+import heapq
+import threading
+from bisect import bisect_left
+
+# Only metadata is ever indexed — the password column must never reach this module.
+INDEXED_FIELDS = ("website", "name", "contact", "category")
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+
+
+def tokenize(text) -> set[str]:
+    return set(TOKEN_RE.findall(str(text or "").lower()))
+
+
+def trigrams(token: str) -> set[str]:
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edits(token: str) -> int:
+    return 1 if len(token) <= 6 else 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up with limit + 1 once it is exceeded.
+
+    Only the diagonal band |i - j| <= limit is computed, so the cost is
+    O(len(a) * limit) rather than O(len(a) * len(b)).
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if limit == 1:
+        return _one_edit_distance(a, b)
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        lo, hi = max(1, i - limit), min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= limit else over
+        best = current[0]
+        for j in range(lo, hi + 1):
+            cost = previous[j - 1] + (ca != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost if cost < over else over
+            if cost < best:
+                best = cost
+        if best > limit:
+            return over
+        previous = current
+    return previous[-1]
+
+
+def _one_edit_distance(a: str, b: str) -> int:
+    """0, 1, or 2 meaning "more than one edit" — linear time."""
+    if a == b:
+        return 0
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return 1 if a[i + 1:] == b[i + 1:] else 2
+    return 1 if a[i:] == b[i + 1:] else 2
+
+
+class SearchIndex:
+    """In-memory inverted index with prefix and trigram (typo-tolerant) lookup.
+
+    Postings map token -> entry ids; a sorted token list serves prefix
+    queries with bisect, and a trigram -> token-length -> tokens map finds
+    near misses of similar length.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._docs = {}
+            self._doc_tokens = {}
+            self._postings = {}
+            self._sorted_tokens = []
+            self._trigrams = {}
+
+    def __len__(self):
+        return len(self._docs)
+
+    def build(self, entries):
+        """Bulk-load entries; the sorted token list is built once at the end."""
+        with self._lock:
+            self.clear()
+            for entry in entries:
+                doc, tokens = self._doc(entry)
+                self._docs[doc["id"]] = doc
+                self._doc_tokens[doc["id"]] = tokens
+                for token in tokens:
+                    ids = self._postings.get(token)
+                    if ids is None:
+                        ids = self._postings[token] = set()
+                        self._add_grams(token)
+                    ids.add(doc["id"])
+            self._sorted_tokens = sorted(self._postings)
+
+    def _doc(self, entry: dict):
+        doc = {"id": entry["id"]}
+        doc.update({field: entry.get(field) for field in INDEXED_FIELDS})
+        doc["date"] = entry.get("date")
+        tokens = set()
+        for field in INDEXED_FIELDS:
+            tokens |= tokenize(doc[field])
+        return doc, tokens
+
+    def _add_grams(self, token: str):
+        n = len(token)
+        padded = f"${token}$"
+        index = self._trigrams
+        for i in range(n):
+            gram = padded[i:i + 3]
+            by_length = index.get(gram)
+            if by_length is None:
+                index[gram] = {n: {token}}
+            elif n in by_length:
+                by_length[n].add(token)
+            else:
+                by_length[n] = {token}
+
+    def add(self, entry: dict):
+        """Index (or re-index) an entry's metadata fields."""
+        doc, tokens = self._doc(entry)
+        with self._lock:
+            self.remove(doc["id"])
+            self._docs[doc["id"]] = doc
+            self._doc_tokens[doc["id"]] = tokens
+            for token in tokens:
+                ids = self._postings.get(token)
+                if ids is None:
+                    ids = self._postings[token] = set()
+                    self._sorted_tokens.insert(bisect_left(self._sorted_tokens, token), token)
+                    self._add_grams(token)
+                ids.add(doc["id"])
+
+    def remove(self, entry_id):
+        with self._lock:
+            tokens = self._doc_tokens.pop(entry_id, None)
+            if tokens is None:
+                return
+            del self._docs[entry_id]
+            for token in tokens:
+                ids = self._postings[token]
+                ids.discard(entry_id)
+                if not ids:
+                    del self._postings[token]
+                    del self._sorted_tokens[bisect_left(self._sorted_tokens, token)]
+                    for gram in trigrams(token):
+                        by_length = self._trigrams[gram]
+                        by_length[len(token)].discard(token)
+                        if not by_length[len(token)]:
+                            del by_length[len(token)]
+                        if not by_length:
+                            del self._trigrams[gram]
+
+    def _prefix_tokens(self, prefix: str):
+        i = bisect_left(self._sorted_tokens, prefix)
+        while i < len(self._sorted_tokens) and self._sorted_tokens[i].startswith(prefix):
+            yield self._sorted_tokens[i]
+            i += 1
+
+    def _fuzzy_tokens(self, token: str):
+        """Yield (token, similarity) for indexed tokens within max_edits(token) edits.
+
+        Each edit destroys at most three trigrams of either string, so a
+        match shares all but 3 * edits of its distinct grams (and of the
+        query's) with the query. Shared distinct grams are counted over the
+        postings of tokens with a compatible length, and only candidates
+        passing that bound are verified with a bounded edit distance.
+        """
+        edits = max_edits(token)
+        lengths = range(max(1, len(token) - edits), len(token) + edits + 1)
+        grams = trigrams(token)
+
+        shared = {}
+        for gram in grams:
+            by_length = self._trigrams.get(gram)
+            if not by_length:
+                continue
+            for n in lengths:
+                for candidate in by_length.get(n, ()):
+                    shared[candidate] = shared.get(candidate, 0) + 1
+
+        for candidate, common in shared.items():
+            # distinct counts on both sides: repeated grams (aaaa) appear once in each set
+            if common < max(len(grams), len(trigrams(candidate))) - 3 * edits:
+                continue
+            distance = edit_distance(token, candidate, edits)
+            if 0 < distance <= edits:
+                yield candidate, 1.0 - distance / (len(token) + 1)
+
+    def _match(self, token: str, fuzzy: bool) -> dict:
+        scores = {}
+        for match in self._prefix_tokens(token):
+            score = EXACT_SCORE if match == token else PREFIX_SCORE
+            for entry_id in self._postings[match]:
+                if scores.get(entry_id, 0) < score:
+                    scores[entry_id] = score
+        if fuzzy and len(token) >= 3:
+            for match, similarity in self._fuzzy_tokens(token):
+                for entry_id in self._postings[match]:
+                    if scores.get(entry_id, 0) < similarity:
+                        scores[entry_id] = similarity
+        return scores
+
+    def search(self, query: str, limit: int = 20) -> list[dict]:
+        """Return up to limit entries matching every query token, best first.
+
+        Exact and prefix matches are tried first; trigram matching only
+        kicks in when they come up short of the limit.
+        """
+        tokens = TOKEN_RE.findall(str(query or "").lower())
+        if not tokens:
+            return []
+
+        with self._lock:
+            for fuzzy in (False, True):
+                combined = None
+                for token in tokens:
+                    scores = self._match(token, fuzzy)
+                    if combined is None:
+                        combined = scores
+                    else:
+                        combined = {i: combined[i] + s for i, s in scores.items() if i in combined}
+                    if not combined:
+                        break
+                if combined and (len(combined) >= limit or fuzzy):
+                    break
+
+            ranked = heapq.nsmallest(limit, (combined or {}).items(), key=lambda item: (-item[1], item[0]))
+            return [dict(self._docs[entry_id], score=round(score, 3)) for entry_id, score in ranked]
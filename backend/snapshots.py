@@ -0,0 +1,374 @@
+import os
+import json
+import zlib
+import base64
+import fnmatch
+import hashlib
+import hmac
+import sqlite3
+import tempfile
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from pathlib import Path
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from backend.fileio import write_atomic
+
+REPO_VERSION = 1
+KDF_ITERATIONS = 200_000
+CHECK_PLAINTEXT = b"SecureMe snapshot repository"
+
+# never worth keeping: locks, temp files of atomic writes, SQLite side files, profiles,
+# and the breach index (tens of GB, rebuilt from its public dump)
+EXCLUDE = ("*.lock", "*.tmp", ".*", "*.new", "*-wal", "*-shm", "*-journal", "profiles/*", "*.idx")
+
+
+# -----------------------------------------------------------------
+# Content-defined chunking (FastCDC-style gear hash)
+# -----------------------------------------------------------------
+MIN_CHUNK = 16 * 1024
+AVG_CHUNK = 64 * 1024
+MAX_CHUNK = 256 * 1024
+READ_SIZE = 4 * 1024 * 1024
+
+_M64 = (1 << 64) - 1
+_GEAR = [int.from_bytes(hashlib.sha256(bytes([i])).digest()[:8], "big") for i in range(256)]
+# the gear hash shifts left, so its top bits cover the last ~64 bytes; cut on those.
+# A stricter mask before AVG_CHUNK and a looser one after keeps sizes close to the average.
+_MASK_STRICT = ((1 << 18) - 1) << 46
+_MASK_LOOSE = ((1 << 14) - 1) << 50
+
+
+def _cut_point(data: bytes, start: int, end: int) -> int:
+    """Offset where the chunk starting at start ends; data[start:end] is all that is buffered."""
+    size = end - start
+    if size <= MIN_CHUNK:
+        return end
+    limit = start + min(size, MAX_CHUNK)
+    normal = start + min(size, AVG_CHUNK)
+    gear, m64, strict, loose = _GEAR, _M64, _MASK_STRICT, _MASK_LOOSE
+    h = 0
+    # this loop is the whole cost of chunking: keep it to locals and a range-driven for
+    for i in range(start + MIN_CHUNK, normal):
+        h = ((h << 1) + gear[data[i]]) & m64
+        if not h & strict:
+            return i + 1
+    for i in range(normal, limit):
+        h = ((h << 1) + gear[data[i]]) & m64
+        if not h & loose:
+            return i + 1
+    return limit
+
+
+def iter_chunks(f):
+    """Yield the content-defined chunks of an open binary file.
+
+    Boundaries depend only on nearby content, so an insert or rewrite in
+    one place of a file leaves the chunks elsewhere identical.
+    """
+    buffer, pos, eof = b"", 0, False
+    while True:
+        if not eof and len(buffer) - pos < MAX_CHUNK:
+            more = f.read(READ_SIZE)
+            if more:
+                buffer, pos = buffer[pos:] + more, 0
+            else:
+                eof = True
+        if pos >= len(buffer):
+            return
+        cut = _cut_point(buffer, pos, len(buffer))
+        yield buffer[pos:cut]
+        pos = cut
+
+
+# -----------------------------------------------------------------
+# Repository
+# -----------------------------------------------------------------
+class SnapshotError(Exception):
+    pass
+
+
+class SnapshotRepo:
+    """A local backup repository of encrypted, deduplicated chunks.
+
+    Layout::
+
+        config.json           salt, KDF parameters and a passphrase check
+        chunks/ab/<id>        AES-GCM sealed, optionally zlib'd chunk
+        snapshots/<id>.snap   AES-GCM sealed manifest of one point in time
+
+    Chunk ids are HMAC-SHA256 of the plaintext under a key derived from the
+    passphrase, so identical content is stored once without the ids
+    revealing anything about it. Only chunks the repository does not hold
+    yet are written, and files whose size and mtime match the previous
+    snapshot are not even read again.
+    """
+
+    def __init__(self, root: Path, passphrase: str):
+        self.root = Path(root)
+        self.chunks_dir = self.root / "chunks"
+        self.snapshots_dir = self.root / "snapshots"
+
+        config_path = self.root / "config.json"
+        config = json.loads(config_path.read_text()) if config_path.exists() else None
+        if config is not None and config.get("version") != REPO_VERSION:
+            raise SnapshotError(f"Unsupported snapshot repository version: {config.get('version')}")
+        salt = base64.b64decode(config["salt"]) if config else os.urandom(16)
+        iterations = config["iterations"] if config else KDF_ITERATIONS
+
+        master = hashlib.pbkdf2_hmac("sha256", passphrase.encode("utf-8"), salt, iterations)
+        self._aead = AESGCM(self._subkey(master, b"chunks"))
+        self._id_key = self._subkey(master, b"ids")
+
+        if config is None:
+            # a new repository: the check value lets later runs reject a wrong passphrase up front
+            config = {
+                "version": REPO_VERSION,
+                "salt": base64.b64encode(salt).decode(),
+                "iterations": iterations,
+                "check": base64.b64encode(self._seal(CHECK_PLAINTEXT, b"check")).decode(),
+                "chunking": {"min": MIN_CHUNK, "avg": AVG_CHUNK, "max": MAX_CHUNK},
+            }
+            self.root.mkdir(parents=True, exist_ok=True)
+            write_atomic(config_path, [json.dumps(config, indent=2).encode("utf-8")])
+        try:
+            self._open(base64.b64decode(config["check"]), b"check")
+        except InvalidTag:
+            raise SnapshotError("Wrong passphrase for this snapshot repository.")
+
+    @staticmethod
+    def _subkey(master: bytes, info: bytes) -> bytes:
+        return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=b"SecureMe snapshots " + info).derive(master)
+
+    # -------------------------------------------------------------
+    # Sealing
+    # -------------------------------------------------------------
+    def _seal(self, data: bytes, aad: bytes) -> bytes:
+        packed = zlib.compress(data, 1)
+        payload = b"\x01" + packed if len(packed) < len(data) else b"\x00" + data
+        nonce = os.urandom(12)
+        return nonce + self._aead.encrypt(nonce, payload, aad)
+
+    def _open(self, sealed: bytes, aad: bytes) -> bytes:
+        payload = self._aead.decrypt(sealed[:12], sealed[12:], aad)
+        return zlib.decompress(payload[1:]) if payload[:1] == b"\x01" else payload[1:]
+
+    def chunk_id(self, data: bytes) -> str:
+        return hmac.new(self._id_key, data, hashlib.sha256).hexdigest()
+
+    def _chunk_path(self, chunk_id: str) -> Path:
+        return self.chunks_dir / chunk_id[:2] / chunk_id
+
+    def _put_chunk(self, data: bytes) -> tuple[str, int]:
+        """Store a chunk unless it is already there; returns (id, bytes written)."""
+        chunk_id = self.chunk_id(data)
+        path = self._chunk_path(chunk_id)
+        if path.exists():
+            return chunk_id, 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        sealed = self._seal(data, chunk_id.encode())
+        write_atomic(path, [sealed])
+        return chunk_id, len(sealed)
+
+    def _get_chunk(self, chunk_id: str) -> bytes:
+        data = self._open(self._chunk_path(chunk_id).read_bytes(), chunk_id.encode())
+        if not hmac.compare_digest(self.chunk_id(data), chunk_id):
+            raise SnapshotError(f"Chunk {chunk_id} does not match its id")
+        return data
+
+    # -------------------------------------------------------------
+    # Manifests
+    # -------------------------------------------------------------
+    def snapshot_ids(self) -> list[str]:
+        if not self.snapshots_dir.exists():
+            return []
+        return sorted(p.stem for p in self.snapshots_dir.glob("*.snap"))
+
+    def manifest(self, snapshot_id: str) -> dict:
+        path = self.snapshots_dir / f"{snapshot_id}.snap"
+        if not path.exists():
+            raise SnapshotError(f"No snapshot {snapshot_id}")
+        return json.loads(self._open(path.read_bytes(), b"manifest:" + snapshot_id.encode()))
+
+    def _resolve(self, snapshot_id: str = None) -> str:
+        ids = self.snapshot_ids()
+        if not ids:
+            raise SnapshotError("The repository has no snapshots yet.")
+        if snapshot_id in (None, "latest"):
+            return ids[-1]
+        matches = [i for i in ids if i.startswith(snapshot_id)]
+        if len(matches) != 1:
+            raise SnapshotError(f"Snapshot id {snapshot_id!r} matches {len(matches)} snapshots")
+        return matches[0]
+
+    # -------------------------------------------------------------
+    # Create
+    # -------------------------------------------------------------
+    def _files(self, source: Path):
+        root = self.root.resolve()
+        for dirpath, dirnames, filenames in os.walk(source):
+            here = Path(dirpath)
+            dirnames[:] = sorted(d for d in dirnames if (here / d).resolve() != root)
+            for name in sorted(filenames):
+                path = here / name
+                rel = path.relative_to(source).as_posix()
+                if path.is_symlink() or any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(rel, p) for p in EXCLUDE):
+                    continue
+                yield rel, path
+
+    @staticmethod
+    def _signature(path: Path) -> list:
+        """What has to match the previous snapshot for a file to be reused without reading it."""
+        sig = []
+        for p in (path, path.with_name(path.name + "-wal")) if path.suffix == ".db" else (path,):
+            try:
+                st = p.stat()
+                sig += [st.st_size, st.st_mtime_ns]
+            except FileNotFoundError:
+                sig += [None, None]
+        return sig
+
+    def _store_file(self, path: Path, stats: dict) -> list[str]:
+        if path.suffix == ".db":
+            # a live SQLite database (plus its WAL) is copied consistently through the backup API
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            os.close(fd)
+            try:
+                src, dst = sqlite3.connect(path), sqlite3.connect(tmp)
+                try:
+                    src.backup(dst)
+                finally:
+                    src.close()
+                    dst.close()
+                return self._store_file(Path(tmp), stats)
+            except sqlite3.DatabaseError:
+                pass  # not SQLite after all: store the bytes as they are
+            finally:
+                os.unlink(tmp)
+
+        chunk_ids = []
+        with open(path, "rb") as f:
+            for chunk in iter_chunks(f):
+                chunk_id, written = self._put_chunk(chunk)
+                chunk_ids.append(chunk_id)
+                stats["bytes_read"] += len(chunk)
+                stats["chunks"] += 1
+                if written:
+                    stats["new_chunks"] += 1
+                    stats["bytes_stored"] += written
+        return chunk_ids
+
+    def _capture(self, rel: str, path: Path, previous: dict, stats: dict):
+        """The manifest entry of one file, or None if it disappeared meanwhile."""
+        sig = self._signature(path)
+        old = previous.get(rel)
+        try:
+            if old is not None and old["sig"] == sig and all(self._chunk_path(c).exists() for c in old["chunks"]):
+                chunk_ids, size = old["chunks"], old["size"]
+                stats["reused_files"] += 1
+            else:
+                before = stats["bytes_read"]
+                chunk_ids = self._store_file(path, stats)
+                size = stats["bytes_read"] - before
+            st = path.stat()
+        except FileNotFoundError:
+            return None  # removed while we were walking (a rotated journal, a deleted note)
+        stats["files"] += 1
+        stats["bytes"] += size
+        return {"path": rel, "size": size, "mode": st.st_mode & 0o777,
+                "mtime_ns": st.st_mtime_ns, "sig": sig, "chunks": chunk_ids}
+
+    def create(self, source: Path, journals=()) -> dict:
+        """Snapshot every file under source; returns the new snapshot's summary.
+
+        journals are (Journal, store path) pairs. Each store is copied
+        together with its journal files while compaction of that journal
+        is paused, so a record cannot move from the journal into the store
+        between the two copies and be missed by both. Appends carry on
+        meanwhile, and the rest of the tree is walked after the pause.
+        """
+        source = Path(source)
+        previous = {}
+        ids = self.snapshot_ids()
+        if ids:
+            previous = {f["path"]: f for f in self.manifest(ids[-1])["files"]}
+
+        stats = {"files": 0, "reused_files": 0, "bytes": 0, "bytes_read": 0,
+                 "chunks": 0, "new_chunks": 0, "bytes_stored": 0}
+        held = {Path(p).resolve() for journal, store in journals
+                for p in (store, journal.path, journal.compacting_path)}
+        files, rest = [], []
+        with ExitStack() as stack:
+            for journal, _ in journals:
+                stack.enter_context(journal.paused())
+            for rel, path in self._files(source):
+                if path.resolve() not in held:
+                    rest.append((rel, path))
+                    continue
+                files.append(self._capture(rel, path, previous, stats))
+        files += [self._capture(rel, path, previous, stats) for rel, path in rest]
+        files = sorted((f for f in files if f is not None), key=lambda f: f["path"])
+
+        now = datetime.now(timezone.utc)
+        snapshot_id = now.strftime("%Y%m%dT%H%M%S%fZ")
+        manifest = {"id": snapshot_id, "created": now.isoformat(timespec="seconds"),
+                    "source": str(source), "files": files, "stats": stats}
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        sealed = self._seal(json.dumps(manifest).encode("utf-8"), b"manifest:" + snapshot_id.encode())
+        write_atomic(self.snapshots_dir / f"{snapshot_id}.snap", [sealed])
+        return dict(stats, id=snapshot_id)
+
+    # -------------------------------------------------------------
+    # List / restore / verify
+    # -------------------------------------------------------------
+    def list(self) -> list[dict]:
+        summaries = []
+        for snapshot_id in self.snapshot_ids():
+            manifest = self.manifest(snapshot_id)
+            summaries.append(dict(manifest["stats"], id=snapshot_id, created=manifest["created"]))
+        return summaries
+
+    def restore(self, snapshot_id: str, target: Path, patterns=(), force: bool = False) -> dict:
+        """Write the files of a snapshot (or those matching patterns) under target."""
+        snapshot_id = self._resolve(snapshot_id)
+        target = Path(target)
+        if target.exists() and any(target.iterdir()) and not force:
+            raise SnapshotError(f"{target} is not empty; restore into an empty directory or pass force")
+
+        restored = {"id": snapshot_id, "files": 0, "bytes": 0}
+        for entry in self.manifest(snapshot_id)["files"]:
+            if patterns and not any(fnmatch.fnmatch(entry["path"], p) for p in patterns):
+                continue
+            path = target / entry["path"]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, (self._get_chunk(c) for c in entry["chunks"]))
+            os.chmod(path, entry["mode"])
+            os.utime(path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+            restored["files"] += 1
+            restored["bytes"] += entry["size"]
+        return restored
+
+    def verify(self, snapshot_id: str = None, full: bool = False) -> dict:
+        """Check that every chunk a snapshot needs is present (and, with full, intact).
+
+        Without a snapshot id every snapshot in the repository is checked.
+        """
+        ids = [self._resolve(snapshot_id)] if snapshot_id else self.snapshot_ids()
+        needed = set()
+        for i in ids:
+            for entry in self.manifest(i)["files"]:
+                needed.update(entry["chunks"])
+
+        missing, corrupt = [], []
+        for chunk_id in sorted(needed):
+            if not self._chunk_path(chunk_id).exists():
+                missing.append(chunk_id)
+            elif full:
+                try:
+                    self._get_chunk(chunk_id)
+                except (InvalidTag, SnapshotError, zlib.error):
+                    corrupt.append(chunk_id)
+        return {"snapshots": len(ids), "chunks": len(needed), "missing": missing, "corrupt": corrupt,
+                "ok": not missing and not corrupt}
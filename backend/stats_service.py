@@ -0,0 +1,66 @@
+import time
+import importlib
+import threading
+from datetime import datetime
+from config import STATS_TTL
+
+
+class StatsService:
+    """Dashboard counters kept in memory.
+
+    Write paths adjust a counter with incr(); a counter is loaded from its
+    registered loader on first read and reloaded once it is older than
+    ``ttl`` seconds, which also picks up writes made by other processes.
+    ttl <= 0 reloads on every read.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._loaders = {}
+        self._values = {}
+        self._loaded_at = {}
+        self.rebuilt = None
+
+    def register(self, name: str, loader):
+        self._loaders[name] = loader
+
+    def register_module(self, name: str, module_name: str):
+        """Announce a counter whose loader module_name registers when imported;
+        the module is only imported once the counter is first read."""
+        def load():
+            importlib.import_module(module_name)
+            if self._loaders[name] is load:
+                raise LookupError(f"{module_name} did not register the {name!r} counter")
+            return self._loaders[name]()
+        self._loaders.setdefault(name, load)
+
+    def incr(self, name: str, delta: int = 1):
+        # a counter that was never loaded picks the change up from its loader
+        with self._lock:
+            if name in self._values:
+                self._values[name] += delta
+
+    def invalidate(self, name: str = None):
+        with self._lock:
+            for key in [name] if name else list(self._values):
+                self._values.pop(key, None)
+
+    def get(self, name: str) -> int:
+        now = time.monotonic()
+        with self._lock:
+            if name in self._values and now - self._loaded_at[name] < self.ttl:
+                return self._values[name]
+
+        value = self._loaders[name]()
+        with self._lock:
+            self._values[name] = value
+            self._loaded_at[name] = now
+            self.rebuilt = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return value
+
+    def snapshot(self) -> dict:
+        return {name: self.get(name) for name in self._loaders}
+
+
+stats = StatsService(STATS_TTL)
@@ -1,83 +1,701 @@
 import os
+import time
+import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from openpyxl import Workbook, load_workbook
-from config import BASE_DIR
-from backend.encryption_utils import encrypt_text, decrypt_text
+from config import (
+    DATA_DIR, VAULT_CACHE_TTL, JOURNAL_BATCH_SIZE, JOURNAL_INTERVAL, IMPORT_WORKERS, BREACH_INDEX, BREACH_POLICY,
+    PASSWORD_MAX_AGE_DAYS,
+)
+from backend.encryption_utils import encrypt_text, decrypt_text, vault_crypto
+from backend.vault_store import (
+    open_store, new_entry_id, pending_row, matches, merge_pending, SORTS, DEFAULT_SORT, PASSWORD_INDEX_COLUMNS,
+)
+from backend.search_index import SearchIndex
+from backend.journal import Journal
+from backend.stats_service import stats as dashboard_stats
+from backend.metrics import storage_seconds, cache_requests
+from backend.vault_transfer import read_records, chunked, encrypt_batches, WRITERS
+from backend.breach_check import open_index
+from backend.password_health import estimate_entropy, health_report
 
-VAULT_FILE = BASE_DIR / "data" / "PasswordVault.xlsx"
-VAULT_FILE.parent.mkdir(parents=True, exist_ok=True)
+log = logging.getLogger(__name__)
+
+VAULT_FILE = DATA_DIR / "PasswordVault.xlsx"
+VAULT_DB = DATA_DIR / "vault.db"
+VAULT_JOURNAL = DATA_DIR / "vault.journal"
+VAULT_ENGINE = os.environ.get("SECUREME_VAULT_ENGINE", "sqlite")
+MAX_PAGE_SIZE = 200
+IMPORT_BATCH_SIZE = 1000
+
+_store = None
+_store_lock = threading.RLock()
+
+
+def get_store():
+    """Open the configured storage engine, importing a legacy PasswordVault.xlsx once
+    and replaying any journal records a previous process left behind."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            store = open_store(VAULT_ENGINE, VAULT_DB)
+            if VAULT_FILE.exists() and not store.get_meta("xlsx_imported"):
+                store.import_xlsx(VAULT_FILE)
+                store.set_meta("xlsx_imported", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            _store = store
+            _journal.recover()
+    return _store
+
+
+def _write_store():
+    """The store, with every acknowledged journal record folded in, for the write
+    paths that compare against stored rows: updates, deletes and bulk imports.
+
+    Saves only append to the journal and reads never compact; they lay the
+    records still pending over the store instead (see _read_with_pending).
+    """
+    store = get_store()
+    _journal.flush()
+    return store
+
+
+def _signature(store):
+    """What cached reads depend on: the store files and the journal's pending records."""
+    return store.signature(), _journal.signature()
+
+
+# -----------------------------------------------------------------
+# Decrypted-vault cache
+# -----------------------------------------------------------------
+class VaultCache:
+    """Parsed vault rows and page queries, plus lazily decrypted passwords.
+
+    Results are valid while the signature (see _signature) is unchanged and they are younger than ``ttl`` seconds; ttl <= 0 disables
+    caching entirely.
+    """
+
+    MAX_RESULTS = 64
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._results = OrderedDict()
+            self._signature = None
+            self._plain = {}
+
+    def get(self, signature, key, loader):
+        """Return the cached result for key, calling loader() on a miss."""
+        if self.ttl <= 0:
+            self.misses += 1
+            cache_requests.inc(cache="vault_results", result="miss")
+            with storage_seconds.time(op="vault_query"):
+                return loader()
+
+        now = time.monotonic()
+        with self._lock:
+            if signature != self._signature:
+                self._results.clear()
+                self._plain = {}
+                self._signature = signature
+            cached = self._results.get(key)
+            if cached is not None and now - cached[0] < self.ttl:
+                self._results.move_to_end(key)
+                self.hits += 1
+                cache_requests.inc(cache="vault_results", result="hit")
+                return cached[1]
+
+        cache_requests.inc(cache="vault_results", result="miss")
+        with storage_seconds.time(op="vault_query"):
+            value = loader()
+        with self._lock:
+            self.misses += 1
+            if signature == self._signature:
+                self._results[key] = (now, value)
+                while len(self._results) > self.MAX_RESULTS:
+                    self._results.popitem(last=False)
+        return value
+
+    def password(self, row: dict) -> str:
+        key = (row["id"], row["password"])
+        with self._lock:
+            if key in self._plain:
+                cache_requests.inc(cache="vault_passwords", result="hit")
+                return self._plain[key]
+
+        cache_requests.inc(cache="vault_passwords", result="miss")
+        plain = decrypt_text(row["password"])
+        if self.ttl > 0:
+            with self._lock:
+                self._plain[key] = plain
+        return plain
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "results": len(self._results),
+                "decrypted": len(self._plain),
+                "ttl": self.ttl,
+            }
+
+
+_cache = VaultCache(VAULT_CACHE_TTL)
+
+
+def clear_vault_cache():
+    _cache.clear()
+
+
+def vault_cache_stats() -> dict:
+    return _cache.stats()
+
+
+# -----------------------------------------------------------------
+# Metadata search index
+# -----------------------------------------------------------------
+_index = SearchIndex()
+_index_signature = None
+_index_seq = None  # newest store change folded into the index; None until it is built
+_index_lock = threading.Lock()
+
+
+def _build_index(rows):
+    """Caller holds _index_lock."""
+    _index.build(dict(row, id=uid) for uid, row in rows.items())
+
+
+def _refresh_index(store):
+    """Caller holds _index_lock. Replay the store's change log since the last
+    refresh, then add the journaled entries not compacted yet."""
+    global _index_signature, _index_seq
+    # taken before anything is read: a write racing the refresh is replayed by the next one
+    signature = _signature(store)
+    since = _index_seq
+
+    def read():
+        delta = store.changes_since(since) if since is not None else None
+        if delta is not None:
+            return False, delta
+        return True, (store.change_seq(), {row["uid"]: row for row in store.iter_rows()})
+
+    # pending adds are newer than the snapshot, so replaying its changes first cannot undo them
+    (rebuild, (seq, changes)), pending = _read_with_pending(store, read)
+    if rebuild:
+        _build_index(changes)
+    else:
+        for uid, row in changes.items():
+            if row is None:
+                _index.remove(uid)
+            else:
+                _index.add(dict(row, id=uid))
+    for row in pending:
+        _index.add(dict(row, id=row["uid"]))
+    _index_signature, _index_seq = signature, seq
+
+
+def build_search_index() -> int:
+    """(Re)build the search index from the store."""
+    global _index_seq
+    with _index_lock:
+        _index_seq = None
+        _refresh_index(get_store())
+    return len(_index)
+
+
+def _search_index() -> SearchIndex:
+    """The index, brought up to date whenever the store or the journal moved on.
+
+    This process's own saves, edits and deletes update it directly. Like
+    VaultCache it is per process, so writes made by another worker (or
+    folded in by another worker's compactor) are picked up from the
+    store's change log and the journal on the next search; only when that
+    log no longer reaches back far enough is the index rebuilt.
+    """
+    store = get_store()
+    if _signature(store) != _index_signature:
+        with _index_lock:
+            if _signature(store) != _index_signature:
+                _refresh_index(store)
+    return _index
+
+
+def _index_entry(uid: str, entry: dict):
+    if _index_seq is not None:
+        _index.add(dict(entry, id=uid))
+
+
+def _unindex_entry(uid: str):
+    if _index_seq is not None:
+        _index.remove(uid)
+
+
+def search_entries(q: str, limit: int = 20) -> list[dict]:
+    """Prefix / typo-tolerant search over website, name, contact and category."""
+    return _search_index().search(q, limit)
+
+
+# -----------------------------------------------------------------
+# Write-behind journal
+# -----------------------------------------------------------------
+@storage_seconds.time(op="vault_journal_apply")
+def _apply_journal(records):
+    get_store().apply_journal(records)
+    _cache.clear()
+
+
+_journal = Journal(VAULT_JOURNAL, _apply_journal, JOURNAL_BATCH_SIZE, JOURNAL_INTERVAL)
+
+
+def _read_with_pending(store, read):
+    """(read(), rows of the acknowledged adds that result does not include yet).
+
+    read() runs in one store snapshot, which also tells the last journal
+    seq folded into it, and read_consistent pairs that with the journal's
+    records: the pending adds are exactly the newer ones. Nothing here
+    compacts; that is left to the background compactor.
+    """
+    (result, applied), records = _journal.read_consistent(lambda: store.snapshot(read))
+    return result, [pending_row(r["entry"]) for r in records if r["seq"] > applied and r["op"] == "add"]
+
+
+def _stream_with_pending(store, rows, shape=dict):
+    """Yield rows (a stream over the store, not started yet), then the
+    acknowledged adds it did not include, each passed through shape().
+
+    A stream is too long to hold one snapshot, so the pending records are
+    read before it starts: an add compacted meanwhile is either streamed
+    or still among them. The ones left over are looked up again in one
+    snapshot at the end, as by then they may be compacted, or even deleted.
+    """
+    pending = {r["entry"]["uid"]: r for r in _journal.unapplied() if r["op"] == "add"}
+    for row in rows:
+        pending.pop(row["uid"], None)
+        yield row
+    if not pending:
+        return
+    stored, applied = store.snapshot(lambda: {uid: store.get(uid) for uid in pending})
+    for uid, record in pending.items():
+        if record["seq"] > applied:
+            yield shape(pending_row(record["entry"]))
+        elif stored[uid] is not None:
+            yield shape(stored[uid])
+
+
+# -----------------------------------------------------------------
+# Breached-password check
+# -----------------------------------------------------------------
+def breach_count(password: str) -> int:
+    """How often password appears in the local breach corpus; 0 without an index."""
+    index = open_index(BREACH_INDEX)
+    if index is None or not password:
+        return 0
+    with storage_seconds.time(op="breach_lookup"):
+        return index.check_password(password)
+
+
+def _breach_warning(breaches: int) -> str:
+    if not breaches:
+        return ""
+    return f" ⚠️ This password appears in {breaches:,} known data breaches — consider changing it."
+
+
+def _breach_block(breaches: int):
+    if breaches and BREACH_POLICY == "block":
+        return False, f"❌ This password appears in {breaches:,} known data breaches — choose another one."
+    return None
+
+
+def audit_vault() -> dict:
+    """Check every stored password against the breach index; breached entries come worst first."""
+    index = open_index(BREACH_INDEX)
+    if index is None:
+        raise FileNotFoundError(f"No usable breach index at {BREACH_INDEX}; build one with `flask breach-index`")
+    report = {"checked": 0, "undecryptable": 0, "breached": []}
+    store = get_store()
+    for row in _stream_with_pending(store, store.iter_rows()):
+        try:
+            password = decrypt_text(row["password"])
+        except Exception:
+            report["undecryptable"] += 1
+            continue
+        report["checked"] += 1
+        breaches = index.check_password(password) if password else 0
+        if breaches:
+            entry = _to_entry(row, decrypt=False)
+            entry["breaches"] = breaches
+            report["breached"].append(entry)
+    report["breached"].sort(key=lambda e: -e["breaches"])
+    return report
+
+
+# -----------------------------------------------------------------
+# Password index (reuse / strength without decrypting)
+# -----------------------------------------------------------------
+def _password_index(password: str, hasher=None) -> dict:
+    hasher = hasher or vault_crypto.password_hmac()
+    return {"pw_hmac": hasher.digest(password), "pw_entropy": estimate_entropy(password)}
+
+
+def _indexed_rows(store, counts: dict):
+    """Yield (uid, website, name, contact, category, date, pw_hmac, pw_entropy) for
+    every row, repairing the password index of rows that lack a current one.
+
+    Rows from before the index existed, legacy imports and rows digested
+    under a key that has since been rotated out are decrypted once here
+    and written back in batches; everything else is never decrypted.
+    """
+    hasher = vault_crypto.password_hmac()
+    is_current = hasher.is_current
+    reloaded = False
+    updates = []
+    rows = _stream_with_pending(store, store.iter_password_index(),
+                                lambda row: tuple(row[c] for c in PASSWORD_INDEX_COLUMNS))
+    for row_id, uid, website, name, contact, category, date, ciphertext, digest, bits in rows:
+        stale = not is_current(digest)
+        if stale and not reloaded:
+            # another process may have rotated the key since this one loaded the ring
+            vault_crypto.reload()
+            hasher = vault_crypto.password_hmac()
+            is_current = hasher.is_current
+            reloaded = True
+            stale = not is_current(digest)
+        if stale:
+            try:
+                index = _password_index(decrypt_text(ciphertext), hasher)
+                digest, bits = index["pw_hmac"], index["pw_entropy"]
+                counts["reindexed"] += 1
+                if row_id is not None:  # a pending row is written with its index by the compactor
+                    updates.append((row_id, ciphertext, digest, bits))
+            except Exception:
+                counts["undecryptable"] += 1
+                digest = bits = None
+            if len(updates) >= IMPORT_BATCH_SIZE:
+                store.set_password_index(updates)
+                updates = []
+        yield uid, website, name, contact, category, date, digest, bits
+    if updates:
+        store.set_password_index(updates)
+
+
+def reindex_passwords() -> int:
+    """Bring every row's password index up to date; returns how many rows needed it."""
+    counts = {"reindexed": 0, "undecryptable": 0}
+    for _ in _indexed_rows(get_store(), counts):
+        pass
+    if counts["reindexed"]:
+        _cache.clear()
+    return counts["reindexed"]
+
+
+def vault_health(max_age_days: int = PASSWORD_MAX_AGE_DAYS) -> dict:
+    """Reused passwords, weak ones and old ones, from the password index alone."""
+    store = get_store()
+
+    def load():
+        counts = {"reindexed": 0, "undecryptable": 0}
+        report = health_report(_indexed_rows(store, counts), max_age_days)
+        report.update(counts)
+        return report
+
+    return _cache.get(_signature(store), ("health", max_age_days), load)
 
-def ensure_vault_exists():
-    if not VAULT_FILE.exists():
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Vault"
-        ws.append(["Website", "Name", "Email/Username/Phone", "Password", "Category", "Date"])
-        wb.save(VAULT_FILE)
 
 def save_entry(website: str, name: str, contact: str, password: str, category: str) -> tuple[bool, str]:
-    ensure_vault_exists()
     try:
-        encrypted_pass = encrypt_text(password)
-        wb = load_workbook(VAULT_FILE)
-        ws = wb.active
-        ws.append([website, name, contact, encrypted_pass, category, datetime.now().strftime("%Y-%m-%d %H:%M:%S")])
-        wb.save(VAULT_FILE)
+        breaches = breach_count(password)
+        blocked = _breach_block(breaches)
+        if blocked:
+            return blocked
+        get_store()  # replays any leftovers before anything new is appended
+        with vault_crypto.writing():
+            entry = {
+                "uid": new_entry_id(),
+                "website": website,
+                "name": name,
+                "contact": contact,
+                "password": encrypt_text(password),
+                "category": category,
+                "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                **_password_index(password),
+            }
+            _journal.append({"op": "add", "entry": entry})
+        _index_entry(entry["uid"], entry)
+        dashboard_stats.incr("vault_entries")
 
-        return True, "✅ Password entry saved successfully."
+        return True, "✅ Password entry saved successfully." + _breach_warning(breaches)
     except Exception as e:
         return False, f"❌ Error saving entry: {e}"
 
-def list_entries():
-    ensure_vault_exists()
-    wb = load_workbook(VAULT_FILE)
-    ws = wb.active
-
-    entries = []
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        website, name, contact, enc_pass, category, date = row
+def _to_entry(row: dict, decrypt: bool) -> dict:
+    entry = {
+        "id": row["uid"],
+        "website": row["website"],
+        "name": row["name"],
+        "contact": row["contact"],
+        "category": row["category"],
+        "date": row["date"],
+        "version": row["version"],
+    }
+    if decrypt:
         try:
-            decrypted_pass = decrypt_text(enc_pass)
+            entry["password"] = _cache.password(row)
         except Exception:
-            decrypted_pass = "⚠️ Error"
-        entries.append({
-            "website": website,
-            "name": name,
-            "contact": contact,
-            "password": decrypted_pass,
-            "category": category,
-            "date": date
-        })
-    return entries
+            entry["password"] = "⚠️ Error"
+    return entry
+
+def list_entries(decrypt: bool = True):
+    """Return every vault entry.
+
+    With decrypt=False only metadata is returned and the password stays an
+    opaque ciphertext, so the cost no longer grows with Fernet work per row;
+    use reveal_entry() to decrypt a single password on demand.
+    """
+    store = get_store()
+
+    def load():
+        rows, pending = _read_with_pending(store, store.all)
+        return rows + pending
+
+    return [_to_entry(row, decrypt) for row in _cache.get(_signature(store), "all", load)]
+
+def list_entries_page(page: int = 1, page_size: int = 24, category=None, q=None,
+                      sort: str = DEFAULT_SORT, decrypt: bool = False) -> dict:
+    """Return one page of entries, filtered and sorted by the storage engine."""
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    page = max(1, page)
+    category = category if category and category != "All" else None
+    q = (q or "").strip() or None
+    sort = sort if sort in SORTS else DEFAULT_SORT
+
+    store = get_store()
+    offset = (page - 1) * page_size
+
+    def load():
+        reserve = 0
+        while True:
+            # every pending add sorting before the page pushes one stored row onto it
+            start = max(0, offset - reserve)
+            (rows, total), pending = _read_with_pending(
+                store, lambda: store.query(start, offset + page_size - start, category, q, sort)
+            )
+            pending = [row for row in pending if matches(row, category, q)]
+            if not pending:
+                return rows[offset - start:], total
+            if len(pending) <= reserve or not start:
+                return merge_pending(rows, pending, start, offset, page_size, sort), total + len(pending)
+            reserve = len(pending)
+
+    key = ("page", page, page_size, category, q, sort)
+    rows, total = _cache.get(_signature(store), key, load)
+    return {
+        "entries": [_to_entry(row, decrypt) for row in rows],
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "pages": max(1, -(-total // page_size)),
+        "category": category or "All",
+        "q": q or "",
+        "sort": sort,
+    }
+
+def _get_row(entry_id: str):
+    store = get_store()
+    row, pending = _read_with_pending(store, lambda: store.get(entry_id))
+    return row or next((p for p in pending if p["uid"] == entry_id), None)
+
+def get_entry(entry_id: str):
+    """One entry's metadata by its stable id, or None; the password stays encrypted."""
+    row = _get_row(entry_id)
+    return _to_entry(row, decrypt=False) if row else None
+
+def reveal_entry(entry_id: str):
+    """Decrypt the password of a single entry, or None if it does not exist."""
+    row = _get_row(entry_id)
+    if row is None:
+        return None
+    return decrypt_text(row["password"])
 
 def count_vault_entries() -> int:
-    ensure_vault_exists()
-    wb = load_workbook(VAULT_FILE)
-    ws = wb.active
-    return ws.max_row - 1
-
-def update_entry(entry_id: int, website: str, name: str, contact: str, password: str, category: str) -> tuple[bool, str]:
-    """Update an existing vault entry by row index (1-based excluding header)."""
-    ensure_vault_exists()
-    try:
-        wb = load_workbook(VAULT_FILE)
-        ws = wb.active
+    store = get_store()
+    total, pending = _read_with_pending(store, store.count)
+    return total + len(pending)
 
-        # +1 to skip header row
-        row_idx = entry_id + 1  
-        if row_idx > ws.max_row:
-            return False, "❌ Entry not found."
 
-        encrypted_pass = encrypt_text(password)
-        ws.cell(row=row_idx, column=1).value = website
-        ws.cell(row=row_idx, column=2).value = name
-        ws.cell(row=row_idx, column=3).value = contact
-        ws.cell(row=row_idx, column=4).value = encrypted_pass
-        ws.cell(row=row_idx, column=5).value = category
-        ws.cell(row=row_idx, column=6).value = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+dashboard_stats.register("vault_entries", count_vault_entries)
+
+def update_entry(entry_id: str, website: str, name: str, contact: str, password: str, category: str,
+                 version=None) -> tuple[bool, str]:
+    """Update an existing vault entry by its id; an empty password keeps the current one.
 
-        wb.save(VAULT_FILE)
-        return True, "✅ Entry updated successfully."
+    With ``version`` (the one the edit form was rendered with) the write
+    only goes through if nobody else changed the entry in the meantime.
+    Updates go straight to the store as a compare-and-swap instead of
+    through the journal, so a conflict is reported to this caller rather
+    than discovered later at compaction. The entry is read inside the
+    key-ring write hold too: a kept password is written back as the
+    ciphertext it has now, which a rotation must not change underneath.
+    """
+    try:
+        store = _write_store()
+        breaches = breach_count(password)
+        blocked = _breach_block(breaches)
+        if blocked:
+            return blocked
+        with vault_crypto.writing():
+            current = store.get(entry_id)
+            if current is None:
+                return False, "❌ Entry not found."
+            if version is not None and version != current["version"]:
+                return False, "⚠️ This entry was changed elsewhere — reload it and try again."
+            entry = {
+                "website": website,
+                "name": name,
+                "contact": contact,
+                "password": encrypt_text(password) if password else current["password"],
+                "category": category,
+                "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            if password:
+                entry.update(_password_index(password))
+            else:
+                entry.update(pw_hmac=current["pw_hmac"], pw_entropy=current["pw_entropy"])
+            if not store.update(entry_id, entry, current["version"]):
+                return False, "⚠️ This entry was changed elsewhere — reload it and try again."
+        _cache.clear()
+        _index_entry(entry_id, entry)
+
+        return True, "✅ Entry updated successfully." + _breach_warning(breaches)
     except Exception as e:
         return False, f"❌ Error updating entry: {e}"
 
+
+def delete_entry(entry_id: str) -> tuple[bool, str]:
+    try:
+        if not _write_store().delete(entry_id):
+            return False, "❌ Entry not found."
+        _cache.clear()
+        _unindex_entry(entry_id)
+        dashboard_stats.incr("vault_entries", -1)
+        return True, "🗑️ Entry deleted."
+    except Exception as e:
+        return False, f"❌ Error deleting entry: {e}"
+
+
+def rotate_vault_key() -> int:
+    """Move every password to a fresh vault key in one pass over the store.
+
+    The new key is added to the ring first, so a crash part way through
+    leaves the vault readable; old keys are retired only after the
+    re-encrypted rows are committed. The whole rotation holds the ring
+    exclusively, so no process can write a token under a key between its
+    rotation pass and its retirement; writers waiting on it pick up the
+    new ring when they resume. The password index is keyed off the vault
+    key too, so it is rebuilt under the new key afterwards (a crash in
+    between only leaves it to be repaired by the next health report).
+    """
+    with vault_crypto.rotating():
+        vault_crypto.add_key()
+        # the journal is folded in first: its records were made under the old key
+        rotated = _write_store().transform_passwords(vault_crypto.rotate)
+        vault_crypto.retire_old_keys()
+    _cache.clear()
+    reindex_passwords()
+    return rotated
+
+
+# -----------------------------------------------------------------
+# xlsx import / export
+# -----------------------------------------------------------------
+def import_vault_xlsx(xlsx_path=VAULT_FILE) -> int:
+    with storage_seconds.time(op="vault_xlsx_import"):
+        added = _write_store().import_xlsx(xlsx_path)
+    _cache.clear()
+    return added
+
+
+def export_vault_xlsx(xlsx_path=VAULT_FILE) -> int:
+    store = get_store()
+    with storage_seconds.time(op="vault_xlsx_export"):
+        return store.export_xlsx(xlsx_path, _stream_with_pending(store, store.iter_rows()))
+
+
+# -----------------------------------------------------------------
+# Bulk CSV / JSON import and export
+# -----------------------------------------------------------------
+def _dedupe_key(entry: dict) -> tuple:
+    return (str(entry["website"] or "").strip().lower(), str(entry["contact"] or "").strip().lower())
+
+
+def import_entries(stream, fmt: str = "csv", workers: int = IMPORT_WORKERS) -> dict:
+    """Bulk-import a CSV / JSON export (ours, a browser's or a password manager's).
+
+    Rows are deduplicated on website + contact against the vault and each
+    other, encrypted in parallel batches and inserted in one transaction.
+    Returns the number of added, duplicate and invalid rows, and how many
+    added passwords appear in the breach corpus.
+    """
+    store = _write_store()  # pending journal writes are folded in first, so they dedupe too
+    seen = {_dedupe_key(row) for row in store.iter_rows()}
+    stats = {"added": 0, "duplicates": 0, "invalid": 0, "breached": 0}
+    index = open_index(BREACH_INDEX)
+
+    def fresh():
+        for entry in read_records(stream, fmt):
+            if entry is None:
+                stats["invalid"] += 1
+                continue
+            key = _dedupe_key(entry)
+            if key in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(key)
+            if index is not None and index.check_password(entry["password"]):
+                stats["breached"] += 1
+            yield entry
+
+    with vault_crypto.writing():  # the workers encrypt under a snapshot of the primary key
+        batches = encrypt_batches(chunked(fresh(), IMPORT_BATCH_SIZE), vault_crypto.keys()[0],
+                                  vault_crypto.password_hmac().key, workers)
+        stats["added"] = store.add_many(entry for batch in batches for entry in batch)
+    dashboard_stats.incr("vault_entries", stats["added"])
+    _cache.clear()
+    return stats
+
+
+def export_entries(fmt: str = "csv", report: dict = None):
+    """Return a generator of text chunks exporting the vault with decrypted passwords.
+
+    Rows are read from the store in id batches and decrypted one at a
+    time, so memory does not grow with the size of the vault. Entries
+    whose password cannot be decrypted are left out rather than written
+    with a placeholder; report (if given) counts the exported and the
+    undecryptable ones as the export runs, and the latter are logged.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    store = get_store()
+    report = {} if report is None else report
+    report.update(exported=0, undecryptable=0)
+
+    def rows():
+        for row in _stream_with_pending(store, store.iter_rows()):
+            try:
+                row["password"] = decrypt_text(row["password"])
+            except Exception:
+                report["undecryptable"] += 1
+                continue
+            report["exported"] += 1
+            yield row
+        if report["undecryptable"]:
+            log.warning("Vault export left out %d entries whose password could not be decrypted",
+                        report["undecryptable"])
+
+    return WRITERS[fmt](rows())
@@ -0,0 +1,500 @@
+import os
+import time
+import string
+from abc import ABC, abstractmethod
+from pathlib import Path
+from backend.db import connect
+from backend.fileio import save_workbook
+
+VAULT_COLUMNS = ["website", "name", "contact", "password", "category", "date"]
+# keyed digest and entropy estimate of the plaintext password, written next to the ciphertext
+INDEX_COLUMNS = ["pw_hmac", "pw_entropy"]
+ROW_SELECT = "id, uid, website, name, contact, password, category, date, version, pw_hmac, pw_entropy"
+PASSWORD_INDEX_COLUMNS = ["id", "uid", "website", "name", "contact", "category", "date", "password",
+                          "pw_hmac", "pw_entropy"]
+INSERT_SQL = ("INSERT INTO vault (uid, website, name, contact, password, category, date, pw_hmac, pw_entropy) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+# how many metadata changes the change log keeps for changes_since()
+CHANGE_LOG_SIZE = 10_000
+
+# sort key -> ORDER BY clause; every clause is backed by one of the indexes
+SORTS = {
+    "newest": "date DESC, id DESC",
+    "oldest": "date ASC, id ASC",
+    "website": "website ASC, id ASC",
+    "website_desc": "website DESC, id DESC",
+}
+DEFAULT_SORT = "newest"
+# the same orders as (column, descending), for rows that are not in the store yet
+SORT_FIELDS = {
+    "newest": ("date", True),
+    "oldest": ("date", False),
+    "website": ("website", False),
+    "website_desc": ("website", True),
+}
+SEARCH_COLUMNS = ["website", "name", "contact"]
+# LIKE only folds ASCII letters
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+XLSX_HEADER = ["Website", "Name", "Email/Username/Phone", "Password", "Category", "Date"]
+
+
+def new_entry_id() -> str:
+    """A ULID: 48-bit millisecond timestamp + 80 random bits, 26 Crockford base32 chars.
+
+    Ids sort by creation time and can be minted by any process without
+    coordination, so an entry has its id before it reaches the store.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    return "".join(CROCKFORD[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+
+def pending_row(entry: dict) -> dict:
+    """A journaled entry shaped like a store row; it has no row id until it is compacted."""
+    row = {c: entry[c] for c in VAULT_COLUMNS}
+    row.update((c, entry.get(c)) for c in INDEX_COLUMNS)
+    row.update(id=None, uid=entry["uid"], version=1)
+    return row
+
+
+def matches(row: dict, category=None, q=None) -> bool:
+    """query()'s filters applied to one row."""
+    if category and row["category"] != category:
+        return False
+    if q:
+        needle = q.translate(_ASCII_LOWER)
+        return any(needle in (row[c] or "").translate(_ASCII_LOWER) for c in SEARCH_COLUMNS)
+    return True
+
+
+def merge_pending(rows, pending, start: int, offset: int, limit: int, sort=DEFAULT_SORT) -> list[dict]:
+    """Lay pending rows over query() results; returns the page at offset.
+
+    rows is query(start, offset + limit - start, ...) for a start at least
+    len(pending) rows before offset, or 0: that window holds every stored
+    row the page can show. pending (already filtered, in journal order)
+    will get row ids above every stored one, which decides ties the way
+    the ORDER BY will once they are compacted.
+    """
+    field, descending = SORT_FIELDS.get(sort, SORT_FIELDS[DEFAULT_SORT])
+
+    def key(item):
+        value = item[1][field]
+        return value is not None, value or "", item[0]  # NULLs first, like SQLite
+
+    stored = [((0, row["id"]), row) for row in rows]
+    extra = [((1, n), row) for n, row in enumerate(pending)]
+    rank = 0  # position of the window's first row in the merged order
+    if start:
+        if not stored:
+            return []  # the page lies past the end
+        first = key(stored[0])
+        before = [item for item in extra if (key(item) > first) == descending]
+        rank = start + len(before)
+        extra = [item for item in extra if (key(item) > first) != descending]
+    window = sorted(stored + extra, key=key, reverse=descending)
+    return [row for _, row in window[offset - rank:offset - rank + limit]]
+
+
+def _insert_values(entry: dict) -> list:
+    return ([entry.get("uid") or new_entry_id()] + [entry[c] for c in VAULT_COLUMNS]
+            + [entry.get(c) for c in INDEX_COLUMNS])
+
+
+# -----------------------------------------------------------------
+# Storage engine interface
+# -----------------------------------------------------------------
+class VaultStore(ABC):
+    """Interface every vault storage engine implements.
+
+    Entries are plain dicts with VAULT_COLUMNS plus a stable ``uid`` (a
+    ULID, the id callers use), a ``version`` and the engine's internal
+    row ``id``; the ``password`` value is always the ciphertext produced
+    by encrypt_text. Every update bumps the version.
+
+    ``pw_hmac`` / ``pw_entropy`` index the plaintext password without
+    revealing it; writers fill them when they have the plaintext, and rows
+    without them (legacy imports) are backfilled with set_password_index.
+    """
+
+    @abstractmethod
+    def add(self, entry: dict) -> str:
+        """Insert an entry (minting a uid unless it carries one); returns the uid."""
+
+    @abstractmethod
+    def add_many(self, entries) -> int:
+        ...
+
+    @abstractmethod
+    def update(self, uid: str, entry: dict, expected_version=None) -> bool:
+        """Overwrite an entry; with expected_version only if nobody changed it since.
+
+        Returns False when the entry is missing or its version moved on.
+        """
+
+    @abstractmethod
+    def get(self, uid: str):
+        ...
+
+    @abstractmethod
+    def delete(self, uid: str) -> bool:
+        ...
+
+    @abstractmethod
+    def apply_journal(self, records) -> list:
+        """Apply journaled add records in one transaction.
+
+        Records whose seq is not newer than the last applied one are
+        skipped, so replaying a half-finished compaction is harmless.
+        Returns (record, uid) for each record applied.
+        """
+
+    @abstractmethod
+    def all(self) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def iter_rows(self, batch_size: int = 1000):
+        """Yield every entry in id order without loading the whole vault."""
+
+    @abstractmethod
+    def iter_password_index(self, batch_size: int = 5000):
+        """Yield (id, uid, website, name, contact, category, date, password, pw_hmac,
+        pw_entropy) tuples in id order: what a health report reads, without building dicts."""
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    @abstractmethod
+    def transform_passwords(self, fn, batch_size: int = 1000) -> int:
+        """Replace every ciphertext with fn(ciphertext) in one streaming pass and one commit."""
+
+    @abstractmethod
+    def set_password_index(self, updates) -> int:
+        """Store (row id, ciphertext, pw_hmac, pw_entropy) tuples in one transaction.
+
+        A row is only touched while it still holds that ciphertext, so an
+        index computed from a stale read never overwrites a newer password's.
+        """
+
+    @abstractmethod
+    def query(self, offset: int, limit: int, category=None, q=None, sort=DEFAULT_SORT):
+        """Return (rows, total) for one page of entries matching the filters."""
+
+    @abstractmethod
+    def signature(self):
+        """Cheap value that changes whenever the underlying files change."""
+
+    @abstractmethod
+    def snapshot(self, read):
+        """Run read() against one consistent view of the store; returns
+        (its result, seq of the last journal record folded into that view)."""
+
+    @abstractmethod
+    def change_seq(self) -> int:
+        """Seq of the newest metadata change (add, edit or delete) by any process."""
+
+    @abstractmethod
+    def changes_since(self, seq: int):
+        """(newest change seq, {uid: row, or None if deleted}) for every entry whose
+        metadata changed after seq; None once the change log no longer reaches back to seq."""
+
+    @abstractmethod
+    def get_meta(self, key: str):
+        ...
+
+    @abstractmethod
+    def set_meta(self, key: str, value: str):
+        ...
+
+    # xlsx is kept only as an import/export format
+    def import_xlsx(self, xlsx_path: Path) -> int:
+        from openpyxl import load_workbook
+        wb = load_workbook(xlsx_path, read_only=True)
+        ws = wb.active
+        rows = (
+            dict(zip(VAULT_COLUMNS, ("" if v is None else str(v) for v in row[:6])))
+            for row in ws.iter_rows(min_row=2, values_only=True)
+            if row and row[0]
+        )
+        added = self.add_many(rows)
+        wb.close()
+        return added
+
+    def export_xlsx(self, xlsx_path: Path, rows=None) -> int:
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Vault")
+        ws.append(XLSX_HEADER)
+        exported = 0
+        for entry in self.iter_rows() if rows is None else rows:
+            ws.append([entry[c] for c in VAULT_COLUMNS])
+            exported += 1
+        save_workbook(wb, xlsx_path)
+        return exported
+
+
+# -----------------------------------------------------------------
+# SQLite engine
+# -----------------------------------------------------------------
+class SQLiteVaultStore(VaultStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS vault (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            uid TEXT,
+            website TEXT NOT NULL,
+            name TEXT,
+            contact TEXT,
+            password TEXT NOT NULL,
+            category TEXT,
+            date TEXT,
+            version INTEGER NOT NULL DEFAULT 1,
+            pw_hmac TEXT,
+            pw_entropy REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_vault_website ON vault(website);
+        CREATE INDEX IF NOT EXISTS idx_vault_category ON vault(category);
+        CREATE INDEX IF NOT EXISTS idx_vault_date ON vault(date);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+    # every add, metadata edit and delete is logged by trigger, so writes made by
+    # any process (or folded in by its compactor) can be replayed onto a cache
+    CHANGES_SCHEMA = f"""
+        CREATE TABLE IF NOT EXISTS vault_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            uid TEXT NOT NULL
+        );
+        CREATE TRIGGER IF NOT EXISTS vault_changes_add AFTER INSERT ON vault BEGIN
+            INSERT INTO vault_changes (uid) VALUES (NEW.uid);
+        END;
+        CREATE TRIGGER IF NOT EXISTS vault_changes_edit
+        AFTER UPDATE OF website, name, contact, category, date ON vault BEGIN
+            INSERT INTO vault_changes (uid) VALUES (NEW.uid);
+        END;
+        CREATE TRIGGER IF NOT EXISTS vault_changes_delete AFTER DELETE ON vault BEGIN
+            INSERT INTO vault_changes (uid) VALUES (OLD.uid);
+        END;
+        CREATE TRIGGER IF NOT EXISTS vault_changes_trim AFTER INSERT ON vault_changes BEGIN
+            DELETE FROM vault_changes WHERE seq <= NEW.seq - {CHANGE_LOG_SIZE};
+        END;
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(vault)")}
+        with conn:
+            if "version" not in columns:
+                conn.execute("ALTER TABLE vault ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+            if "uid" not in columns:
+                conn.execute("ALTER TABLE vault ADD COLUMN uid TEXT")
+                rows = conn.execute("SELECT id FROM vault ORDER BY id").fetchall()
+                conn.executemany("UPDATE vault SET uid = ? WHERE id = ?",
+                                 [(new_entry_id(), row[0]) for row in rows])
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_vault_uid ON vault(uid)")
+            if "pw_hmac" not in columns:
+                # left NULL here: filling them needs the vault key, see set_password_index
+                conn.execute("ALTER TABLE vault ADD COLUMN pw_hmac TEXT")
+                conn.execute("ALTER TABLE vault ADD COLUMN pw_entropy REAL")
+        conn.executescript(self.CHANGES_SCHEMA)
+
+    def _conn(self):
+        return connect(self.db_path)
+
+    def add(self, entry: dict) -> str:
+        values = _insert_values(entry)
+        with self._conn() as conn:
+            conn.execute(INSERT_SQL, values)
+        return values[0]
+
+    def add_many(self, entries) -> int:
+        with self._conn() as conn:
+            cur = conn.executemany(INSERT_SQL, (_insert_values(entry) for entry in entries))
+        return cur.rowcount
+
+    def update(self, uid: str, entry: dict, expected_version=None) -> bool:
+        sql = ("UPDATE vault SET website = ?, name = ?, contact = ?, password = ?, "
+               "category = ?, date = ?, pw_hmac = ?, pw_entropy = ?, version = version + 1 WHERE uid = ?")
+        params = [entry[c] for c in VAULT_COLUMNS] + [entry.get(c) for c in INDEX_COLUMNS] + [uid]
+        if expected_version is not None:
+            # compare-and-swap: a single statement, so it is atomic across processes
+            sql += " AND version = ?"
+            params.append(expected_version)
+        with self._conn() as conn:
+            cur = conn.execute(sql, params)
+        return cur.rowcount == 1
+
+    def apply_journal(self, records) -> list:
+        applied = []
+        with self._conn() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'journal_seq'").fetchone()
+            last_seq = int(row[0]) if row else 0
+            for record in records:
+                if record["seq"] <= last_seq:
+                    continue
+                if record["op"] == "add":
+                    values = _insert_values(record["entry"])
+                    conn.execute(INSERT_SQL, values)
+                    applied.append((record, values[0]))
+                last_seq = record["seq"]
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('journal_seq', ?)", (str(last_seq),)
+            )
+        return applied
+
+    def get(self, uid: str):
+        row = self._conn().execute(f"SELECT {ROW_SELECT} FROM vault WHERE uid = ?", (uid,)).fetchone()
+        return dict(row) if row else None
+
+    def delete(self, uid: str) -> bool:
+        with self._conn() as conn:
+            cur = conn.execute("DELETE FROM vault WHERE uid = ?", (uid,))
+        return cur.rowcount == 1
+
+    def all(self) -> list[dict]:
+        rows = self._conn().execute(
+            f"SELECT {ROW_SELECT} FROM vault ORDER BY id"
+        )
+        return [dict(row) for row in rows]
+
+    def iter_rows(self, batch_size: int = 1000):
+        last_id = 0
+        while True:
+            batch = self._conn().execute(
+                f"SELECT {ROW_SELECT} FROM vault WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size),
+            ).fetchall()
+            if not batch:
+                return
+            yield from (dict(row) for row in batch)
+            last_id = batch[-1]["id"]
+
+    def iter_password_index(self, batch_size: int = 5000):
+        last_id = 0
+        while True:
+            batch = self._conn().execute(
+                f"SELECT {', '.join(PASSWORD_INDEX_COLUMNS)} FROM vault WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size),
+            ).fetchall()
+            if not batch:
+                return
+            yield from batch
+            last_id = batch[-1][0]
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT count(*) FROM vault").fetchone()[0]
+
+    def transform_passwords(self, fn, batch_size: int = 1000) -> int:
+        changed = 0
+        last_id = 0
+        with self._conn() as conn:
+            while True:
+                batch = conn.execute(
+                    "SELECT id, password FROM vault WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size),
+                ).fetchall()
+                if not batch:
+                    break
+                conn.executemany(
+                    "UPDATE vault SET password = ? WHERE id = ?",
+                    [(fn(row["password"]), row["id"]) for row in batch],
+                )
+                changed += len(batch)
+                last_id = batch[-1]["id"]
+        return changed
+
+    def set_password_index(self, updates) -> int:
+        with self._conn() as conn:
+            cur = conn.executemany(
+                "UPDATE vault SET pw_hmac = ?, pw_entropy = ? WHERE id = ? AND password = ?",
+                ((pw_hmac, entropy, row_id, ciphertext) for row_id, ciphertext, pw_hmac, entropy in updates),
+            )
+        return cur.rowcount
+
+    def query(self, offset: int, limit: int, category=None, q=None, sort=DEFAULT_SORT):
+        where, params = [], []
+        if category:
+            where.append("category = ?")
+            params.append(category)
+        if q:
+            like = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            where.append("(website LIKE ? ESCAPE '\\' OR name LIKE ? ESCAPE '\\' OR contact LIKE ? ESCAPE '\\')")
+            params.extend([like, like, like])
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        order = SORTS.get(sort, SORTS[DEFAULT_SORT])
+
+        conn = self._conn()
+        total = conn.execute(f"SELECT count(*) FROM vault{clause}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {ROW_SELECT} FROM vault{clause} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        )
+        return [dict(row) for row in rows], total
+
+    def signature(self):
+        sig = []
+        for path in (self.db_path, self.db_path.with_name(self.db_path.name + "-wal")):
+            try:
+                st = path.stat()
+                sig.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                sig.append(None)
+        return tuple(sig)
+
+    def snapshot(self, read):
+        conn = self._conn()
+        conn.execute("BEGIN")  # one read transaction: every statement below sees the same state
+        try:
+            result = read()
+            row = conn.execute("SELECT value FROM meta WHERE key = 'journal_seq'").fetchone()
+        finally:
+            conn.rollback()
+        return result, int(row[0]) if row else 0
+
+    def change_seq(self) -> int:
+        row = self._conn().execute("SELECT max(seq) FROM vault_changes").fetchone()
+        return row[0] or 0
+
+    def changes_since(self, seq: int):
+        if self.change_seq() < seq:
+            return None  # a different database took this one's place
+        columns = ", ".join(f"v.{c}" for c in ROW_SELECT.split(", "))
+        # one statement, so the log and the rows come from the same snapshot
+        rows = self._conn().execute(
+            f"SELECT c.seq AS change_seq, c.uid AS change_uid, {columns} "
+            "FROM vault_changes c LEFT JOIN vault v ON v.uid = c.uid WHERE c.seq > ? ORDER BY c.seq",
+            (seq,),
+        ).fetchall()
+        if rows and rows[0]["change_seq"] != seq + 1:
+            return None  # trimmed past seq
+        changes = {}
+        for row in rows:
+            entry = dict(row)
+            uid = entry.pop("change_uid")
+            del entry["change_seq"]
+            changes[uid] = entry if entry["uid"] is not None else None
+        return (rows[-1]["change_seq"] if rows else seq), changes
+
+    def get_meta(self, key: str):
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+ENGINES = {
+    "sqlite": SQLiteVaultStore,
+}
+
+
+def open_store(engine: str, db_path: Path) -> VaultStore:
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown vault storage engine: {engine}")
+    return ENGINES[engine](db_path)
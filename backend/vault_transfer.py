@@ -0,0 +1,217 @@
+import csv
+import io
+import json
+from itertools import chain, islice
+from collections import deque
+from datetime import datetime
+from backend.password_health import PasswordHmac, estimate_entropy
+
+FORMATS = ("csv", "json")
+CATEGORIES = ["Social", "Work", "Finance", "Entertainment", "Other"]
+EXPORT_COLUMNS = ["website", "name", "contact", "password", "category", "date"]
+
+# lower-cased header -> vault column; covers Chrome / Edge, Firefox, Bitwarden,
+# KeePass and 1Password CSV exports as well as our own export and xlsx header
+COLUMN_ALIASES = {
+    "website": "website", "url": "website", "login_uri": "website", "uri": "website",
+    "origin": "website", "hostname": "website", "web site": "website",
+    "name": "name", "title": "name",
+    "contact": "contact", "username": "contact", "login_username": "contact", "user name": "contact",
+    "email": "contact", "login": "contact", "email/username/phone": "contact",
+    "password": "password", "login_password": "password",
+    "category": "category", "folder": "category", "group": "category",
+    "date": "date",
+}
+
+
+# -----------------------------------------------------------------
+# Reading
+# -----------------------------------------------------------------
+def detect_format(file_name: str, default: str = "csv") -> str:
+    suffix = str(file_name or "").rsplit(".", 1)[-1].lower()
+    if suffix in ("json", "jsonl", "ndjson"):
+        return "json"
+    return "csv" if suffix == "csv" else default
+
+
+def normalize(record: dict):
+    """Map one exported row onto vault columns; None if it has no website or password."""
+    entry = {}
+    for key, value in record.items():
+        column = COLUMN_ALIASES.get(str(key or "").strip().lower())
+        if column and value not in (None, "") and column not in entry:
+            entry[column] = str(value).strip()
+
+    if not entry.get("website") or not entry.get("password"):
+        return None
+    entry.setdefault("name", entry["website"])
+    entry.setdefault("contact", "")
+    if entry.get("category") not in CATEGORIES:
+        entry["category"] = "Other"
+    entry.setdefault("date", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    return entry
+
+
+def _flatten(item: dict) -> dict:
+    """Bitwarden JSON nests credentials under "login" and URLs under "uris"."""
+    login = item.get("login")
+    if not isinstance(login, dict):
+        return item
+    flat = {"name": item.get("name"), "folder": item.get("folder")}
+    flat.update({k: v for k, v in login.items() if k != "uris"})
+    uris = login.get("uris") or []
+    if uris and isinstance(uris[0], dict):
+        flat["uri"] = uris[0].get("uri")
+    return flat
+
+
+def read_csv(stream):
+    """Yield raw rows of a CSV text stream, one at a time."""
+    yield from csv.DictReader(stream)
+
+
+def read_json(stream):
+    """Yield raw records of a JSON export.
+
+    JSON Lines (one object per line, what export writes) is streamed; a
+    single JSON document (a list, or Bitwarden's {"items": [...]}) has to
+    be parsed whole.
+    """
+    first = stream.read(1)
+    while first and first.isspace():
+        first = stream.read(1)
+    if first == "[" or (first == "{" and _is_document(stream)):
+        data = json.loads(first + stream.read())
+        items = data.get("items", []) if isinstance(data, dict) else data
+        for item in items:
+            if isinstance(item, dict):
+                yield _flatten(item)
+        return
+
+    pending = first
+    for line in stream:
+        line = (pending + line).strip()
+        pending = ""
+        if not line:
+            continue
+        record = json.loads(line)
+        if isinstance(record.get("items"), list):
+            # a whole Bitwarden export written on one line
+            yield from (_flatten(item) for item in record["items"] if isinstance(item, dict))
+        else:
+            yield _flatten(record)
+
+
+def _is_document(stream) -> bool:
+    # a first line that is not a complete object means a multi-line document
+    position = stream.tell() if stream.seekable() else None
+    line = stream.readline()
+    if position is None:
+        raise ValueError("Cannot tell JSON Lines from a JSON document on a non-seekable stream")
+    stream.seek(position)
+    try:
+        json.loads("{" + line)
+        return False
+    except ValueError:
+        return True
+
+
+def read_records(stream, fmt: str):
+    """Yield normalized (plaintext) entries and None for rows that cannot be imported."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+    reader = read_csv if fmt == "csv" else read_json
+    for record in reader(stream):
+        yield normalize(record)
+
+
+# -----------------------------------------------------------------
+# Parallel encryption
+# -----------------------------------------------------------------
+_worker_cipher = None
+_worker_hmac = None
+
+
+def _init_worker(key: bytes, hmac_key: bytes):
+    from cryptography.fernet import Fernet
+    global _worker_cipher, _worker_hmac
+    _worker_cipher = Fernet(key)
+    _worker_hmac = PasswordHmac(hmac_key)
+
+
+def _encrypt_batch(entries: list[dict]) -> list[dict]:
+    """Encrypt each password, indexing the plaintext (pw_hmac, pw_entropy) on the way."""
+    for entry in entries:
+        password = entry["password"]
+        entry["pw_hmac"] = _worker_hmac.digest(password)
+        entry["pw_entropy"] = estimate_entropy(password)
+        entry["password"] = _worker_cipher.encrypt(password.encode("utf-8")).decode("utf-8")
+    return entries
+
+
+def chunked(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def encrypt_batches(batches, key: bytes, hmac_key: bytes, workers: int):
+    """Yield the batches with their passwords encrypted under key (and digested
+    under hmac_key), in order.
+
+    With more than one worker the batches are spread over a process pool
+    (Fernet work holds the GIL, so threads would not help); at most two
+    batches per worker are in flight, so memory stays bounded however
+    large the input is. Inputs of a single batch skip the pool start-up.
+    """
+    batches = iter(batches)
+    head = list(islice(batches, 2))
+    if workers <= 1 or len(head) < 2:
+        _init_worker(key, hmac_key)
+        for batch in head:
+            yield _encrypt_batch(batch)
+        for batch in batches:
+            yield _encrypt_batch(batch)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(key, hmac_key)) as pool:
+        in_flight = deque()
+        for batch in chain(head, batches):
+            in_flight.append(pool.submit(_encrypt_batch, batch))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+# -----------------------------------------------------------------
+# Writing
+# -----------------------------------------------------------------
+def write_csv(entries, flush_every: int = 500):
+    """Yield CSV text chunks for entries with plaintext passwords."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for i, entry in enumerate(entries, 1):
+        writer.writerow([entry.get(c, "") for c in EXPORT_COLUMNS])
+        if i % flush_every == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_json(entries, flush_every: int = 500):
+    """Yield JSON Lines chunks, one object per entry."""
+    lines = []
+    for entry in entries:
+        lines.append(json.dumps({c: entry.get(c, "") for c in EXPORT_COLUMNS}, ensure_ascii=False))
+        if len(lines) >= flush_every:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+WRITERS = {"csv": write_csv, "json": write_json}
@@ -0,0 +1,66 @@
+"""Compare SearchIndex lookups with a linear scan over vault metadata.
+
+Run from the project root:  python -m benchmarks.bench_search [sizes...]
+"""
+import random
+import string
+import sys
+import time
+from backend.search_index import SearchIndex, INDEXED_FIELDS
+
+WORDS = ["github", "google", "amazon", "netflix", "spotify", "bank", "mail", "cloud",
+         "shop", "forum", "school", "office", "games", "travel", "health", "news"]
+CATEGORIES = ["Social", "Work", "Finance", "Entertainment", "Other"]
+
+
+def synthetic_entries(n: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    entries = []
+    for i in range(n):
+        word = rng.choice(WORDS)
+        suffix = "".join(rng.choices(string.ascii_lowercase, k=5))
+        entries.append({
+            "id": i + 1,
+            "website": f"https://{word}{suffix}.com",
+            "name": f"{word.title()} {suffix}",
+            "contact": f"user{rng.randrange(10_000)}@{word}.com",
+            "category": rng.choice(CATEGORIES),
+            "date": "2025-01-01 00:00:00",
+        })
+    return entries
+
+
+def linear_scan(entries, q, limit=20):
+    q = q.lower()
+    hits = []
+    for entry in entries:
+        if any(q in str(entry[f]).lower() for f in INDEXED_FIELDS):
+            hits.append(entry)
+            if len(hits) >= limit:
+                break
+    return hits
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main(sizes):
+    for n in sizes:
+        entries = synthetic_entries(n)
+        index = SearchIndex()
+        build_ms = timed(lambda: index.build(entries), 1)
+        probe = entries[n // 2]["name"].split()[1]
+        queries = {"prefix": probe[:3], "exact": probe, "typo": "netflx", "miss": "zzzzzz"}
+        print(f"n={n:>7}  build={build_ms:8.1f} ms")
+        for label, q in queries.items():
+            idx = timed(lambda: index.search(q), 50)
+            scan = timed(lambda: linear_scan(entries, q), 5)
+            print(f"    {label:6s} q={q!r:10s} index={idx:8.3f} ms  scan={scan:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000])
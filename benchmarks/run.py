@@ -0,0 +1,361 @@
+"""Benchmark the vault, notes, crypto and login hot paths on synthetic data.
+
+Everything runs against a throw-away data directory (SECUREME_DATA_DIR is
+pointed at a temp dir before any backend module is imported), so the real
+data/ folder is never touched.
+
+    python -m benchmarks.run --quick --out before.json
+    python -m benchmarks.run --out after.json
+    python -m benchmarks.run --compare before.json after.json --threshold 15
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+QUICK = {"vault_sizes": [100, 1_000], "note_counts": [10, 50], "file_sizes": [1 << 10, 1 << 20],
+         "tree_sizes": [100], "breach_sizes": [100_000]}
+FULL = {
+    "vault_sizes": [100, 1_000, 10_000, 100_000],
+    "note_counts": [10, 100, 1_000],
+    "file_sizes": [1 << 10, 1 << 20, 10 << 20, 100 << 20],
+    "tree_sizes": [100, 1_000, 10_000],
+    "breach_sizes": [1_000_000, 10_000_000],
+}
+CATEGORIES = ["Social", "Work", "Finance", "Entertainment", "Other"]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def human(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size}{unit}"
+        size //= 1024
+    return f"{size}TB"
+
+
+class Recorder:
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.results = {}
+
+    def measure(self, name: str, fn, repeat: int = 20, setup=None):
+        """Run fn repeat times (or until the time budget is spent) and record latency stats.
+
+        setup(i), when given, runs untimed before every call.
+        """
+        samples = []
+        started = time.perf_counter()
+        for i in range(repeat):
+            if setup:
+                setup(i)
+            t0 = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - t0)
+            if time.perf_counter() - started > self.budget and len(samples) >= 3:
+                break
+
+        samples_ms = sorted(s * 1000 for s in samples)
+        if len(samples_ms) > 1:
+            cuts = statistics.quantiles(samples_ms, n=100, method="inclusive")
+            p50, p95 = cuts[49], cuts[94]
+        else:
+            p50 = p95 = samples_ms[0]
+        mean = statistics.fmean(samples_ms)
+        self.results[name] = {
+            "n": len(samples_ms),
+            "p50_ms": round(p50, 4),
+            "p95_ms": round(p95, 4),
+            "mean_ms": round(mean, 4),
+            "ops_per_s": round(1000 / mean, 2) if mean else None,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        r = self.results[name]
+        print(f"  {name:45s} p50={r['p50_ms']:10.3f} ms  p95={r['p95_ms']:10.3f} ms  "
+              f"{r['ops_per_s'] or 0:10.1f} op/s  rss={r['peak_rss_mb']} MB", flush=True)
+
+
+# -----------------------------------------------------------------
+# Scenarios
+# -----------------------------------------------------------------
+def bench_vault(rec: Recorder, sizes, client):
+    from backend import vault_manager as vm
+    from backend.encryption_utils import encrypt_text
+
+    store = vm.get_store()
+    for size in sizes:
+        missing = size - store.count()
+        if missing > 0:
+            base = store.count()
+            store.add_many({
+                "website": f"https://site{base + i}.example.com",
+                "name": f"Account {base + i}",
+                "contact": f"user{base + i}@example.com",
+                "password": encrypt_text(f"pw-{base + i}"),
+                "category": CATEGORIES[(base + i) % len(CATEGORIES)],
+                "date": "2025-01-01 00:00:00",
+            } for i in range(missing))
+            vm.clear_vault_cache()
+            vm.build_search_index()
+
+        print(f"vault n={size}")
+        tag = f"@{size}"
+        uid = next(store.iter_rows(batch_size=1))["uid"]
+        rec.measure(f"vault.save_entry{tag}",
+                    lambda: vm.save_entry("https://bench.example.com", "Bench", "b@example.com", "pw", "Work"))
+        rec.measure(f"vault.update_entry{tag}",
+                    lambda: vm.update_entry(uid, "https://bench.example.com", "Bench", "b", "pw2", "Work"))
+        rec.measure(f"vault.count_vault_entries{tag}", vm.count_vault_entries)
+        rec.measure(f"vault.list_entries.cold{tag}", lambda: vm.list_entries(),
+                    repeat=5, setup=lambda i: vm.clear_vault_cache())
+        rec.measure(f"vault.list_entries.metadata{tag}", lambda: vm.list_entries(decrypt=False),
+                    repeat=5, setup=lambda i: vm.clear_vault_cache())
+        rec.measure(f"vault.list_entries_page{tag}", lambda: vm.list_entries_page(page=2, q="site1"),
+                    setup=lambda i: vm.clear_vault_cache())
+        rec.measure(f"vault.search{tag}", lambda: vm.search_entries("site12"))
+        # another worker's write lands first: the index replays the change log instead of rebuilding
+        rec.measure(f"vault.search.after_outside_write{tag}", lambda: vm.search_entries("site12"),
+                    setup=lambda i: store.add({
+                        "website": f"https://outside{i}.example.com", "name": "Outside", "contact": "",
+                        "password": encrypt_text("pw"), "category": "Work", "date": "2025-01-01 00:00:00",
+                    }))
+        rec.measure(f"vault.reindex_passwords{tag}", vm.reindex_passwords, repeat=1)
+        rec.measure(f"vault.health{tag}", lambda: vm.vault_health(),
+                    repeat=5, setup=lambda i: vm.clear_vault_cache())
+        rec.measure(f"route.GET /vault{tag}", lambda: client.get("/vault?page=3"),
+                    setup=lambda i: vm.clear_vault_cache())
+        rec.measure(f"route.GET /vault/reveal{tag}", lambda: client.get(f"/vault/reveal/{uid}"))
+        rec.measure(f"route.GET /dashboard{tag}", lambda: client.get("/dashboard"))
+
+
+def bench_notes(rec: Recorder, counts, client):
+    from backend import notes_manager as nm
+
+    keys = {}
+    for count in counts:
+        while nm.count_notes() < count:
+            name, key = nm.save_note(f"Note {nm.count_notes()}", "lorem ipsum " * 200)
+            keys[name] = key
+
+        print(f"notes n={count}")
+        tag = f"@{count}"
+        name, key = next(iter(keys.items()))
+        rec.measure(f"notes.save_note{tag}", lambda: nm.save_note("Bench", "lorem ipsum " * 200), repeat=10)
+        rec.measure(f"route.POST /notes/new{tag}",
+                    lambda: client.post("/notes/new", data={"title": "Bench", "content": "lorem ipsum " * 200}),
+                    repeat=10, setup=lambda i: nm.drain_note_jobs())
+        nm.drain_note_jobs()
+        rec.measure(f"notes.load_note_content{tag}", lambda: nm.load_note_content(name, key))
+        rec.measure(f"notes.list_notes{tag}", nm.list_notes)
+        rec.measure(f"notes.count_notes{tag}", nm.count_notes)
+        rec.measure(f"route.GET /notes{tag}", lambda: client.get("/notes"))
+
+
+def bench_crypto(rec: Recorder, file_sizes, workdir: Path):
+    from backend.encryption_utils import encrypt_file, decrypt_file, encrypt_text, decrypt_text
+
+    print("crypto")
+    token = encrypt_text("correct horse battery staple")
+    rec.measure("crypto.encrypt_text", lambda: encrypt_text("correct horse battery staple"), repeat=200)
+    rec.measure("crypto.decrypt_text", lambda: decrypt_text(token), repeat=200)
+
+    chunk = os.urandom(1 << 20)
+    for size in file_sizes:
+        path = workdir / f"blob_{size}.bin"
+        with open(path, "wb") as f:
+            remaining = size
+            while remaining > 0:
+                f.write(chunk[:min(remaining, len(chunk))])
+                remaining -= len(chunk)
+        repeat = 10 if size <= 10 << 20 else 3
+        tag = f"@{human(size)}"
+        # each timed call flips the file, so the untimed setup flips it back
+        rec.measure(f"crypto.encrypt_file{tag}", lambda: encrypt_file(path, "k3yK3y"), repeat=repeat,
+                    setup=lambda i: i and decrypt_file(path, "k3yK3y"))
+        rec.measure(f"crypto.decrypt_file{tag}", lambda: decrypt_file(path, "k3yK3y"), repeat=repeat,
+                    setup=lambda i: i and encrypt_file(path, "k3yK3y"))
+        path.unlink()
+
+
+def bench_folders(rec: Recorder, tree_sizes, workdir: Path):
+    from backend.folder_locker import ChmodBackend, PosixBackend
+
+    print("folders")
+    folder = workdir / "lock_me"
+    folder.mkdir()
+    subprocess_backend, native = ChmodBackend(), PosixBackend(recursive=False)
+    for name, backend in (("subprocess_chmod", subprocess_backend), ("posix", native)):
+        rec.measure(f"folders.lock+unlock.{name}",
+                    lambda: (backend.lock(str(folder)), backend.unlock(str(folder))), repeat=50)
+
+    recursive = PosixBackend(recursive=True)
+    for size in tree_sizes:
+        tree = workdir / f"tree_{size}"
+        for i in range(size):
+            (tree / f"d{i // 100}").mkdir(parents=True, exist_ok=True)
+            (tree / f"d{i // 100}" / f"f{i}").touch()
+        rec.measure(f"folders.lock+unlock.posix_recursive@{size}",
+                    lambda: (recursive.lock(str(tree)), recursive.unlock(str(tree))), repeat=10)
+        shutil.rmtree(tree)
+
+
+def bench_breach(rec: Recorder, sizes, workdir: Path):
+    import random
+    from backend.breach_check import build_index, BreachIndex
+
+    print("breach")
+    for size in sizes:
+        path = workdir / f"breach_{size}.idx"
+        known = [os.urandom(20) for _ in range(1000)]
+
+        def dump():
+            for i in range(size):
+                digest = known[i] if i < len(known) else os.urandom(20)
+                yield digest.hex().upper().encode() + b":" + str(i % 1000 + 1).encode() + b"\n"
+
+        tag = f"@{size}"
+        rec.measure(f"breach.build_index{tag}", lambda: build_index(dump(), path), repeat=1)
+        index = BreachIndex(path)
+        rec.measure(f"breach.lookup_hit{tag}", lambda: index.lookup(random.choice(known)), repeat=2000)
+        rec.measure(f"breach.lookup_miss{tag}", lambda: index.lookup(os.urandom(20)), repeat=2000)
+        rec.measure(f"breach.check_password{tag}", lambda: index.check_password("correct horse"), repeat=2000)
+        index.close()
+        path.unlink()
+
+
+def bench_startup(rec: Recorder):
+    print("startup")
+    root = Path(__file__).resolve().parent.parent
+    for code in ("import app", "import app; import backend.vault_manager"):
+        rec.measure(f"startup.{code}", lambda: subprocess.run([sys.executable, "-c", code], cwd=root, check=True),
+                    repeat=5)
+
+
+def bench_login(rec: Recorder, app):
+    from itertools import count
+    from backend.login_manager import verify_master_passkey, attempt_login
+
+    print("login")
+    rec.measure("login.verify_master_passkey", lambda: verify_master_passkey("bench-pass"), repeat=10)
+    # a fresh client and address per call, so neither the session fast path nor the throttle kicks in
+    addresses = (f"10.0.{i // 250}.{i % 250}" for i in count())
+    rec.measure("route.POST /login", lambda: app.test_client().post(
+        "/login", data={"pass": "bench-pass"}, environ_base={"REMOTE_ADDR": next(addresses)}), repeat=10)
+    for _ in range(2):
+        attempt_login("wrong", "bench-throttled")
+    rec.measure("login.attempt_login.throttled", lambda: attempt_login("wrong", "bench-throttled"), repeat=10)
+
+
+def run(preset: dict, budget: float) -> dict:
+    tmp = Path(tempfile.mkdtemp(prefix="secureme-bench-"))
+    os.environ["SECUREME_DATA_DIR"] = str(tmp / "data")
+    os.environ.setdefault("SECRET_KEY", "bench")
+    try:
+        from app import app
+        from backend.login_manager import create_master_passkey
+
+        create_master_passkey("bench-pass")
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["authenticated"] = True
+
+        rec = Recorder(budget)
+        bench_startup(rec)
+        bench_crypto(rec, preset["file_sizes"], tmp)
+        bench_folders(rec, preset["tree_sizes"], tmp)
+        bench_breach(rec, preset["breach_sizes"], tmp)
+        bench_login(rec, app)
+        bench_notes(rec, preset["note_counts"], client)
+        bench_vault(rec, preset["vault_sizes"], client)
+        return rec.results
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# -----------------------------------------------------------------
+# Comparison
+# -----------------------------------------------------------------
+def compare(base_file: str, new_file: str, threshold: float) -> int:
+    base = json.loads(Path(base_file).read_text())
+    new = json.loads(Path(new_file).read_text())
+    print(f"{base['meta']['commit']} -> {new['meta']['commit']}  (regression threshold {threshold}%)")
+    regressions = 0
+    for name in sorted(set(base["results"]) | set(new["results"])):
+        old, cur = base["results"].get(name), new["results"].get(name)
+        if not old or not cur:
+            print(f"  {name:45s} {'only in ' + ('new' if cur else 'base'):>30s}")
+            continue
+        change = (cur["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  improved"
+        print(f"  {name:45s} {old['p50_ms']:10.3f} -> {cur['p50_ms']:10.3f} ms  {change:+7.1f}%{flag}")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="small sizes only (seconds, not minutes)")
+    parser.add_argument("--vault-sizes", type=int, nargs="+", help="override vault entry counts")
+    parser.add_argument("--note-counts", type=int, nargs="+", help="override note counts")
+    parser.add_argument("--file-sizes", type=int, nargs="+", help="override file sizes in bytes")
+    parser.add_argument("--tree-sizes", type=int, nargs="+", help="override recursive lock tree sizes")
+    parser.add_argument("--breach-sizes", type=int, nargs="+", help="override breach index sizes (hashes)")
+    parser.add_argument("--budget", type=float, default=5.0, help="max seconds per measurement")
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=10.0, help="p50 regression threshold in percent")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+
+    preset = dict(QUICK if args.quick else FULL)
+    for key in ("vault_sizes", "note_counts", "file_sizes", "tree_sizes", "breach_sizes"):
+        if getattr(args, key):
+            preset[key] = getattr(args, key)
+
+    results = run(preset, args.budget)
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "preset": preset,
+        },
+        "results": results,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f"wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+from flask import (
+    Blueprint, current_app, render_template, request, redirect, url_for, flash, session, jsonify,
+)
+from backend.login_manager import (
+    is_master_set,
+    create_master_passkey,
+    attempt_login,
+    login_stats,
+    login_required,
+)
+from backend.lazy import LazyModule
+from backend.stats_service import stats as dashboard_stats
+
+bp = Blueprint("auth", __name__)
+vault = LazyModule("backend.vault_manager")
+
+
+# ---------------------------
+# Inject global master key flag
+# ---------------------------
+@bp.app_context_processor
+def inject_master_flag():
+    return {"master_set": is_master_set()}
+
+
+# ---------------------------
+# Landing page
+# ---------------------------
+@bp.route("/", endpoint="Landing")
+def Landing():
+    return render_template("Landing.html")
+
+
+# ---------------------------
+# Setup master key
+# ---------------------------
+@bp.route("/setup", methods=["GET", "POST"], endpoint="CreatePasskey")
+def CreatePasskey():
+    if is_master_set():
+        flash("Master passkey already created — please login.")
+        return redirect(url_for("auth.Login"))
+
+    if request.method == "POST":
+        p1 = request.form.get("pass1", "")
+        p2 = request.form.get("pass2", "")
+        if not p1 or p1 != p2:
+            flash("Passkeys empty or do not match.")
+            return redirect(url_for("auth.CreatePasskey"))
+
+        create_master_passkey(p1)
+        flash("Master passkey created. Please log in.")
+        return redirect(url_for("auth.Login"))
+
+    return render_template("CreatePasskey.html")
+
+
+# ---------------------------
+# Login
+# ---------------------------
+@bp.route("/login", methods=["GET", "POST"], endpoint="Login")
+def Login():
+    if session.get("authenticated"):
+        # already verified: no need to spend a key derivation on it again
+        return redirect(url_for("auth.dashboard"))
+    if request.method == "POST":
+        passphrase = request.form.get("pass", "")
+        ok, msg, retry_after = attempt_login(passphrase, request.remote_addr or "unknown")
+        flash(msg)
+        if ok:
+            session.clear()
+            session["authenticated"] = True
+            return redirect(url_for("auth.dashboard"))
+        if retry_after:
+            response = current_app.make_response((render_template("Login.html"), 429))
+            response.headers["Retry-After"] = str(int(retry_after) + 1)
+            return response
+        return redirect(url_for("auth.Login"))
+    return render_template("Login.html")
+
+
+# ---------------------------
+# Logout
+# ---------------------------
+@bp.route("/logout", endpoint="Logout")
+def Logout():
+    session.clear()
+    if vault.loaded:
+        vault.clear_vault_cache()
+    flash("Logged out.")
+    return redirect(url_for("auth.Landing"))
+
+
+# ---------------------------
+# Dashboard
+# ---------------------------
+@bp.route("/dashboard")
+@login_required
+def dashboard():
+    return render_template("Dashboard.html", stats=dashboard_stats.snapshot())
+
+
+@bp.route("/api/stats", methods=["GET"], endpoint="ApiStats")
+@login_required
+def ApiStats():
+    """The dashboard counters as JSON."""
+    return jsonify(dict(dashboard_stats.snapshot(), rebuilt=dashboard_stats.rebuilt, login=login_stats()))
@@ -0,0 +1,61 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from backend.login_manager import login_required
+from backend.lazy import LazyModule
+from backend.stats_service import stats as dashboard_stats
+
+bp = Blueprint("folders", __name__)
+folders = LazyModule("backend.folder_locker")
+dashboard_stats.register_module("locked_folders", "backend.folder_locker")
+
+
+# ---------------------------
+# Folder Locker
+# ---------------------------
+@bp.route("/folder-locker", methods=["GET", "POST"], endpoint="FolderLocker")
+@login_required
+def FolderLocker():
+    message = None
+    if request.method == "POST":
+        folder_path = request.form.get("folder_path", "").strip()
+        action = request.form.get("action", "")
+
+        if not folder_path:
+            flash("Folder path is required.")
+            return redirect(url_for("folders.FolderLocker"))
+
+        if action == "lock":
+            success, message = folders.lock_folder(folder_path)
+        elif action == "unlock":
+            success, message = folders.unlock_folder(folder_path)
+        else:
+            message = "Invalid action."
+
+        flash(message)
+
+    return render_template("FolderLocker.html", folders=folders.list_locked_folders(), message=message)
+
+@bp.route("/folder-locker/batch", methods=["POST"], endpoint="BatchFolderLock")
+@login_required
+def BatchFolderLock():
+    """Queue a lock / unlock of many paths or globs; poll the returned status_url for progress."""
+    data = request.get_json(silent=True) or {}
+    action = data.get("action") or request.form.get("action", "")
+    paths = data.get("paths") or request.form.get("paths", "").splitlines()
+    if isinstance(paths, str):
+        paths = [paths]
+
+    try:
+        job = folders.submit_batch(action, paths)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    job["status_url"] = url_for("folders.FolderLockJob", job_id=job["id"])
+    return jsonify(job), 202
+
+
+@bp.route("/folder-locker/jobs/<job_id>", methods=["GET"], endpoint="FolderLockJob")
+@login_required
+def FolderLockJob(job_id):
+    job = folders.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify(job)
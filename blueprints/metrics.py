@@ -0,0 +1,58 @@
+import time
+from flask import Blueprint, Response, request, g
+from config import DATA_DIR, PROFILE_SLOW_MS, PROFILE_INTERVAL_MS
+from backend.login_manager import login_required
+from backend.metrics import histogram, counter, render
+from backend.profiler import SlowRequestProfiler
+
+bp = Blueprint("metrics", __name__)
+
+request_seconds = histogram(
+    "secureme_request_seconds", "Request latency by endpoint, method and status.", ("endpoint", "method", "status"))
+slow_requests = counter(
+    "secureme_slow_requests_total", "Requests slower than SECUREME_PROFILE_SLOW_MS that were profiled.", ("endpoint",))
+
+profiler = None
+if PROFILE_SLOW_MS > 0:
+    profiler = SlowRequestProfiler(PROFILE_SLOW_MS / 1000, PROFILE_INTERVAL_MS / 1000, DATA_DIR / "profiles")
+
+
+# ---------------------------
+# Per-request timing
+# ---------------------------
+@bp.before_app_request
+def start_timer():
+    g.request_started = time.perf_counter()
+    if profiler:
+        profiler.start()
+
+
+@bp.after_app_request
+def record_latency(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        duration = time.perf_counter() - started
+        endpoint = request.endpoint or "unmatched"
+        request_seconds.observe(duration, endpoint=endpoint, method=request.method, status=response.status_code)
+        if profiler and profiler.stop(duration, f"{request.method}_{endpoint}"):
+            slow_requests.inc(endpoint=endpoint)
+    return response
+
+
+@bp.teardown_app_request
+def stop_profiling(exc):
+    # after_request is skipped when a request dies mid-way; don't keep sampling its thread
+    if profiler and g.pop("request_started", None) is not None:
+        profiler.stop(0, "")
+
+
+# ---------------------------
+# Exposition
+# ---------------------------
+@bp.route("/metrics", methods=["GET"], endpoint="Metrics")
+@login_required
+def Metrics():
+    """Every metric in the Prometheus text format."""
+    response = Response(render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+    response.headers["Cache-Control"] = "no-store"
+    return response
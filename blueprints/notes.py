@@ -0,0 +1,174 @@
+import io
+import click
+from pathlib import Path
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file
+from backend.login_manager import login_required
+from backend.jobs import QueueFull
+from backend.lazy import LazyModule
+from backend.stats_service import stats as dashboard_stats
+
+bp = Blueprint("notes", __name__, cli_group=None)
+notes = LazyModule("backend.notes_manager")
+dashboard_stats.register_module("notes", "backend.notes_manager")
+
+
+# ---------------------------
+# Notes Home
+# ---------------------------
+@bp.route("/notes", methods=["GET"], endpoint="notes_home")
+@login_required
+def notes_home():
+    return render_template(
+        "NotesManager.html",
+        notes=notes.list_notes(),
+        active_note=None,
+        title="",
+        content="",
+        new=False,
+        show_key_prompt=False,
+    )
+
+
+# ---------------------------
+# Open a note
+# ---------------------------
+@bp.route("/notes/open/<filename>", methods=["GET", "POST"], endpoint="open_note")
+@login_required
+def open_note(filename):
+    note_names = notes.list_notes()
+
+    if request.method == "POST":
+        key = request.form.get("key", "")
+        title, content = notes.load_note_content(filename, key)
+
+        if title is None:
+            flash("Invalid key or decryption failed.")
+            return redirect(url_for("notes.notes_home"))
+
+        return render_template(
+            "NotesManager.html",
+            notes=note_names,
+            active_note=filename,
+            title=title,
+            content=content,
+            editable=False,
+            current_key=key,
+            show_key_prompt=False,
+        )
+    return render_template(
+        "NotesManager.html",
+        notes=note_names,
+        active_note=filename,
+        show_key_prompt=True,
+        key_prompt_for=filename,
+    )
+
+
+# ---------------------------
+# Edit and save note
+# ---------------------------
+@bp.route("/notes/edit/<filename>", methods=["POST"], endpoint="edit_note")
+@login_required
+def edit_note(filename):
+    current_key = request.form.get("current_key", "")
+    new_title = request.form.get("title", "")
+    new_content = request.form.get("content", "")
+
+    try:
+        new_key, job_id = notes.submit_note_update(filename, current_key, new_title, new_content)
+    except ValueError:
+        flash("Current key incorrect. Could not save.")
+        return redirect(url_for("notes.open_note", filename=filename))
+    except QueueFull:
+        flash("⚠️ Too many notes are being saved right now — please try again in a moment.")
+        return redirect(url_for("notes.open_note", filename=filename))
+    except Exception as e:
+        flash(f"Error saving note: {e}")
+        return redirect(url_for("notes.open_note", filename=filename))
+
+    flash(f"Note update queued; it will be re-encrypted with a new key: {new_key} "
+          f"(the key opens the note once this save is done; status: {url_for('notes.NoteJob', job_id=job_id)})")
+    return redirect(url_for("notes.notes_home"))
+
+
+@bp.route("/notes/export/<filename>", methods=["POST"], endpoint="export_note")
+@login_required
+def export_note(filename):
+    """Render a note as .docx on demand; notes are stored in the compact native format."""
+    exported = notes.export_note_docx(filename, request.form.get("key", ""))
+    if exported is None:
+        flash("Invalid key or decryption failed.")
+        return redirect(url_for("notes.open_note", filename=filename))
+
+    download_name, data = exported
+    response = send_file(
+        io.BytesIO(data),
+        mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        as_attachment=True,
+        download_name=download_name,
+    )
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@bp.route("/notes/jobs/<job_id>", methods=["GET"], endpoint="NoteJob")
+@login_required
+def NoteJob(job_id):
+    """Progress of a queued note save; status "done" means it is durable on disk.
+
+    key_applied tells whether the key shown for the save now opens the note;
+    it is False for good when a later save superseded this one.
+    """
+    job = notes.note_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify(job)
+
+
+# ---------------------------
+# Create new note
+# ---------------------------
+@bp.route("/notes/new", methods=["GET", "POST"], endpoint="create_new_note")
+@login_required
+def create_new_note():
+    if request.method == "POST":
+        title = request.form.get("title", "").strip()
+        content = request.form.get("content", "").strip()
+
+        if not title or not content:
+            flash("Title and content required.")
+            return redirect(url_for("notes.create_new_note"))
+
+        try:
+            file_name, key, job_id = notes.submit_note(title, content)
+        except QueueFull:
+            flash("⚠️ Too many notes are being saved right now — please try again in a moment.")
+            return redirect(url_for("notes.create_new_note"))
+        flash(f"Note queued for encryption. File: {file_name}, Key: {key} "
+              f"(the key opens the note once this save is done; status: {url_for('notes.NoteJob', job_id=job_id)})")
+        return redirect(url_for("notes.notes_home"))
+
+    return render_template(
+        "NotesManager.html",
+        notes=notes.list_notes(),
+        new=True,
+        active_note=None,
+        title="",
+        content="",
+        editable=True,
+        show_key_prompt=False,
+    )
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+@bp.cli.command("migrate-notes")
+@click.option("--keys", "keys_path", type=click.Path(exists=True, dir_okay=False),
+              help="ONotes.xlsx-style workbook with a Key column (defaults to data/ONotes.xlsx)")
+def migrate_notes(keys_path):
+    """Convert legacy .docx notes whose keys are known to the native note format."""
+    from backend.notes_catalog import legacy_keys
+    keys = legacy_keys(Path(keys_path)) if keys_path else None
+    result = notes.migrate_legacy_notes(keys)
+    print(", ".join(f"{name}: {count}" for name, count in result.items()))
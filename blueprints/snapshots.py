@@ -0,0 +1,93 @@
+import os
+import time
+import click
+from pathlib import Path
+from flask import Blueprint
+from config import DATA_DIR, BACKUP_DIR
+from backend.lazy import LazyModule
+
+# CLI only: `flask snapshot create|list|restore|verify`
+bp = Blueprint("snapshot", __name__, cli_group="snapshot")
+snapshots = LazyModule("backend.snapshots")
+
+repo_option = click.option("--repo", type=click.Path(file_okay=False), default=str(BACKUP_DIR),
+                           show_default=True, help="snapshot repository directory")
+
+
+def _open_repo(repo: str):
+    passphrase = os.environ.get("SECUREME_BACKUP_PASSPHRASE") or click.prompt(
+        "Snapshot passphrase", hide_input=True, confirmation_prompt=not (Path(repo) / "config.json").exists()
+    )
+    try:
+        return snapshots.SnapshotRepo(Path(repo), passphrase)
+    except snapshots.SnapshotError as e:
+        raise click.ClickException(str(e))
+
+
+def _journaled_stores():
+    """(journal, store) pairs a snapshot must copy as of one moment."""
+    from backend.journal import Journal
+    from backend.vault_manager import VAULT_DB, VAULT_JOURNAL
+    from backend.folder_locker import LOCK_LOG, LOCK_JOURNAL
+    # only paused, never appended to or compacted: the app's own journals do that
+    return [(Journal(VAULT_JOURNAL, None), VAULT_DB), (Journal(LOCK_JOURNAL, None), LOCK_LOG)]
+
+
+def _mb(size: int) -> str:
+    return f"{size / (1 << 20):.2f} MB"
+
+
+@bp.cli.command("create")
+@repo_option
+def create(repo):
+    """Snapshot the data directory, storing only chunks the repository does not have yet."""
+    started = time.perf_counter()
+    result = _open_repo(repo).create(DATA_DIR, _journaled_stores())
+    print(f"Snapshot {result['id']}: {result['files']} files, {_mb(result['bytes'])} "
+          f"({result['reused_files']} unchanged files skipped, {_mb(result['bytes_read'])} read); "
+          f"{result['new_chunks']}/{result['chunks']} new chunks, {_mb(result['bytes_stored'])} stored "
+          f"in {time.perf_counter() - started:.2f}s")
+
+
+@bp.cli.command("list")
+@repo_option
+def list_snapshots(repo):
+    """List the snapshots in the repository, oldest first."""
+    for s in _open_repo(repo).list():
+        print(f"{s['id']}  {s['created']}  {s['files']:5d} files  {_mb(s['bytes']):>12}  "
+              f"+{_mb(s['bytes_stored'])} stored")
+
+
+@bp.cli.command("restore")
+@click.argument("snapshot_id")
+@click.argument("target", type=click.Path(file_okay=False))
+@click.option("--path", "patterns", multiple=True, help="only restore files matching this glob (repeatable)")
+@click.option("--force", is_flag=True, help="allow restoring into a non-empty directory")
+@repo_option
+def restore(snapshot_id, target, patterns, force, repo):
+    """Restore SNAPSHOT_ID ("latest" or an id prefix) into TARGET.
+
+    Restore into a fresh directory and swap it in while the app is stopped;
+    restoring over a live data directory is refused unless --force is given.
+    """
+    try:
+        result = _open_repo(repo).restore(snapshot_id, Path(target), patterns, force)
+    except snapshots.SnapshotError as e:
+        raise click.ClickException(str(e))
+    print(f"Restored {result['files']} files ({_mb(result['bytes'])}) of snapshot {result['id']} to {target}")
+
+
+@bp.cli.command("verify")
+@click.argument("snapshot_id", required=False)
+@click.option("--full", is_flag=True, help="decrypt and re-hash every chunk, not just check it exists")
+@repo_option
+def verify(snapshot_id, full, repo):
+    """Check that every chunk of SNAPSHOT_ID (default: all snapshots) is present and intact."""
+    try:
+        result = _open_repo(repo).verify(snapshot_id, full)
+    except snapshots.SnapshotError as e:
+        raise click.ClickException(str(e))
+    print(f"{result['snapshots']} snapshots, {result['chunks']} chunks: "
+          f"{len(result['missing'])} missing, {len(result['corrupt'])} corrupt")
+    if not result["ok"]:
+        raise click.ClickException("Snapshot repository is damaged.")
@@ -0,0 +1,316 @@
+import io
+import time
+import click
+from pathlib import Path
+from flask import (
+    Blueprint, Response, render_template, request, redirect, url_for, flash, jsonify, stream_with_context,
+)
+from backend.login_manager import login_required
+from backend.lazy import LazyModule
+from backend.stats_service import stats as dashboard_stats
+from backend.vault_transfer import detect_format, FORMATS
+from config import BREACH_INDEX
+
+bp = Blueprint("vault", __name__, cli_group=None)
+vault = LazyModule("backend.vault_manager")
+dashboard_stats.register_module("vault_entries", "backend.vault_manager")
+
+
+# ---------------------------
+# Password Vault Page
+# ---------------------------
+@bp.route("/password-vault", methods=["GET", "POST"])
+@login_required
+def password_vault():
+    """Password Vault — Add and View Passwords."""
+    if request.method == "POST":
+        website = request.form.get("website", "").strip()
+        name = request.form.get("name", "").strip()
+        contact = request.form.get("contact", "").strip()
+        password = request.form.get("password", "").strip()
+        category = request.form.get("category", "Other")
+
+        if not website or not password:
+            flash("⚠️ Website and Password fields are required.")
+            return redirect(url_for("vault.password_vault"))
+
+        success, message = vault.save_entry(website, name, contact, password, category)
+        flash(message)
+        return redirect(url_for("vault.password_vault"))
+
+    # GET — one page of vault entries (metadata only, passwords are revealed on demand)
+    return _vault_listing()
+
+
+@bp.route("/vault", methods=["GET"], endpoint="PasswordVault")
+@login_required
+def PasswordVault():
+    """Display saved passwords, paginated and filtered server-side."""
+    return _vault_listing()
+
+
+def _vault_listing():
+    """Render (or return as JSON with ?format=json) the page selected by the query string."""
+    listing = vault.list_entries_page(
+        page=request.args.get("page", 1, type=int),
+        page_size=request.args.get("page_size", 24, type=int),
+        category=request.args.get("category"),
+        q=request.args.get("q"),
+        sort=request.args.get("sort", "newest"),
+    )
+    if request.args.get("format") == "json":
+        return jsonify(listing)
+    return render_template("PasswordVault.html", vault_entries=listing["entries"], listing=listing)
+
+
+@bp.route("/vault/entries/<entry_id>", methods=["GET"], endpoint="GetVaultEntry")
+@login_required
+def GetVaultEntry(entry_id):
+    """One entry's metadata by its stable id — never the password."""
+    entry = vault.get_entry(entry_id)
+    if entry is None:
+        return jsonify({"error": "Entry not found."}), 404
+    return jsonify(entry)
+
+
+@bp.route("/vault/reveal/<entry_id>", methods=["GET"], endpoint="RevealVaultEntry")
+@login_required
+def RevealVaultEntry(entry_id):
+    """Decrypt a single password for the eye icon / edit form."""
+    try:
+        password = vault.reveal_entry(entry_id)
+    except Exception:
+        return jsonify({"error": "Decryption failed."}), 500
+    if password is None:
+        return jsonify({"error": "Entry not found."}), 404
+
+    response = jsonify({"id": entry_id, "password": password})
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@bp.route("/vault/add", methods=["POST"], endpoint="AddVaultEntry")
+@login_required
+def AddVaultEntry():
+    """Handle new password form submission."""
+    website = request.form.get("website", "").strip()
+    name = request.form.get("name", "").strip()
+    contact = request.form.get("contact", "").strip()
+    password = request.form.get("password", "").strip()
+    category = request.form.get("category", "Other")
+
+    if not (website and name and password):
+        flash("Website, Name, and Password are required.")
+        return redirect(url_for("vault.PasswordVault"))
+
+    success, msg = vault.save_entry(website, name, contact, password, category)
+    flash(msg)
+    return redirect(url_for("vault.PasswordVault"))
+
+@bp.route("/vault/search", methods=["GET"], endpoint="SearchVault")
+@login_required
+def SearchVault():
+    """Prefix / typo-tolerant metadata search — never returns passwords."""
+    q = request.args.get("q", "")
+    limit = max(1, min(request.args.get("limit", 20, type=int), 200))
+    started = time.perf_counter()
+    results = vault.search_entries(q, limit)
+    took_ms = (time.perf_counter() - started) * 1000
+    return jsonify({"q": q, "results": results, "took_ms": round(took_ms, 3)})
+
+# ---------------------------
+# Bulk import / export
+# ---------------------------
+@bp.route("/vault/import", methods=["POST"], endpoint="ImportVault")
+@login_required
+def ImportVault():
+    """Bulk-import an uploaded CSV / JSON export (browser, Bitwarden, or our own)."""
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        flash("⚠️ Choose a CSV or JSON file to import.")
+        return redirect(url_for("vault.PasswordVault"))
+
+    fmt = request.form.get("format") or detect_format(upload.filename)
+    try:
+        stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+        stats = vault.import_entries(stream, fmt)
+    except Exception as e:
+        flash(f"❌ Import failed, nothing was added: {e}")
+        return redirect(url_for("vault.PasswordVault"))
+
+    flash(f"✅ Imported {stats['added']} entries "
+          f"({stats['duplicates']} duplicates skipped, {stats['invalid']} invalid rows).")
+    if stats["breached"]:
+        flash(f"⚠️ {stats['breached']} imported passwords appear in known data breaches — "
+              f"see {url_for('vault.AuditVault')}.")
+    return redirect(url_for("vault.PasswordVault"))
+
+
+@bp.route("/vault/export", methods=["GET"], endpoint="ExportVault")
+@login_required
+def ExportVault():
+    """Stream the whole vault, passwords decrypted, as CSV or JSON Lines."""
+    fmt = request.args.get("format", "csv")
+    if fmt not in FORMATS:
+        return jsonify({"error": f"Unsupported export format: {fmt}"}), 400
+
+    response = Response(
+        stream_with_context(vault.export_entries(fmt)),
+        mimetype="text/csv" if fmt == "csv" else "application/x-ndjson",
+    )
+    extension = "csv" if fmt == "csv" else "jsonl"
+    response.headers["Content-Disposition"] = f"attachment; filename=PasswordVault.{extension}"
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+@bp.route("/vault/audit", methods=["GET"], endpoint="AuditVault")
+@login_required
+def AuditVault():
+    """Entries whose password appears in the offline breach corpus — never the passwords themselves."""
+    try:
+        report = vault.audit_vault()
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    response = jsonify(report)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+@bp.route("/vault/health", methods=["GET"], endpoint="VaultHealth")
+@login_required
+def VaultHealth():
+    """Reused, weak and old passwords, scored from the password index without decrypting."""
+    max_age = request.args.get("max_age_days", type=int)
+    report = vault.vault_health(max_age) if max_age and max_age > 0 else vault.vault_health()
+    response = jsonify(report)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+# ---------------------------
+# Edit Vault Entry
+# ---------------------------
+@bp.route("/password-vault/edit/<entry_id>", methods=["POST"])
+@login_required
+def edit_vault_entry(entry_id):
+    """Update an existing password entry."""
+    website = request.form.get("website", "").strip()
+    name = request.form.get("name", "").strip()
+    contact = request.form.get("contact", "").strip()
+    password = request.form.get("password", "").strip()
+    category = request.form.get("category", "Other")
+    version = request.form.get("version", type=int)
+
+    success, msg = vault.update_entry(entry_id, website, name, contact, password, category, version)
+    flash(msg)
+    return redirect(url_for("vault.password_vault"))
+
+
+@bp.route("/password-vault/delete/<entry_id>", methods=["POST"], endpoint="DeleteVaultEntry")
+@login_required
+def DeleteVaultEntry(entry_id):
+    success, msg = vault.delete_entry(entry_id)
+    flash(msg)
+    return redirect(url_for("vault.password_vault"))
+
+
+# ---------------------------
+# Vault xlsx import / export
+# ---------------------------
+@bp.cli.command("vault-import-xlsx")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def vault_import_xlsx(path):
+    """Append the rows of a PasswordVault.xlsx workbook to the vault store."""
+    count = vault.import_vault_xlsx(Path(path))
+    print(f"Imported {count} entries from {path}")
+
+
+@bp.cli.command("vault-export-xlsx")
+@click.argument("path", type=click.Path(dir_okay=False))
+def vault_export_xlsx(path):
+    """Write the vault store (passwords stay encrypted) to an xlsx workbook."""
+    count = vault.export_vault_xlsx(Path(path))
+    print(f"Exported {count} entries to {path}")
+
+
+@bp.cli.command("vault-import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), help="defaults to the file extension")
+def vault_import(path, fmt):
+    """Bulk-import a CSV / JSON password export, skipping website+contact duplicates."""
+    started = time.perf_counter()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        stats = vault.import_entries(f, fmt or detect_format(path))
+    print(f"Imported {stats['added']} entries from {path} in {time.perf_counter() - started:.2f}s "
+          f"({stats['duplicates']} duplicates, {stats['invalid']} invalid, {stats['breached']} breached)")
+
+
+@bp.cli.command("vault-export")
+@click.argument("path", type=click.Path(dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), help="defaults to the file extension")
+def vault_export(path, fmt):
+    """Write the vault with decrypted passwords to a CSV / JSON Lines file."""
+    report = {}
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for chunk in vault.export_entries(fmt or detect_format(path), report):
+            f.write(chunk)
+    print(f"Exported {report['exported']} entries to {path}")
+    if report["undecryptable"]:
+        print(f"⚠️ {report['undecryptable']} entries could not be decrypted and were left out; "
+              f"see `flask vault-health`")
+
+
+@bp.cli.command("rotate-vault-key")
+def rotate_vault_key_command():
+    """Generate a new vault key and re-encrypt every stored password with it."""
+    count = vault.rotate_vault_key()
+    print(f"Rotated {count} entries to a new vault key")
+
+
+# ---------------------------
+# Offline breach check
+# ---------------------------
+@bp.cli.command("breach-index")
+@click.argument("dump", type=click.Path(exists=True, dir_okay=False))
+@click.option("--out", type=click.Path(dir_okay=False), default=str(BREACH_INDEX), show_default=True)
+def breach_index(dump, out):
+    """Build the breach index from a HIBP-style "SHA1:COUNT" text dump (plain or .gz)."""
+    import gzip
+    from backend.breach_check import build_index
+    started = time.perf_counter()
+    opener = gzip.open if dump.endswith(".gz") else open
+    with opener(dump, "rb") as f:
+        count = build_index(f, Path(out))
+    print(f"Indexed {count:,} hashes into {out} in {time.perf_counter() - started:.1f}s")
+
+
+@bp.cli.command("vault-audit")
+def vault_audit():
+    """List vault entries whose password appears in the breach index."""
+    try:
+        report = vault.audit_vault()
+    except FileNotFoundError as e:
+        raise click.ClickException(str(e))
+    for entry in report["breached"]:
+        print(f"{entry['breaches']:>12,}  {entry['website']}  {entry['contact']}  ({entry['id']})")
+    print(f"{len(report['breached'])} of {report['checked']} passwords found in known breaches"
+          + (f", {report['undecryptable']} could not be decrypted" if report["undecryptable"] else ""))
+
+
+# ---------------------------
+# Password health
+# ---------------------------
+@bp.cli.command("vault-health")
+@click.option("--max-age-days", type=int, default=None, help="flag passwords older than this")
+def vault_health(max_age_days):
+    """Summarise password reuse, strength and age across the vault."""
+    report = vault.vault_health(max_age_days) if max_age_days else vault.vault_health()
+    for group in report["reused"]:
+        sites = ", ".join(entry["website"] for entry in group["entries"][:5])
+        more = f" (+{group['count'] - 5} more)" if group["count"] > 5 else ""
+        print(f"reused x{group['count']}: {sites}{more}")
+    strength = report["strength"]
+    print(f"{report['entries']} entries, score {report['score']}/100: "
+          f"{report['reused_entries']} share a password ({report['reused_groups']} groups), "
+          f"{strength['weak']} weak / {strength['fair']} fair / {strength['strong']} strong, "
+          f"{report['old_count']} older than {report['max_age_days']} days"
+          + (f", {report['reindexed']} reindexed" if report["reindexed"] else "")
+          + (f", {report['undecryptable']} could not be decrypted" if report["undecryptable"] else ""))
@@ -2,7 +2,27 @@ import os, secrets
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent
-DATA_DIR = BASE_DIR / "data"
-DATA_DIR.mkdir(exist_ok=True)
+DATA_DIR = Path(os.environ.get("SECUREME_DATA_DIR") or BASE_DIR / "data")
 PASS_HASH_FILE = DATA_DIR / "pass_hash.json"
 SECRET_KEY = os.environ.get("SECRET_KEY") or secrets.token_hex(24)
+VAULT_CACHE_TTL = int(os.environ.get("SECUREME_VAULT_CACHE_TTL", "300"))
+JOURNAL_BATCH_SIZE = int(os.environ.get("SECUREME_JOURNAL_BATCH_SIZE", "500"))
+JOURNAL_INTERVAL = float(os.environ.get("SECUREME_JOURNAL_INTERVAL", "1.0"))
+IMPORT_WORKERS = int(os.environ.get("SECUREME_IMPORT_WORKERS") or os.cpu_count() or 1)
+LOCK_BACKEND = os.environ.get("SECUREME_LOCK_BACKEND")
+LOCK_WORKERS = int(os.environ.get("SECUREME_LOCK_WORKERS", "8"))
+LOCK_RECURSIVE = os.environ.get("SECUREME_LOCK_RECURSIVE", "0").lower() in ("1", "true", "yes")
+STATS_TTL = int(os.environ.get("SECUREME_STATS_TTL", "300"))
+NOTE_WORKERS = int(os.environ.get("SECUREME_NOTE_WORKERS", "2"))
+NOTE_QUEUE_SIZE = int(os.environ.get("SECUREME_NOTE_QUEUE_SIZE", "64"))
+LOGIN_WORKERS = int(os.environ.get("SECUREME_LOGIN_WORKERS", "2"))
+LOGIN_RATE = float(os.environ.get("SECUREME_LOGIN_RATE", "10"))  # attempts per minute per client
+LOGIN_BURST = int(os.environ.get("SECUREME_LOGIN_BURST", "5"))
+LOGIN_BACKOFF_BASE = float(os.environ.get("SECUREME_LOGIN_BACKOFF_BASE", "1"))
+LOGIN_BACKOFF_MAX = float(os.environ.get("SECUREME_LOGIN_BACKOFF_MAX", "300"))
+PROFILE_SLOW_MS = float(os.environ.get("SECUREME_PROFILE_SLOW_MS", "0"))  # 0 disables the profiler
+PROFILE_INTERVAL_MS = float(os.environ.get("SECUREME_PROFILE_INTERVAL_MS", "5"))
+BACKUP_DIR = Path(os.environ.get("SECUREME_BACKUP_DIR") or BASE_DIR / "backups")
+BREACH_INDEX = Path(os.environ.get("SECUREME_BREACH_INDEX") or DATA_DIR / "breached_passwords.idx")
+BREACH_POLICY = os.environ.get("SECUREME_BREACH_POLICY", "warn")  # warn | block
+PASSWORD_MAX_AGE_DAYS = int(os.environ.get("SECUREME_PASSWORD_MAX_AGE_DAYS", "365"))
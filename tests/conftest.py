@@ -0,0 +1,22 @@
+import os
+import tempfile
+import pytest
+
+# Point every store at a throwaway data directory before config is imported,
+# so no test can touch the real data/ folder.
+_data_dir = tempfile.mkdtemp(prefix="secureme-tests-")
+os.environ["SECUREME_DATA_DIR"] = _data_dir
+os.environ["SECUREME_BACKUP_DIR"] = os.path.join(_data_dir, "backups")
+os.environ["SECUREME_BREACH_INDEX"] = os.path.join(_data_dir, "breached_passwords.idx")
+
+
+@pytest.fixture
+def client():
+    """A test client with a logged-in session."""
+    from app import create_app
+    app = create_app()
+    app.config["TESTING"] = True
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["authenticated"] = True
+    return client
@@ -0,0 +1,114 @@
+import random
+import logging
+import pytest
+from backend.breach_check import BreachIndex, build_index, open_index, password_hash, MAX_COUNT
+
+
+def _line(digest: bytes, count) -> bytes:
+    return digest.hex().upper().encode() + b":" + str(count).encode() + b"\n"
+
+
+def _corpus(n: int, seed: int = 1) -> dict:
+    rng = random.Random(seed)
+    return {rng.randbytes(20): rng.randint(1, 10_000) for _ in range(n)}
+
+
+def test_lookup_finds_every_hash_across_runs(tmp_path):
+    corpus = _corpus(5000)
+    path = tmp_path / "breach.idx"
+    assert build_index((_line(d, c) for d, c in corpus.items()), path, run_records=700) == len(corpus)
+
+    index = BreachIndex(path)
+    try:
+        assert len(index) == len(corpus)
+        assert all(index.lookup(d) == c for d, c in corpus.items())
+        rng = random.Random(2)
+        assert all(index.lookup(rng.randbytes(20)) == 0 for _ in range(2000))
+        # near misses share the bucket, and the first / last key of it
+        for digest in list(corpus)[:200]:
+            for neighbour in (digest[:-1] + bytes([digest[-1] ^ 1]), digest[:2] + b"\0" * 18, digest[:2] + b"\xff" * 18):
+                assert index.lookup(neighbour) == corpus.get(neighbour, 0)
+    finally:
+        index.close()
+
+
+def test_skewed_bucket_falls_back_to_bisection(tmp_path):
+    # every hash in one 2-byte bucket, bunched at its low end: interpolation alone keeps missing
+    digests = [b"\xab\xcd" + i.to_bytes(18, "big") for i in range(3000)] + [b"\xab\xcd" + b"\xff" * 18]
+    path = tmp_path / "breach.idx"
+    build_index((_line(d, i + 1) for i, d in enumerate(digests)), path)
+    index = BreachIndex(path)
+    try:
+        assert all(index.lookup(d) == i + 1 for i, d in enumerate(digests))
+        assert index.lookup(b"\xab\xcd" + (5000).to_bytes(18, "big")) == 0
+    finally:
+        index.close()
+
+
+def test_dump_parsing_sums_duplicates_and_skips_junk(tmp_path):
+    known = password_hash("password")
+    lines = [
+        b"# comment line\n",
+        b"not a hash\n",
+        _line(known, 7),
+        known.hex().encode() + b"\n",  # lower case, no count: counts once
+        _line(known, 2),
+        b"zz" * 20 + b":3\n",
+        _line(password_hash("big"), MAX_COUNT),
+        _line(password_hash("big"), 5),
+    ]
+    path = tmp_path / "breach.idx"
+    assert build_index(iter(lines), path, run_records=2) == 2
+    index = BreachIndex(path)
+    try:
+        assert index.check_password("password") == 10
+        assert index.check_password("big") == MAX_COUNT
+        assert index.check_password("not breached") == 0
+    finally:
+        index.close()
+
+
+def test_empty_dump_builds_an_empty_index(tmp_path):
+    path = tmp_path / "breach.idx"
+    assert build_index(iter([]), path) == 0
+    index = BreachIndex(path)
+    try:
+        assert len(index) == 0 and index.check_password("anything") == 0
+    finally:
+        index.close()
+
+
+def test_open_index_follows_a_rebuild(tmp_path):
+    path = tmp_path / "breach.idx"
+    assert open_index(path) is None
+    build_index(iter([_line(password_hash("one"), 1)]), path)
+    first = open_index(path)
+    assert open_index(path) is first and first.check_password("one") == 1
+
+    build_index(iter([_line(password_hash("two"), 2)]), path)
+    second = open_index(path)
+    assert second is not first
+    assert second.check_password("two") == 2 and second.check_password("one") == 0
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "breach.idx"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        BreachIndex(path)
+
+
+@pytest.mark.parametrize("keep", [0, 10, -8])  # empty, a partial header, a partial fan-out table
+def test_a_truncated_index_counts_as_absent(tmp_path, caplog, keep):
+    path = tmp_path / "breach.idx"
+    build_index(iter([_line(password_hash("one"), 1)]), path)
+    data = path.read_bytes()
+    path.write_bytes(data[:keep])
+
+    with caplog.at_level(logging.ERROR, logger="backend.breach_check"):
+        assert open_index(path) is None
+        assert open_index(path) is None
+    assert len(caplog.records) == 1  # once per file, not once per lookup
+
+    build_index(iter([_line(password_hash("one"), 1)]), path)
+    assert open_index(path).check_password("one") == 1
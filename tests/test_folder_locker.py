@@ -0,0 +1,137 @@
+import os
+import stat
+import time
+import threading
+import pytest
+from backend import folder_locker
+
+
+def test_reads_lay_pending_changes_over_the_log_without_compacting(monkeypatch):
+    calls = []
+    folder_locker.update_log("/srv/a", "Locked")
+    folder_locker.update_log("/srv/b", "Locked")
+    folder_locker.update_log("/srv/a", "Unlocked")
+    monkeypatch.setattr(folder_locker._journal, "compact", lambda: calls.append(1))
+
+    statuses = {f["path"]: f["status"] for f in folder_locker.list_locked_folders()}
+    assert statuses["/srv/a"] == "Unlocked"
+    assert statuses["/srv/b"] == "Locked"
+    assert calls == []
+
+
+def test_compacted_log_matches_the_overlay():
+    folder_locker.update_log("/srv/c", "Locked")
+    before = folder_locker.list_locked_folders()
+    folder_locker._journal.compact()
+    assert folder_locker.list_locked_folders() == before
+
+
+def _tree(tmp_path):
+    root = tmp_path / "tree"
+    (root / "sub" / "deeper").mkdir(parents=True)
+    (root / "sub" / "notes.txt").write_text("x")
+    (root / "link").symlink_to(tmp_path)
+    modes = {root: 0o750, root / "sub": 0o711, root / "sub" / "deeper": 0o700, root / "sub" / "notes.txt": 0o640}
+    for path, mode in modes.items():
+        os.chmod(path, mode)
+    return root, {str(path): mode for path, mode in modes.items()}
+
+
+def _modes(paths):
+    return {path: stat.S_IMODE(os.stat(path).st_mode) for path in paths}
+
+
+def _record_chmods(monkeypatch):
+    calls = []
+    chmod = os.chmod
+
+    def record(path, mode):
+        calls.append(path)
+        chmod(path, mode)
+
+    monkeypatch.setattr(folder_locker.os, "chmod", record)
+    return calls
+
+
+def test_posix_backend_restores_the_original_modes(tmp_path):
+    root, original = _tree(tmp_path)
+    backend = folder_locker.PosixBackend(recursive=True, db_path=tmp_path / "modes.db")
+
+    assert backend.lock(str(root)) == (True, "")
+    assert set(_modes(original).values()) == {0}
+    assert os.readlink(root / "link") == str(tmp_path)  # symlinks are left alone
+    assert stat.S_IMODE(os.stat(tmp_path).st_mode) != 0
+
+    assert backend.unlock(str(root)) == (True, "")
+    assert _modes(original) == original
+    assert backend._conn().execute("SELECT count(*) FROM modes").fetchone()[0] == 0
+
+
+def test_posix_backend_locks_deepest_first_and_unlocks_parents_first(tmp_path, monkeypatch):
+    root, _ = _tree(tmp_path)
+    backend = folder_locker.PosixBackend(recursive=True, db_path=tmp_path / "modes.db")
+    calls = _record_chmods(monkeypatch)
+
+    backend.lock(str(root))
+    depths = [path.count(os.sep) for path in calls]
+    assert depths == sorted(depths, reverse=True) and calls[-1] == str(root)
+
+    calls.clear()
+    backend.unlock(str(root))
+    depths = [path.count(os.sep) for path in calls]
+    assert depths == sorted(depths) and calls[0] == str(root)
+
+
+def test_posix_backend_locking_twice_keeps_the_first_modes(tmp_path):
+    root, original = _tree(tmp_path)
+    backend = folder_locker.PosixBackend(recursive=True, db_path=tmp_path / "modes.db")
+
+    assert backend.lock(str(root)) == (True, "")
+    assert backend.lock(str(root)) == (True, "")  # every mode is 000 by now
+    assert backend.unlock(str(root)) == (True, "")
+    assert _modes(original) == original
+
+
+def test_a_backend_must_implement_lock_and_unlock():
+    class LockOnly(folder_locker.LockBackend):
+        def lock(self, folder_path):
+            return True, ""
+
+    with pytest.raises(TypeError):
+        LockOnly()
+
+
+def _wait_for(job_id):
+    deadline = time.monotonic() + 5
+    while (job := folder_locker.get_job(job_id))["status"] != "done" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_batch_globs_are_expanded_on_the_pool(tmp_path, monkeypatch):
+    for name in ("a", "b", "b/c"):
+        (tmp_path / name).mkdir()
+    (tmp_path / "file.txt").write_text("x")
+    expanding, release = threading.Event(), threading.Event()
+    expand = folder_locker.expand_paths
+
+    def slow_expand(patterns):
+        expanding.set()
+        release.wait()
+        return expand(patterns)
+
+    monkeypatch.setattr(folder_locker, "expand_paths", slow_expand)
+    job = folder_locker.submit_batch("unlock", [f"{tmp_path}/**", ""])
+    assert job["status"] == "expanding" and job["total"] == 0 and job["progress"] == 0.0
+    assert expanding.wait(5)
+    release.set()
+
+    job = _wait_for(job["id"])
+    assert sorted(r["path"] for r in job["results"]) == [
+        str(tmp_path) + "/", str(tmp_path / "a"), str(tmp_path / "b"), str(tmp_path / "b" / "c")]
+    assert job["succeeded"] == job["total"] == 4 and job["progress"] == 1.0
+
+
+def test_a_batch_that_matches_nothing_finishes(tmp_path):
+    job = _wait_for(folder_locker.submit_batch("lock", [f"{tmp_path}/nothing-*"])["id"])
+    assert (job["total"], job["progress"], job["error"]) == (0, 1.0, None)
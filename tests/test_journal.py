@@ -0,0 +1,123 @@
+import time
+import logging
+import threading
+from backend.journal import Journal
+from backend.vault_store import SQLiteVaultStore
+
+
+class ListStore:
+    """A store that records every applied journal record."""
+
+    def __init__(self):
+        self.records = []
+        self.lock = threading.Lock()
+
+    def apply(self, records):
+        with self.lock:
+            self.records.extend(records)
+
+    def snapshot(self):
+        with self.lock:
+            return [r["seq"] for r in self.records]
+
+
+def _journal(tmp_path, store, batch_size=500):
+    # a long interval keeps the background compactor out of the way
+    return Journal(tmp_path / "test.journal", store.apply, batch_size=batch_size, interval=3600)
+
+
+def test_read_consistent_sees_pending_records_without_compacting(tmp_path):
+    store = ListStore()
+    journal = _journal(tmp_path, store)
+    seqs = journal.append_many([{"n": i} for i in range(3)])
+
+    snapshot, pending = journal.read_consistent(store.snapshot)
+    assert snapshot == []
+    assert [r["seq"] for r in pending] == seqs
+    assert store.records == []
+
+
+def test_read_consistent_never_misses_acknowledged_records(tmp_path):
+    store = ListStore()
+    journal = _journal(tmp_path, store, batch_size=7)
+    acknowledged = []
+    stop = threading.Event()
+
+    def write():
+        n = 0
+        while not stop.is_set():
+            acknowledged.extend(journal.append_many([{"n": n}, {"n": n + 1}]))
+            n += 2
+            if n % 10 == 0:
+                journal.compact()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        for _ in range(200):
+            before = set(acknowledged)
+            snapshot, pending = journal.read_consistent(store.snapshot)
+            seen = set(snapshot) | {r["seq"] for r in pending}
+            assert before <= seen
+            assert [r["seq"] for r in pending] == sorted({r["seq"] for r in pending})
+    finally:
+        stop.set()
+        writer.join()
+
+
+def _entry(website):
+    return {"website": website, "name": "Name", "contact": "", "password": "",
+            "category": "Work", "date": "2025-01-01 00:00:00"}
+
+
+def test_recover_replays_a_compaction_that_crashed_halfway(tmp_path):
+    store = SQLiteVaultStore(tmp_path / "vault.db")
+    # a big batch size keeps its background compactor asleep while the crash is staged
+    crashed = Journal(tmp_path / "vault.journal", store.apply_journal, batch_size=500, interval=3600)
+    crashed.append_many([{"op": "add", "entry": _entry(f"site{i}.com")} for i in range(5)])
+    # the crash: the journal was rotated aside and its first batch committed, then nothing
+    crashed._rotate()
+    store.apply_journal(crashed._read(crashed.compacting_path)[:2])
+    crashed.append({"op": "add", "entry": _entry("after.com")})
+    records = crashed._read(crashed.compacting_path) + crashed._read(crashed.path)
+
+    restarted = Journal(tmp_path / "vault.journal", store.apply_journal, batch_size=2, interval=3600)
+    restarted.recover()
+    assert sorted(row["website"] for row in store.all()) == ["after.com"] + [f"site{i}.com" for i in range(5)]
+    assert not restarted.compacting_path.exists()
+
+    # replaying everything once more is harmless: every seq is already applied
+    assert len(records) == 6
+    assert store.apply_journal(records) == []
+    assert len(store.all()) == 6
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    store = ListStore()
+    journal = _journal(tmp_path, store)
+    seqs = journal.append_many([{"n": 1}, {"n": 2}])
+    with open(journal.path, "a") as f:
+        f.write('{"n":3,"se')  # a crash mid-append, never acknowledged
+
+    Journal(journal.path, store.apply, interval=3600).recover()
+    assert store.snapshot() == seqs
+
+
+def test_a_failed_background_compaction_is_logged_and_retried(tmp_path, caplog):
+    store = ListStore()
+    failures = []
+
+    def apply(records):
+        if not failures:
+            failures.append(1)
+            raise OSError("disk full")
+        store.apply(records)
+
+    journal = Journal(tmp_path / "test.journal", apply, interval=0.05)
+    with caplog.at_level(logging.ERROR, logger="backend.journal"):
+        seqs = journal.append_many([{"n": 1}, {"n": 2}])
+        deadline = time.monotonic() + 5
+        while store.snapshot() != seqs and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert store.snapshot() == seqs
+    assert [r.exc_info[1] for r in caplog.records if r.exc_info][0].args == ("disk full",)
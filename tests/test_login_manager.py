@@ -0,0 +1,87 @@
+import threading
+import pytest
+from backend import login_manager as lm
+from config import LOGIN_RATE, LOGIN_BURST, LOGIN_BACKOFF_BASE, LOGIN_BACKOFF_MAX, LOGIN_WORKERS
+
+REFILL = 60 / LOGIN_RATE  # seconds per token
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_a_burst_then_refills_at_the_rate():
+    throttle = lm.ClientThrottle(0.0)
+    assert [throttle.take(0.0) for _ in range(LOGIN_BURST)] == [0.0] * LOGIN_BURST
+    assert throttle.take(0.0) == pytest.approx(REFILL)
+    assert throttle.take(REFILL / 2) == pytest.approx(REFILL / 2)
+    assert throttle.take(REFILL) == 0.0
+    # a long pause refills no more than the burst
+    later = REFILL * (LOGIN_BURST + 10)
+    assert [throttle.take(later) for _ in range(LOGIN_BURST)] == [0.0] * LOGIN_BURST
+    assert throttle.take(later) > 0
+
+
+def test_backoff_doubles_per_failure_up_to_the_cap_and_resets_on_success():
+    throttle = lm.ClientThrottle(0.0)
+    now = 0.0
+    delays = []
+    for _ in range(20):
+        throttle.failed(now)
+        delays.append(throttle.blocked_until - now)
+        assert throttle.take(now) == pytest.approx(delays[-1])
+        now = throttle.blocked_until + REFILL * LOGIN_BURST  # tokens never run out here
+    assert delays[:3] == [LOGIN_BACKOFF_BASE, LOGIN_BACKOFF_BASE * 2, LOGIN_BACKOFF_BASE * 4]
+    assert max(delays) == delays[-1] == LOGIN_BACKOFF_MAX
+
+    throttle.succeeded()
+    throttle.failed(now)
+    assert throttle.blocked_until - now == LOGIN_BACKOFF_BASE
+
+
+def test_attempt_login_throttles_per_client(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(lm, "_clock", clock)
+    monkeypatch.setattr(lm, "verify_master_passkey", lambda passphrase: passphrase == "right")
+
+    ok, _, retry = lm.attempt_login("wrong", "10.0.0.1")
+    assert not ok and retry == 0.0
+    ok, message, retry = lm.attempt_login("right", "10.0.0.1")
+    assert not ok and retry == pytest.approx(LOGIN_BACKOFF_BASE) and "Too many" in message
+
+    assert lm.attempt_login("right", "10.0.0.2")[0]  # other clients are not held back
+    clock.now += LOGIN_BACKOFF_BASE
+    assert lm.attempt_login("right", "10.0.0.1")[0]
+
+
+def test_derivations_beyond_the_slots_are_turned_away(monkeypatch):
+    lm.create_master_passkey("correct horse")
+    assert lm.verify_master_passkey("correct horse") is True
+    assert lm.verify_master_passkey("wrong") is False
+
+    started, release = threading.Barrier(LOGIN_WORKERS + 1), threading.Event()
+    derive = lm._derive
+
+    def slow_derive(*args):
+        started.wait()
+        release.wait()
+        return derive(*args)
+
+    monkeypatch.setattr(lm, "_derive", slow_derive)
+    results = []
+    workers = [threading.Thread(target=lambda: results.append(lm.verify_master_passkey("correct horse")))
+               for _ in range(LOGIN_WORKERS)]
+    for worker in workers:
+        worker.start()
+    started.wait()
+    try:
+        assert lm.verify_master_passkey("correct horse") is None
+    finally:
+        release.set()
+        for worker in workers:
+            worker.join()
+    assert results == [True] * LOGIN_WORKERS
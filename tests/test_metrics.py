@@ -0,0 +1,57 @@
+import pytest
+from backend.metrics import Counter, Histogram, counter, histogram, render
+
+
+def test_counter_renders_escaped_labels():
+    requests = Counter("test_requests_total", "Requests.", ("path",))
+    requests.inc(path='/a "quoted"\\path')
+    requests.inc(2, path="/b")
+    assert requests.render() == [
+        "# HELP test_requests_total Requests.",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{path="/a \\"quoted\\"\\\\path"} 1',
+        'test_requests_total{path="/b"} 2',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    latency = Histogram("test_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+    assert latency.render()[2:] == [
+        'test_seconds_bucket{le="0.1"} 2',
+        'test_seconds_bucket{le="1.0"} 3',
+        'test_seconds_bucket{le="+Inf"} 4',
+        "test_seconds_sum 3.65",
+        "test_seconds_count 4",
+    ]
+    assert latency.count() == 4
+
+
+def test_registry_returns_one_metric_per_name():
+    hits = counter("test_registry_hits_total", "Hits.", ("cache",))
+    assert counter("test_registry_hits_total", "Hits.", ("cache",)) is hits
+    with pytest.raises(ValueError):
+        histogram("test_registry_hits_total", "Hits.", ("cache",))
+    with pytest.raises(ValueError):
+        counter("test_registry_hits_total", "Hits.", ("other",))
+    hits.inc(cache="vault")
+    assert 'test_registry_hits_total{cache="vault"} 1' in render().splitlines()
+
+
+def test_metrics_endpoint_needs_a_login(client):
+    with client.session_transaction() as session:
+        session.clear()
+    response = client.get("/metrics")
+    assert response.status_code == 302 and "/metrics" not in response.headers["Location"]
+
+
+def test_metrics_endpoint_serves_the_text_format(client):
+    client.get("/vault?format=json")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain" and response.headers["Cache-Control"] == "no-store"
+    lines = response.get_data(as_text=True).splitlines()
+    assert "# TYPE secureme_request_seconds histogram" in lines
+    assert any(line.startswith('secureme_request_seconds_count{endpoint="vault.PasswordVault",method="GET",'
+                               'status="200"}') for line in lines)
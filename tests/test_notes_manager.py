@@ -0,0 +1,105 @@
+import io
+import time
+import pytest
+from backend import notes_manager as nm
+from backend.jobs import JobQueue, QueueFull
+from backend.encryption_utils import generate_random_key, write_encrypted
+
+
+def test_finished_jobs_leave_no_per_note_state():
+    file_name, key, job_id = nm.submit_note("Groceries", "milk, eggs")
+    nm.drain_note_jobs()
+
+    job = nm.note_job(job_id)
+    assert job["status"] == "done" and job["key_applied"]
+    assert nm.load_note_content(file_name, key) == ("Groceries", "milk, eggs")
+    assert file_name not in nm._generations
+    assert file_name not in nm._file_locks
+
+
+def test_a_superseded_save_says_its_key_was_never_applied():
+    file_name, key = nm.save_note("Plans", "v1")
+    stale_key, fresh_key = generate_random_key(), generate_random_key()
+    stale, fresh = nm._claim(file_name), nm._claim(file_name)
+
+    result = nm._write_note(file_name, "Plans", "v2", stale_key, stale)
+    assert result["status"] == "superseded" and not result["key_applied"]
+    assert file_name in nm._generations  # the newer save is still pending
+
+    assert nm._write_note(file_name, "Plans", "v3", fresh_key, fresh) == {"key_applied": True}
+    assert nm.load_note_content(file_name, fresh_key) == ("Plans", "v3")
+    assert nm.load_note_content(file_name, stale_key)[0] is None
+    assert file_name not in nm._generations
+    assert not nm._file_locks
+
+
+def test_generations_are_not_reused_after_their_entry_is_dropped():
+    first = nm._claim("reused.note")
+    nm._settle("reused.note", first)
+    assert nm._claim("reused.note") != first
+
+
+
+def test_a_rejected_submit_does_not_supersede_the_queued_one(monkeypatch):
+    monkeypatch.setattr(nm, "_jobs", JobQueue("notes-test", workers=1, max_queued=1))
+    file_name, key = nm.save_note("Draft", "v1")
+    monkeypatch.setattr(nm, "_new_file_name", lambda title: "busy.note")
+
+    with nm._file_lock("busy.note"):
+        # the only worker waits on busy.note, and the queue has room for one more job
+        _, _, busy = nm.submit_note("Busy", "")
+        while nm.note_job(busy)["status"] != "running":
+            time.sleep(0.01)
+        new_key, accepted = nm.submit_note_update(file_name, key, "Draft", "v2")
+        with pytest.raises(QueueFull):
+            nm.submit_note_update(file_name, key, "Draft", "v3")
+    nm._jobs.drain()
+
+    job = nm.note_job(accepted)
+    assert job["status"] == "done" and job["key_applied"]
+    assert nm.load_note_content(file_name, new_key) == ("Draft", "v2")
+    assert file_name not in nm._generations
+
+
+def _legacy_note(name, key, style=None):
+    from docx import Document
+    doc = Document()
+    doc.add_heading("Legacy", level=1)
+    paragraph = doc.add_paragraph("body")
+    if style == "bold":
+        paragraph.runs[0].bold = True
+    elif style:
+        paragraph.style = style
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    nm.ensure_notes_dir()
+    write_encrypted(nm.NOTES_DIR / name, [buffer.getvalue()], key)
+
+
+def test_opening_a_legacy_note_writes_nothing():
+    key = generate_random_key()
+    _legacy_note("opened.docx", key)
+    assert nm.load_note_content("opened.docx", key) == ("Legacy", "body")
+    assert (nm.NOTES_DIR / "opened.docx").exists()
+    assert not (nm.NOTES_DIR / "opened.note").exists()
+
+
+def test_updating_a_legacy_note_converts_it():
+    key = generate_random_key()
+    _legacy_note("edited.docx", key)
+    new_key = nm.update_note("edited.docx", key, "Legacy", "edited")
+    assert not (nm.NOTES_DIR / "edited.docx").exists()
+    assert nm.load_note_content("edited.docx", new_key) == ("Legacy", "edited")
+
+
+def test_migration_keeps_formatted_notes_as_docx():
+    keys = {}
+    for name, style in [("plain.docx", None), ("bold.docx", "bold"),
+                        ("list.docx", "List Bullet"), ("quote.docx", "Quote")]:
+        keys[name] = generate_random_key()
+        _legacy_note(name, keys[name], style)
+
+    result = nm.migrate_legacy_notes(keys)
+    assert result["migrated"] == 1 and result["not_plain"] == 3
+    assert (nm.NOTES_DIR / "plain.note").exists()
+    assert all((nm.NOTES_DIR / name).exists() for name in ("bold.docx", "list.docx", "quote.docx"))
@@ -0,0 +1,69 @@
+from datetime import date
+from backend.password_health import PasswordHmac, estimate_entropy, strength, age_days, health_report, WEAK_BITS
+
+TODAY = date(2026, 1, 31)
+
+
+def _row(uid, digest, bits, day="2026-01-01 10:00:00"):
+    return (uid, f"{uid}.example.com", "Name", "", "Work", day, digest, bits)
+
+
+def test_entropy_discounts_runs_and_repeats():
+    assert estimate_entropy("") == 0.0
+    assert estimate_entropy("aaaaaaaa") < estimate_entropy("aqzv")
+    assert estimate_entropy("abcd") < estimate_entropy("qzxv")
+    assert estimate_entropy("12345678") < WEAK_BITS
+    assert strength(estimate_entropy("correct-Horse-battery-42")) == "strong"
+    assert strength(None) == "unknown"
+
+
+def test_digests_match_only_under_the_same_key():
+    one, other = PasswordHmac(b"k" * 32), PasswordHmac(b"j" * 32)
+    assert one.digest("pw") == one.digest("pw") != one.digest("pw2")
+    assert one.digest("pw") != other.digest("pw")
+    assert one.is_current(one.digest("pw")) and not one.is_current(other.digest("pw"))
+    assert not one.is_current(None)
+
+
+def test_age_days_tolerates_bad_dates():
+    assert age_days("2026-01-01 00:00:00", TODAY) == 30
+    assert age_days("", TODAY) is None
+    assert age_days("yesterday", TODAY) is None
+
+
+def test_report_groups_reuse_and_lists_weak_and_old():
+    rows = [
+        _row("a", "k:1", 80.0),
+        _row("b", "k:1", 80.0),
+        _row("c", "k:1", 80.0),
+        _row("d", "k:2", 20.0, "2025-01-01 00:00:00"),
+        _row("e", "k:2", 50.0),
+        _row("f", "k:3", None, ""),
+    ]
+    report = health_report(rows, max_age_days=90, today=TODAY)
+
+    assert report["entries"] == 6
+    assert report["reused_entries"] == 5 and report["reused_groups"] == 2
+    assert [[e["id"] for e in g["entries"]] for g in report["reused"]] == [["a", "b", "c"], ["d", "e"]]
+    assert report["strength"] == {"weak": 1, "fair": 1, "strong": 3, "unknown": 1}
+    assert [e["id"] for e in report["weak"]] == ["d"] and report["weak_count"] == 1
+    assert [e["id"] for e in report["old"]] == ["d"] and report["old"][0]["age_days"] == 395
+    assert report["old_count"] == 1
+
+    d = report["weak"][0]
+    assert d["reused"] and d["strength"] == "weak"
+    assert d["score"] == round(60 * 20 / 72)
+    assert 0 < report["score"] < 100
+
+
+def test_report_limits_listed_entries_but_not_counts():
+    rows = [_row(str(i), "k:same", float(i)) for i in range(30)]
+    report = health_report(rows, max_age_days=90, today=TODAY, limit=5)
+    assert report["reused_entries"] == 30 and report["reused"][0]["count"] == 30
+    assert len(report["reused"][0]["entries"]) == 5
+    assert report["weak_count"] == 30 and [e["id"] for e in report["weak"]] == ["0", "1", "2", "3", "4"]
+
+
+def test_empty_vault_is_healthy():
+    report = health_report([], max_age_days=90, today=TODAY)
+    assert report["score"] == 100 and report["reused"] == [] and report["entries"] == 0
@@ -0,0 +1,56 @@
+import pytest
+from backend.search_index import SearchIndex, edit_distance
+
+
+def _index(*words):
+    index = SearchIndex()
+    index.build({"id": str(i), "website": word} for i, word in enumerate(words))
+    return index
+
+
+def _ids(index, query):
+    return [doc["id"] for doc in index.search(query)]
+
+
+def test_exact_and_prefix_rank_before_fuzzy():
+    index = _index("github", "gitlab", "gihtub")
+    assert _ids(index, "git") == ["0", "1"]
+    assert _ids(index, "github")[0] == "0"
+
+
+@pytest.mark.parametrize("indexed, query", [
+    ("aaaaaa", "aaaaaaa"),      # repeated trigrams on both sides
+    ("baaaaaa", "aaaaaa"),
+    ("bedddd", "badddd"),
+    ("mississippi", "misisippi"),
+    ("netflix", "netflxi"),
+])
+def test_fuzzy_finds_tokens_with_repeated_trigrams(indexed, query):
+    assert _ids(_index(indexed, "unrelated"), query) == ["0"]
+
+
+def test_fuzzy_respects_edit_limit():
+    # short tokens allow one edit, longer ones two
+    assert _ids(_index("amazon"), "amzzzn") == []
+    assert _ids(_index("facebook"), "fasebok") == ["0"]
+
+
+def test_add_and_remove_keep_postings_consistent():
+    index = _index("paypal")
+    index.add({"id": "9", "website": "paypal", "name": "shop"})
+    assert sorted(_ids(index, "paypal")) == ["0", "9"]
+    index.remove("9")
+    index.remove("0")
+    assert _ids(index, "paypal") == []
+    assert _ids(index, "paypa") == []
+
+
+@pytest.mark.parametrize("a, b, limit, expected", [
+    ("kitten", "sitting", 3, 3),
+    ("kitten", "sitting", 2, 3),
+    ("abc", "abc", 1, 0),
+    ("abc", "abd", 1, 1),
+    ("abc", "cab", 1, 2),
+])
+def test_edit_distance_is_bounded(a, b, limit, expected):
+    assert edit_distance(a, b, limit) == expected
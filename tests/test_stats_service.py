@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+import pytest
+from backend import stats_service
+from backend.stats_service import StatsService
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(stats_service, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def _counting_loader(values):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return values[len(calls) - 1]
+    return load, calls
+
+
+def test_counters_load_lazily_and_follow_incr(clock):
+    stats = StatsService(ttl=60)
+    load, calls = _counting_loader([10, 99])
+    stats.register("entries", load)
+    assert calls == []
+
+    assert stats.get("entries") == 10
+    stats.incr("entries")
+    stats.incr("entries", -3)
+    assert stats.get("entries") == 8
+    assert len(calls) == 1
+
+
+def test_incr_before_the_first_read_is_left_to_the_loader(clock):
+    stats = StatsService(ttl=60)
+    stats.register("entries", lambda: 5)
+    stats.incr("entries")  # the loader already counts this write
+    assert stats.get("entries") == 5
+
+
+def test_counters_reload_once_older_than_the_ttl(clock):
+    stats = StatsService(ttl=60)
+    load, calls = _counting_loader([1, 2])
+    stats.register("entries", load)
+    assert stats.get("entries") == 1
+    clock.now += 59
+    assert stats.get("entries") == 1
+    clock.now += 1
+    assert stats.get("entries") == 2 and len(calls) == 2
+
+
+def test_a_non_positive_ttl_reloads_on_every_read(clock):
+    stats = StatsService(ttl=0)
+    load, calls = _counting_loader([1, 2, 3])
+    stats.register("entries", load)
+    assert [stats.get("entries") for _ in range(3)] == [1, 2, 3]
+
+
+def test_invalidate_drops_one_or_every_counter(clock):
+    stats = StatsService(ttl=60)
+    a, a_calls = _counting_loader([1, 2, 3])
+    b, b_calls = _counting_loader([1, 2, 3])
+    stats.register("a", a)
+    stats.register("b", b)
+    assert stats.snapshot() == {"a": 1, "b": 1}
+    stats.invalidate("a")
+    assert stats.snapshot() == {"a": 2, "b": 1}
+    stats.invalidate()
+    assert stats.snapshot() == {"a": 3, "b": 2}
+
+
+def test_a_module_counter_imports_its_module_on_first_read(clock, monkeypatch):
+    stats = StatsService(ttl=60)
+    imported = []
+
+    def import_module(name):
+        imported.append(name)
+        stats.register("entries", lambda: 7)
+
+    monkeypatch.setattr(stats_service, "importlib", SimpleNamespace(import_module=import_module))
+    stats.register_module("entries", "backend.somewhere")
+    assert imported == []
+    assert stats.get("entries") == 7
+    assert imported == ["backend.somewhere"]
+
+    stats.register_module("missing", "backend.elsewhere")
+    with pytest.raises(LookupError):
+        stats.get("missing")
@@ -0,0 +1,92 @@
+import io
+import pytest
+from cryptography.exceptions import InvalidTag
+from backend.encryption_utils import encrypt_stream, decrypt_stream, decrypt_file, _HEADER
+
+KEY = "correct horse"
+SEGMENT = 16
+SEALED = SEGMENT + 16
+
+
+def _encrypt(plaintext: bytes, chunk: int = 5) -> bytes:
+    chunks = (plaintext[i:i + chunk] for i in range(0, len(plaintext), chunk))
+    return b"".join(encrypt_stream(chunks, KEY, SEGMENT))
+
+
+def _decrypt(data: bytes, key: str = KEY) -> bytes:
+    return b"".join(decrypt_stream(io.BytesIO(data), key))
+
+
+def _segments(data: bytes) -> list[bytes]:
+    body = data[_HEADER.size:]
+    return [body[i:i + SEALED] for i in range(0, len(body), SEALED)]
+
+
+@pytest.mark.parametrize("size", [0, 1, SEGMENT - 1, SEGMENT, SEGMENT + 1, 3 * SEGMENT, 100])
+def test_round_trip(size):
+    plaintext = bytes(i % 251 for i in range(size))
+    assert _decrypt(_encrypt(plaintext)) == plaintext
+
+
+def test_wrong_key_fails():
+    with pytest.raises(InvalidTag):
+        _decrypt(_encrypt(b"secret" * 10), "wrong key")
+
+
+def test_dropping_the_last_segments_fails():
+    data = _encrypt(b"x" * (3 * SEGMENT + 4))
+    header, segments = data[:_HEADER.size], _segments(data)
+    for kept in range(1, len(segments)):
+        with pytest.raises(InvalidTag):
+            _decrypt(header + b"".join(segments[:kept]))
+
+
+def test_reordered_segments_fail():
+    data = _encrypt(b"a" * SEGMENT + b"b" * SEGMENT + b"c")
+    header, segments = data[:_HEADER.size], _segments(data)
+    with pytest.raises(InvalidTag):
+        _decrypt(header + segments[1] + segments[0] + segments[2])
+
+
+def test_appending_a_copied_segment_fails():
+    data = _encrypt(b"a" * SEGMENT + b"b")
+    with pytest.raises(InvalidTag):
+        _decrypt(data + _segments(data)[0])
+
+
+@pytest.mark.parametrize("offset", range(5, _HEADER.size))  # segment size, salt, nonce prefix
+def test_header_tampering_fails(offset):
+    data = bytearray(_encrypt(b"payload" * 5))
+    data[offset] ^= 0x01
+    with pytest.raises(InvalidTag):
+        _decrypt(bytes(data))
+
+
+def test_wrong_magic_or_version_is_rejected():
+    data = _encrypt(b"payload")
+    for offset in (0, 4):
+        tampered = bytearray(data)
+        tampered[offset] ^= 0x01
+        with pytest.raises(ValueError):
+            _decrypt(bytes(tampered))
+
+
+def test_flipped_ciphertext_bit_fails():
+    data = bytearray(_encrypt(b"payload" * 5))
+    data[_HEADER.size + 3] ^= 0x80
+    with pytest.raises(InvalidTag):
+        _decrypt(bytes(data))
+
+
+def test_decrypt_file_leaves_a_tampered_file_untouched(tmp_path):
+    path = tmp_path / "doc.bin"
+    tampered = bytearray(b"".join(encrypt_stream([b"top secret" * 1000], KEY)))
+    tampered[-1] ^= 0x01
+    path.write_bytes(bytes(tampered))
+
+    assert decrypt_file(path, KEY) is False
+    assert path.read_bytes() == bytes(tampered)
+
+    path.write_bytes(bytes(tampered[:-1]) + bytes([tampered[-1] ^ 0x01]))
+    assert decrypt_file(path, KEY) is True
+    assert path.read_bytes() == b"top secret" * 1000
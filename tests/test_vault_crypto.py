@@ -0,0 +1,49 @@
+import threading
+from backend.encryption_utils import VaultCrypto
+
+
+def test_encrypt_picks_up_a_ring_rotated_elsewhere(tmp_path):
+    key_file = tmp_path / "vault_master.key"
+    worker, rotator = VaultCrypto(key_file), VaultCrypto(key_file)
+    worker.encrypt("warm up")  # the worker has the ring loaded
+
+    with rotator.rotating():
+        rotator.add_key()
+        rotator.retire_old_keys()
+
+    token = worker.encrypt("after rotation")
+    assert rotator.decrypt(token) == "after rotation"
+    assert worker.password_hmac().key_id == rotator.password_hmac().key_id
+
+
+def test_rotation_waits_for_writers_in_other_processes(tmp_path):
+    # separate instances hold separate lock files descriptors, like separate processes
+    key_file = tmp_path / "vault_master.key"
+    writer, rotator = VaultCrypto(key_file), VaultCrypto(key_file)
+    rotated = threading.Event()
+
+    def rotate():
+        with rotator.rotating():
+            rotated.set()
+
+    with writer.writing():
+        thread = threading.Thread(target=rotate)
+        thread.start()
+        assert not rotated.wait(0.2)
+    thread.join(5)
+    assert rotated.is_set()
+
+
+def test_writers_of_one_process_share_the_ring(tmp_path):
+    crypto = VaultCrypto(tmp_path / "vault_master.key")
+    with crypto.writing(), crypto.writing():
+        assert crypto.decrypt(crypto.encrypt("x")) == "x"
+
+
+def test_add_key_keeps_old_tokens_readable(tmp_path):
+    crypto = VaultCrypto(tmp_path / "vault_master.key")
+    token = crypto.encrypt("before")
+    crypto.add_key()
+    assert crypto.decrypt(token) == "before"
+    assert crypto.decrypt(crypto.rotate(token)) == "before"
+    assert len(crypto.keys()) == 2
@@ -0,0 +1,252 @@
+import io
+from backend import vault_manager as vm
+from backend.encryption_utils import VaultCrypto, VAULT_KEY_FILE, encrypt_text
+
+
+def _save(website, password="pw-1", category="Work"):
+    ok, msg = vm.save_entry(website, "Name", f"me@{website}", password, category)
+    assert ok, msg
+    return next(e for e in vm.list_entries(decrypt=False) if e["website"] == website)
+
+
+def test_save_after_another_process_rotated_the_key():
+    _save("before.example.com")
+    other_process = VaultCrypto(VAULT_KEY_FILE)
+    with other_process.rotating():
+        other_process.add_key()
+        vm._journal.flush()  # as rotate_vault_key does
+        vm.get_store().transform_passwords(other_process.rotate)
+        other_process.retire_old_keys()
+
+    entry = _save("after.example.com", "still-readable")
+    assert vm.reveal_entry(entry["id"]) == "still-readable"
+    vm._journal.flush()
+    assert other_process.decrypt(vm.get_store().get(entry["id"])["password"]) == "still-readable"
+
+
+def test_update_with_a_stale_version_is_a_conflict():
+    entry = _save("conflict.example.com")
+    ok, _ = vm.update_entry(entry["id"], "conflict.example.com", "First", "", "", "Work", version=entry["version"])
+    assert ok
+
+    ok, msg = vm.update_entry(entry["id"], "conflict.example.com", "Second", "", "", "Work", version=entry["version"])
+    assert not ok
+    assert "changed elsewhere" in msg
+    assert vm.get_entry(entry["id"])["name"] == "First"
+
+
+def test_update_loses_the_compare_and_swap_to_a_concurrent_writer():
+    entry = _save("race.example.com")
+    vm._journal.flush()
+    store = vm.get_store()
+    row = dict(store.get(entry["id"]))
+    assert store.update(entry["id"], dict(row, name="Winner"), row["version"])
+    assert not store.update(entry["id"], dict(row, name="Loser"), row["version"])
+    assert vm.get_entry(entry["id"])["name"] == "Winner"
+
+
+def test_update_keeps_the_password_when_left_blank():
+    entry = _save("keep.example.com", "kept-password")
+    ok, msg = vm.update_entry(entry["id"], "keep.example.com", "Name", "", "", "Home")
+    assert ok, msg
+    assert vm.reveal_entry(entry["id"]) == "kept-password"
+
+
+def test_search_sees_writes_made_outside_this_process():
+    _save("github.com")
+    assert [e["website"] for e in vm.search_entries("github")] == ["github.com"]
+
+    # another worker writes straight to the shared store
+    uid = vm.get_store().add({
+        "website": "gitlab.com", "name": "Name", "contact": "me@gitlab.com",
+        "password": encrypt_text("pw"), "category": "Work", "date": "2025-01-01 00:00:00",
+    })
+    assert {e["website"] for e in vm.search_entries("git")} == {"github.com", "gitlab.com"}
+
+    vm.get_store().delete(uid)
+    assert [e["website"] for e in vm.search_entries("gitlab")] == []
+
+
+def test_search_sees_this_process_writes():
+    entry = _save("bitbucket.org")
+    assert [e["id"] for e in vm.search_entries("bitbucket")] == [entry["id"]]
+    ok, msg = vm.delete_entry(entry["id"])
+    assert ok, msg
+    assert vm.search_entries("bitbucket") == []
+
+
+
+def _no_rebuild(store):
+    raise AssertionError("the search index was rebuilt")
+
+
+def test_search_updates_this_process_writes_in_place(monkeypatch):
+    vm.build_search_index()
+    monkeypatch.setattr(vm, "_refresh_index", lambda store: None)
+
+    entry = _save("codeberg.org")
+    assert [e["id"] for e in vm.search_entries("codeberg")] == [entry["id"]]
+    ok, msg = vm.update_entry(entry["id"], "sourcehut.org", "Name", "", "", "Work")
+    assert ok, msg
+    assert vm.search_entries("codeberg") == []
+    assert [e["id"] for e in vm.search_entries("sourcehut")] == [entry["id"]]
+    ok, msg = vm.delete_entry(entry["id"])
+    assert ok, msg
+    assert vm.search_entries("sourcehut") == []
+
+
+def test_search_replays_outside_writes_without_a_rebuild(monkeypatch):
+    vm.search_entries("warm up")
+    monkeypatch.setattr(vm, "_build_index", _no_rebuild)
+
+    store = vm.get_store()
+    uid = store.add({
+        "website": "launchpad.net", "name": "Name", "contact": "me@launchpad.net",
+        "password": encrypt_text("pw"), "category": "Work", "date": "2025-01-01 00:00:00",
+    })
+    assert [e["id"] for e in vm.search_entries("launchpad")] == [uid]
+
+    row = store.get(uid)
+    assert store.update(uid, dict(row, website="savannah.gnu.org", contact="me@savannah.gnu.org"))
+    assert vm.search_entries("launchpad") == []
+    assert [e["id"] for e in vm.search_entries("savannah")] == [uid]
+
+    store.delete(uid)
+    assert vm.search_entries("savannah") == []
+
+
+def test_health_report_finds_reused_passwords_without_decrypting_them():
+    for site in ("reuse-one.example.com", "reuse-two.example.com"):
+        _save(site, "Shared-Password-123")
+    _save("unique.example.com", "an0ther-Unique-Passphrase!")
+
+    report = vm.vault_health()
+    groups = [{e["website"] for e in g["entries"]} for g in report["reused"]]
+    assert {"reuse-one.example.com", "reuse-two.example.com"} in groups
+    assert not any("unique.example.com" in g for g in groups)
+    assert report["undecryptable"] == 0
+
+
+def test_saves_leave_compaction_to_the_background(monkeypatch):
+    calls = []
+    vm.build_search_index()
+    monkeypatch.setattr(vm._journal, "compact", lambda: calls.append(1))
+    before = vm.count_vault_entries()
+
+    entry = _save("pending.example.com", "not-compacted-yet")
+    assert calls == []
+    assert vm.get_store().get(entry["id"]) is None
+    assert vm.get_entry(entry["id"])["website"] == "pending.example.com"
+    assert vm.reveal_entry(entry["id"]) == "not-compacted-yet"
+    assert vm.count_vault_entries() == before + 1
+    page = vm.list_entries_page(q="pending.example")
+    assert [e["id"] for e in page["entries"]] == [entry["id"]] and page["total"] == 1
+    assert [e["id"] for e in vm.search_entries("pending")] == [entry["id"]]
+    assert "not-compacted-yet" in "".join(vm.export_entries("csv"))
+    assert calls == []
+
+
+def test_pages_over_pending_entries_match_the_compacted_vault(monkeypatch):
+    vm._journal.flush()
+    for n in range(5):
+        _save(f"stored{n}.example.com", category="Work" if n % 2 else "Home")
+    vm._journal.flush()
+    monkeypatch.setattr(vm._journal, "compact", lambda: 0)
+    for n in range(4):
+        _save(f"queued{n}.example.com", category="Home" if n % 2 else "Work")
+
+    def pages():
+        result = []
+        for sort in vm.SORTS:
+            for category in (None, "Work"):
+                for q in (None, "QUEUED", "example"):
+                    for page_size in (1, 2, 3):
+                        for page in range(1, 8):
+                            listed = vm.list_entries_page(page, page_size, category, q, sort)
+                            result.append(([e["id"] for e in listed["entries"]], listed["total"]))
+        return result
+
+    overlaid = pages()
+    monkeypatch.undo()
+    vm._journal.flush()
+    assert pages() == overlaid
+
+
+def _listing(**kwargs):
+    listed = vm.list_entries_page(**kwargs)
+    return [e["website"] for e in listed["entries"]], listed
+
+
+def test_listing_pages_through_one_category_in_every_order():
+    sites = [f"page{n}.example.com" for n in range(5)]
+    for site in sites:
+        _save(site, category="Paging")
+    _save("elsewhere.example.com", category="Other")
+
+    first, listed = _listing(page=1, page_size=2, category="Paging", sort="website")
+    assert first == sites[:2]
+    assert (listed["total"], listed["pages"], listed["category"]) == (5, 3, "Paging")
+    assert _listing(page=3, page_size=2, category="Paging", sort="website")[0] == sites[4:]
+    assert _listing(page=4, page_size=2, category="Paging", sort="website")[0] == []
+    assert _listing(page=1, page_size=10, category="Paging", sort="website_desc")[0] == sites[::-1]
+    # saved within the same second: the date ties are broken by insertion order
+    assert _listing(page=1, page_size=10, category="Paging", sort="oldest")[0] == sites
+    assert _listing(page=1, page_size=10, category="Paging", sort="newest")[0] == sites[::-1]
+
+
+def test_listing_search_matches_literally_and_case_insensitively():
+    _save("100%-match.example.com", category="Filters")
+    _save("100x-match.example.com", category="Filters")
+    _save("under_score.example.com", category="Filters")
+
+    assert _listing(q="100%", category="Filters")[0] == ["100%-match.example.com"]
+    assert _listing(q="R_S", category="Filters")[0] == ["under_score.example.com"]
+    assert set(_listing(q="MATCH", category="Filters")[0]) == {"100%-match.example.com", "100x-match.example.com"}
+    assert _listing(q="me@under", category="Filters")[0] == ["under_score.example.com"]  # contact
+
+
+def test_listing_clamps_its_arguments():
+    _, listed = _listing(page=0, page_size=10_000, category="All", q="  ", sort="bogus")
+    assert (listed["page"], listed["page_size"]) == (1, vm.MAX_PAGE_SIZE)
+    assert (listed["category"], listed["q"], listed["sort"]) == ("All", "", vm.DEFAULT_SORT)
+    assert listed["total"] == vm.count_vault_entries()
+
+
+def test_entries_are_addressed_by_a_stable_id(client):
+    entry = _save("stable.example.com", "pw-stable")
+    assert len(entry["id"]) == 26 and entry["version"] == 1
+
+    fetched = client.get(f"/vault/entries/{entry['id']}").get_json()
+    assert fetched == entry and "password" not in fetched
+    assert client.get(f"/vault/reveal/{entry['id']}").get_json()["password"] == "pw-stable"
+
+    ok, msg = vm.update_entry(entry["id"], "stable.example.com", "Renamed", "", "", "Work", version=1)
+    assert ok, msg
+    assert vm.get_entry(entry["id"])["version"] == 2  # the id survives an update
+
+    client.post(f"/password-vault/edit/{entry['id']}",
+                data={"website": "stable.example.com", "name": "Stale", "version": "1"})
+    assert vm.get_entry(entry["id"])["name"] == "Renamed"
+
+    client.post(f"/password-vault/delete/{entry['id']}")
+    assert client.get(f"/vault/entries/{entry['id']}").status_code == 404
+    assert client.get(f"/vault/reveal/{entry['id']}").status_code == 404
+    assert vm.delete_entry(entry["id"]) == (False, "❌ Entry not found.")
+    assert vm.update_entry(entry["id"], "stable.example.com", "Gone", "", "", "Work") == (False, "❌ Entry not found.")
+
+
+def test_an_unknown_id_is_not_found(client):
+    assert client.get("/vault/entries/01ARZ3NDEKTSV4RRFFQ69G5FAV").status_code == 404
+    assert vm.get_entry("01ARZ3NDEKTSV4RRFFQ69G5FAV") is None
+
+
+def test_a_corrupt_breach_index_does_not_block_writes():
+    vm.BREACH_INDEX.write_bytes(b"SMBR")
+    try:
+        ok, msg = vm.save_entry("corrupt-index.example.com", "Name", "me", "pw", "Work")
+        assert ok, msg
+        stats = vm.import_entries(io.StringIO("url,username,password\ncorrupt-import.example.com,me,pw\n"),
+                                  "csv", workers=1)
+        assert stats["added"] == 1 and stats["breached"] == 0
+    finally:
+        vm.BREACH_INDEX.unlink()
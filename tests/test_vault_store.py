@@ -0,0 +1,55 @@
+import pytest
+from backend.vault_store import VaultStore, SQLiteVaultStore
+
+
+def _entry(website):
+    return {"website": website, "name": "Name", "contact": "", "password": "token",
+            "category": "Work", "date": "2025-01-01 00:00:00"}
+
+
+def test_changes_since_reports_adds_edits_and_deletes(tmp_path):
+    store = SQLiteVaultStore(tmp_path / "vault.db")
+    kept = store.add(_entry("kept.example.com"))
+    seq = store.change_seq()
+
+    added = store.add(_entry("added.example.com"))
+    row = store.get(kept)
+    assert store.update(kept, dict(row, name="Renamed"))
+    store.delete(added)
+
+    head, changes = store.changes_since(seq)
+    assert head == store.change_seq() == seq + 3
+    assert changes[kept]["name"] == "Renamed"
+    assert changes[added] is None
+    assert store.changes_since(head) == (head, {})
+
+
+def test_password_only_writes_are_not_changes(tmp_path):
+    store = SQLiteVaultStore(tmp_path / "vault.db")
+    store.add(_entry("a.example.com"))
+    seq = store.change_seq()
+    store.transform_passwords(lambda token: token + "!")
+    assert store.changes_since(seq) == (seq, {})
+
+
+def test_changes_since_gives_up_once_the_log_was_trimmed(tmp_path):
+    store = SQLiteVaultStore(tmp_path / "vault.db")
+    for site in ("a", "b", "c"):
+        store.add(_entry(f"{site}.example.com"))
+    with store._conn() as conn:
+        conn.execute("DELETE FROM vault_changes WHERE seq <= 2")
+
+    assert store.changes_since(0) is None
+    assert store.changes_since(1) is None
+    assert store.changes_since(2)[0] == 3
+    # a smaller database took this one's place
+    assert store.changes_since(10) is None
+
+
+def test_an_engine_must_implement_the_whole_interface():
+    class Partial(VaultStore):
+        def add(self, entry):
+            return "uid"
+
+    with pytest.raises(TypeError):
+        Partial()